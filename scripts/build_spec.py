@@ -11,7 +11,10 @@ from typing import (
 
 
 PHASE0_IMPORTS = '''from typing import (
-    Any, Dict, Set, Sequence, Tuple, Optional
+    Any, Callable, Dict, Set, Sequence, MutableSequence, Tuple, Optional
+)
+from bisect import (
+    insort,
 )
 
 from dataclasses import (
@@ -31,13 +34,17 @@ from eth2spec.utils.bls import (
     bls_aggregate_signatures,
     bls_aggregate_pubkeys,
     bls_verify,
+    bls_verify_batch,
     bls_sign,
 )
 
 from eth2spec.utils.hash_function import hash
 '''
 PHASE1_IMPORTS = '''from typing import (
-    Any, Dict, Set, Sequence, MutableSequence, NewType, Tuple, Union,
+    Any, Callable, Dict, Set, Sequence, MutableSequence, NewType, Optional, Tuple, Union,
+)
+from bisect import (
+    insort,
 )
 from math import (
     log2,
@@ -62,6 +69,7 @@ from eth2spec.utils.ssz.ssz_typing import (
 from eth2spec.utils.bls import (
     bls_aggregate_pubkeys,
     bls_verify,
+    bls_verify_batch,
     bls_verify_multiple,
     bls_signature_to_G2,
 )
@@ -108,6 +116,1004 @@ def compute_committee(indices: Sequence[ValidatorIndex],  # type: ignore
     return committee_cache[param_hash]
 
 
+# Monkey patch attestation deltas with a single pass over the pending attestations
+_get_attestation_deltas = get_attestation_deltas
+
+
+@dataclass
+class AttestationParticipation(object):
+    source: MutableSequence[bool]
+    target: MutableSequence[bool]
+    head: MutableSequence[bool]
+    inclusion_delay: MutableSequence[Slot]
+    inclusion_proposer: MutableSequence[ValidatorIndex]
+
+
+def get_attestation_participation(state: BeaconState, epoch: Epoch) -> AttestationParticipation:
+    """
+    Return per-validator source, target and head flags of the unslashed attesters in ``epoch``,
+    with the minimum inclusion delay and the proposer of that inclusion.
+    """
+    validator_count = len(state.validators)
+    participation = AttestationParticipation(
+        source=[False] * validator_count,
+        target=[False] * validator_count,
+        head=[False] * validator_count,
+        inclusion_delay=[Slot(0)] * validator_count,
+        inclusion_proposer=[ValidatorIndex(0)] * validator_count,
+    )
+    attestations = get_matching_source_attestations(state, epoch)
+    if len(attestations) == 0:
+        return participation
+
+    target_root = get_block_root(state, epoch)
+    committees: Dict[Tuple[Slot, CommitteeIndex], Sequence[ValidatorIndex]] = {}
+    for a in attestations:
+        committee_key = (a.data.slot, a.data.index)
+        if committee_key not in committees:
+            committees[committee_key] = get_beacon_committee(state, a.data.slot, a.data.index)
+        is_target = a.data.target.root == target_root
+        is_head = a.data.beacon_block_root == get_block_root_at_slot(state, a.data.slot)
+        for i, index in enumerate(committees[committee_key]):
+            if not a.aggregation_bits[i]:
+                continue
+            # Ties are broken by attestation order, like ``min`` does in the spec
+            if not participation.source[index] or a.inclusion_delay < participation.inclusion_delay[index]:
+                participation.inclusion_delay[index] = a.inclusion_delay
+                participation.inclusion_proposer[index] = a.proposer_index
+            participation.source[index] = True
+            participation.target[index] |= is_target
+            participation.head[index] |= is_head
+
+    for i, validator in enumerate(state.validators):
+        if validator.slashed:
+            participation.source[i] = participation.target[i] = participation.head[i] = False
+    return participation
+
+
+def get_attestation_deltas(state: BeaconState) -> Tuple[Sequence[Gwei], Sequence[Gwei]]:  # type: ignore
+    previous_epoch = get_previous_epoch(state)
+    total_balance = get_total_active_balance(state)
+    validator_count = len(state.validators)
+    rewards = [0] * validator_count
+    penalties = [0] * validator_count
+    eligible_validator_indices = [
+        ValidatorIndex(index) for index, v in enumerate(state.validators)
+        if is_active_validator(v, previous_epoch) or (v.slashed and previous_epoch + 1 < v.withdrawable_epoch)
+    ]
+    base_rewards = [get_base_reward(state, ValidatorIndex(index), total_balance) for index in range(validator_count)]
+    participation = get_attestation_participation(state, previous_epoch)
+
+    # Micro-incentives for matching FFG source, FFG target, and head
+    for flags in (participation.source, participation.target, participation.head):
+        attesting_balance = get_total_balance(state, set(ValidatorIndex(i) for i, flag in enumerate(flags) if flag))
+        for index in eligible_validator_indices:
+            if flags[index]:
+                rewards[index] += base_rewards[index] * attesting_balance // total_balance
+            else:
+                penalties[index] += base_rewards[index]
+
+    # Proposer and inclusion delay micro-rewards
+    for i in range(validator_count):
+        if participation.source[i]:
+            proposer_reward = base_rewards[i] // PROPOSER_REWARD_QUOTIENT
+            rewards[participation.inclusion_proposer[i]] += proposer_reward
+            max_attester_reward = base_rewards[i] - proposer_reward
+            rewards[i] += max_attester_reward // participation.inclusion_delay[i]
+
+    # Inactivity penalty
+    finality_delay = previous_epoch - state.finalized_checkpoint.epoch
+    if finality_delay > MIN_EPOCHS_TO_INACTIVITY_PENALTY:
+        for index in eligible_validator_indices:
+            penalties[index] += BASE_REWARDS_PER_EPOCH * base_rewards[index]
+            if not participation.target[index]:
+                penalties[index] += (
+                    state.validators[index].effective_balance * finality_delay // INACTIVITY_PENALTY_QUOTIENT
+                )
+
+    return [Gwei(reward) for reward in rewards], [Gwei(penalty) for penalty in penalties]
+
+
+# Monkey patch deposit processing with a pubkey index, shared between copies of the validator registry
+class PubkeyIndex(object):
+    """
+    Map from pubkey to validator index, shared between copies of a validator registry.
+    Copies may diverge, hence an index found in the map is verified against the registry it is used for.
+    """
+
+    def __init__(self) -> None:
+        self.indices: Dict[BLSPubkey, ValidatorIndex] = {}
+
+    def __copy__(self) -> 'PubkeyIndex':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'PubkeyIndex':
+        return self
+
+
+def get_pubkey_index(validators: Sequence[Validator]) -> PubkeyIndex:
+    """
+    Return the pubkey index of ``validators``, after adding the validators appended since the last call.
+    The index and the number of validators added to it are attributes of the registry, to follow it through copies.
+    A registry shorter than that number was shrunk, and gets a new index.
+    """
+    pubkey_index = getattr(validators, 'pubkey_index', None)
+    if pubkey_index is None or getattr(validators, 'pubkey_index_count') > len(validators):
+        pubkey_index = PubkeyIndex()
+        setattr(validators, 'pubkey_index', pubkey_index)
+        setattr(validators, 'pubkey_index_count', 0)
+    for index in range(getattr(validators, 'pubkey_index_count'), len(validators)):
+        pubkey_index.indices[validators[index].pubkey] = ValidatorIndex(index)
+    setattr(validators, 'pubkey_index_count', len(validators))
+    return pubkey_index
+
+
+def get_validator_index_by_pubkey(state: BeaconState, pubkey: BLSPubkey) -> Optional[ValidatorIndex]:
+    """
+    Return the index of the validator with ``pubkey`` in the registry of ``state``, if there is one.
+    """
+    indices = get_pubkey_index(state.validators).indices
+    # The map has the pubkeys appended to the registry, possibly at the index of a diverging registry sharing it.
+    # It misses validators replaced in place: look up the registry, as the spec does, unless the map is right.
+    if pubkey in indices:
+        index = indices[pubkey]
+        if index < len(state.validators) and state.validators[index].pubkey == pubkey:
+            return index
+    validator_pubkeys = [v.pubkey for v in state.validators]
+    if pubkey not in validator_pubkeys:
+        return None
+    index = ValidatorIndex(validator_pubkeys.index(pubkey))
+    indices[pubkey] = index
+    return index
+
+
+_process_deposit = process_deposit
+
+
+def process_deposit(state: BeaconState, deposit: Deposit) -> None:  # type: ignore
+    # Verify the Merkle branch
+    assert is_valid_merkle_branch(
+        leaf=hash_tree_root(deposit.data),
+        branch=deposit.proof,
+        depth=DEPOSIT_CONTRACT_TREE_DEPTH + 1,  # Add 1 for the `List` length mix-in
+        index=state.eth1_deposit_index,
+        root=state.eth1_data.deposit_root,
+    )
+
+    # Deposits must be processed in order
+    state.eth1_deposit_index += 1
+
+    pubkey = deposit.data.pubkey
+    amount = deposit.data.amount
+    index = get_validator_index_by_pubkey(state, pubkey)
+    if index is None:
+        # Verify the deposit signature (proof of possession) for new validators.
+        # Note: The deposit contract does not check signatures.
+        # Note: Deposits are valid across forks, thus the deposit domain is retrieved directly from `compute_domain`.
+        domain = compute_domain(DOMAIN_DEPOSIT)
+        if not bls_verify(pubkey, signing_root(deposit.data), deposit.data.signature, domain):
+            return
+
+        # Add validator and balance entries
+        state.validators.append(Validator(
+            pubkey=pubkey,
+            withdrawal_credentials=deposit.data.withdrawal_credentials,
+            activation_eligibility_epoch=FAR_FUTURE_EPOCH,
+            activation_epoch=FAR_FUTURE_EPOCH,
+            exit_epoch=FAR_FUTURE_EPOCH,
+            withdrawable_epoch=FAR_FUTURE_EPOCH,
+            effective_balance=min(amount - amount % EFFECTIVE_BALANCE_INCREMENT, MAX_EFFECTIVE_BALANCE),
+        ))
+        state.balances.append(amount)
+    else:
+        # Increase balance by deposit amount
+        increase_balance(state, index, amount)
+
+
+# Monkey patch process_slots to fast-forward over empty slots, re-hashing only the fields that change between them
+class MerkleTree(object):
+    """
+    Merkle tree of a sequence of roots, re-hashing only the branch of an updated root.
+    """
+    def __init__(self, leaves: Sequence[Hash]) -> None:
+        depth = max(len(leaves) - 1, 0).bit_length()
+        self.layers: MutableSequence[MutableSequence[Hash]] = [list(leaves) + [Hash()] * (2**depth - len(leaves))]
+        for _ in range(depth):
+            below = self.layers[-1]
+            self.layers.append([hash(below[i] + below[i + 1]) for i in range(0, len(below), 2)])
+
+    def get_root(self) -> Hash:
+        return self.layers[-1][0]
+
+    def set_leaf(self, index: int, leaf: Hash) -> None:
+        self.layers[0][index] = leaf
+        for depth in range(1, len(self.layers)):
+            index //= 2
+            below = self.layers[depth - 1]
+            self.layers[depth][index] = hash(below[index * 2] + below[index * 2 + 1])
+
+
+_process_slots = process_slots
+
+
+def process_slots(state: BeaconState, slot: Slot) -> None:  # type: ignore
+    assert state.slot <= slot
+    if state.slot == slot:
+        return
+    fields = list(BeaconState.get_fields().keys())
+    # Only process_slot writes the historical roots, their trees are kept through the epoch transitions
+    state_roots_tree = MerkleTree(state.state_roots)
+    block_roots_tree = MerkleTree(state.block_roots)
+    while state.slot < slot:
+        # Roots of the fields, of which only the slot, the historical roots and the latest block header
+        #  change until the next epoch transition
+        state_tree = MerkleTree([
+            state_roots_tree.get_root() if name == 'state_roots' else
+            block_roots_tree.get_root() if name == 'block_roots' else
+            hash_tree_root(getattr(state, name))
+            for name in fields
+        ])
+        previous_block_root = signing_root(state.latest_block_header)
+        while True:
+            # Cache state root
+            previous_state_root = state_tree.get_root()
+            index = state.slot % SLOTS_PER_HISTORICAL_ROOT
+            state.state_roots[index] = previous_state_root
+            state_roots_tree.set_leaf(index, previous_state_root)
+            state_tree.set_leaf(fields.index('state_roots'), state_roots_tree.get_root())
+            # Cache latest block header state root
+            if state.latest_block_header.state_root == Bytes32():
+                state.latest_block_header.state_root = previous_state_root
+                state_tree.set_leaf(fields.index('latest_block_header'), hash_tree_root(state.latest_block_header))
+                previous_block_root = signing_root(state.latest_block_header)
+            # Cache block root
+            state.block_roots[index] = previous_block_root
+            block_roots_tree.set_leaf(index, previous_block_root)
+            state_tree.set_leaf(fields.index('block_roots'), block_roots_tree.get_root())
+            # Process epoch on the start slot of the next epoch
+            if (state.slot + 1) % SLOTS_PER_EPOCH == 0:
+                process_epoch(state)
+                state.slot += Slot(1)
+                break
+            state.slot += Slot(1)
+            if state.slot == slot:
+                break
+            state_tree.set_leaf(fields.index('slot'), hash_tree_root(state.slot))
+
+
+# Monkey patch state processing with indexes over the state, maintained while processing it
+@dataclass
+class BlockContext(object):
+    """
+    Data derived from the state that the operations of a block do not change, memoized while processing the block:
+     committees and the proposer depend on the seeds and the validators active in the previous and current epochs,
+     and domains on the fork.
+    """
+    committee_counts: Dict[Slot, uint64] = field(default_factory=dict)
+    committees: Dict[Tuple[Slot, CommitteeIndex], Sequence[ValidatorIndex]] = field(default_factory=dict)
+    proposer_index: Optional[ValidatorIndex] = None
+    domains: Dict[Tuple[DomainType, Epoch], Domain] = field(default_factory=dict)
+    # Roots of attestation data, by serialized attestation data
+    attestation_data_roots: Dict[bytes, Hash] = field(default_factory=dict)
+
+
+@dataclass
+class ProcessingContext(object):
+    """
+    Indexes over a state, kept current by the spec functions that modify the indexed fields.
+    A context is an attribute of the state it indexes, and only lives for the duration of the processing of the state,
+     as the state may be modified freely outside of the spec functions.
+    Copies of the state do not share the context.
+    """
+    # Number of exiting validators per exit epoch, and the latest exit epoch
+    exit_queue_churn: Optional[Dict[Epoch, int]] = None
+    latest_exit_epoch: Epoch = Epoch(0)
+    # Validators eligible for activation and not dequeued prior to finalized epoch, sorted by eligibility epoch
+    activation_queue: Optional[MutableSequence[Tuple[Epoch, ValidatorIndex]]] = None
+    churn_limits: Dict[Epoch, uint64] = field(default_factory=dict)
+    # Slashed validators by withdrawable epoch, and the sum of the slashings vector
+    slashed_validators: Optional[Dict[Epoch, Set[ValidatorIndex]]] = None
+    slashed_withdrawable_epochs: Dict[ValidatorIndex, Epoch] = field(default_factory=dict)
+    slashings_sum: Optional[Gwei] = None
+    # Sorted indices of the empty records of lists of records of the state, with the lists, by id of the list
+    empty_records: Dict[int, Tuple[MutableSequence[Any], MutableSequence[int]]] = field(default_factory=dict)
+    # Memoized data of the block being processed, if any
+    block: Optional[BlockContext] = None
+
+    def __copy__(self) -> None:
+        return None
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> None:
+        return None
+
+
+def get_processing_context(state: BeaconState) -> Optional[ProcessingContext]:
+    return getattr(state, 'processing_context', None)
+
+
+def set_processing_context(state: BeaconState, context: Optional[ProcessingContext]) -> None:
+    # Not an SSZ field of the state, hence set around the checks of Container.__setattr__
+    previous = get_processing_context(state)
+    if previous is not None:
+        release_processing_context(previous)
+    object.__setattr__(state, 'processing_context', context)
+
+
+def release_processing_context(context: ProcessingContext) -> None:
+    """
+    Detach ``context`` from the lists of the state it indexes.
+    """
+    for records, _ in context.empty_records.values():
+        setattr(records, 'processing_context', None)
+    context.empty_records.clear()
+
+
+def reset_processing_context(state: BeaconState) -> None:
+    """
+    Drop the indexes of the active context of ``state``, if any, after modifying the state outside of the spec.
+    """
+    if get_processing_context(state) is not None:
+        set_processing_context(state, ProcessingContext())
+
+
+def with_processing_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Run ``fn(state, ...)`` within a processing context of ``state``, unless one is active already.
+    """
+    def entry(state: BeaconState, *args: Any, **kw: Any) -> Any:
+        if get_processing_context(state) is not None:
+            return fn(state, *args, **kw)
+        set_processing_context(state, ProcessingContext())
+        try:
+            return fn(state, *args, **kw)
+        finally:
+            set_processing_context(state, None)
+    return entry
+
+
+def get_exit_queue_churn(state: BeaconState, context: ProcessingContext) -> Dict[Epoch, int]:
+    if context.exit_queue_churn is None:
+        context.exit_queue_churn = {}
+        for v in state.validators:
+            if v.exit_epoch != FAR_FUTURE_EPOCH:
+                context.exit_queue_churn[v.exit_epoch] = context.exit_queue_churn.get(v.exit_epoch, 0) + 1
+                context.latest_exit_epoch = max(context.latest_exit_epoch, v.exit_epoch)
+    return context.exit_queue_churn
+
+
+_get_validator_churn_limit = get_validator_churn_limit
+
+
+def get_validator_churn_limit(state: BeaconState) -> uint64:  # type: ignore
+    context = get_processing_context(state)
+    if context is None:
+        return _get_validator_churn_limit(state)
+    # Exits and activations are queued after the current epoch, the churn limit is fixed per epoch
+    epoch = get_current_epoch(state)
+    if epoch not in context.churn_limits:
+        context.churn_limits[epoch] = _get_validator_churn_limit(state)
+    return context.churn_limits[epoch]
+
+
+_initiate_validator_exit = initiate_validator_exit
+
+
+def initiate_validator_exit(state: BeaconState, index: ValidatorIndex) -> None:  # type: ignore
+    context = get_processing_context(state)
+    if context is None:
+        _initiate_validator_exit(state, index)
+        return
+
+    # Return if validator already initiated exit
+    validator = state.validators[index]
+    if validator.exit_epoch != FAR_FUTURE_EPOCH:
+        return
+
+    # Compute exit queue epoch
+    exit_queue_churn = get_exit_queue_churn(state, context)
+    exit_queue_epoch = max(context.latest_exit_epoch, compute_activation_exit_epoch(get_current_epoch(state)))
+    if exit_queue_churn.get(exit_queue_epoch, 0) >= get_validator_churn_limit(state):
+        exit_queue_epoch += Epoch(1)
+
+    # Set validator exit epoch and withdrawable epoch
+    validator.exit_epoch = exit_queue_epoch
+    validator.withdrawable_epoch = Epoch(validator.exit_epoch + MIN_VALIDATOR_WITHDRAWABILITY_DELAY)
+    exit_queue_churn[exit_queue_epoch] = exit_queue_churn.get(exit_queue_epoch, 0) + 1
+    context.latest_exit_epoch = max(context.latest_exit_epoch, exit_queue_epoch)
+
+
+_process_registry_updates = process_registry_updates
+
+
+def process_registry_updates(state: BeaconState) -> None:  # type: ignore
+    context = get_processing_context(state)
+    assert context is not None
+    # Validators dequeued prior to finalized epoch never re-enter the queue, as finality only advances
+    activation_exit_epoch = compute_activation_exit_epoch(state.finalized_checkpoint.epoch)
+    # The queue is built within the pass over the registry, when the context has none yet
+    activation_queue = context.activation_queue
+    new_queue: MutableSequence[Tuple[Epoch, ValidatorIndex]] = []
+    # Process activation eligibility and ejections
+    for index, validator in enumerate(state.validators):
+        if (
+            validator.activation_eligibility_epoch == FAR_FUTURE_EPOCH
+            and validator.effective_balance == MAX_EFFECTIVE_BALANCE
+        ):
+            validator.activation_eligibility_epoch = get_current_epoch(state)
+            if activation_queue is not None:
+                insort(activation_queue, (validator.activation_eligibility_epoch, ValidatorIndex(index)))
+
+        if is_active_validator(validator, get_current_epoch(state)) and validator.effective_balance <= EJECTION_BALANCE:
+            initiate_validator_exit(state, ValidatorIndex(index))
+
+        if (
+            activation_queue is None
+            and validator.activation_eligibility_epoch != FAR_FUTURE_EPOCH
+            and validator.activation_epoch >= activation_exit_epoch
+        ):
+            new_queue.append((validator.activation_eligibility_epoch, ValidatorIndex(index)))
+
+    if activation_queue is None:
+        activation_queue = context.activation_queue = sorted(new_queue)
+    # Validators dequeued for activation prior to finalized epoch leave the queue
+    activation_queue[:] = [
+        (eligibility_epoch, index) for eligibility_epoch, index in activation_queue
+        if state.validators[index].activation_epoch >= activation_exit_epoch
+    ]
+    # Dequeued validators for activation up to churn limit (without resetting activation epoch)
+    for _, index in activation_queue[:get_validator_churn_limit(state)]:
+        validator = state.validators[index]
+        if validator.activation_epoch == FAR_FUTURE_EPOCH:
+            validator.activation_epoch = compute_activation_exit_epoch(get_current_epoch(state))
+
+
+def get_slashed_validators(state: BeaconState, context: ProcessingContext) -> Dict[Epoch, Set[ValidatorIndex]]:
+    if context.slashed_validators is None:
+        context.slashed_validators = {}
+        for index, validator in enumerate(state.validators):
+            if validator.slashed:
+                update_slashed_validators(state, context, ValidatorIndex(index))
+    return context.slashed_validators
+
+
+def update_slashed_validators(state: BeaconState, context: ProcessingContext, index: ValidatorIndex) -> None:
+    """
+    Move the validator with index ``index`` to its current withdrawable epoch in the slashed-validator index.
+    """
+    if context.slashed_validators is None:
+        return
+    if index in context.slashed_withdrawable_epochs:
+        context.slashed_validators[context.slashed_withdrawable_epochs.pop(index)].discard(index)
+    validator = state.validators[index]
+    if validator.slashed:
+        context.slashed_validators.setdefault(validator.withdrawable_epoch, set()).add(index)
+        context.slashed_withdrawable_epochs[index] = validator.withdrawable_epoch
+
+
+def get_slashings_sum(state: BeaconState, context: ProcessingContext) -> Gwei:
+    if context.slashings_sum is None:
+        context.slashings_sum = Gwei(sum(state.slashings))
+    return context.slashings_sum
+
+
+_slash_validator = slash_validator
+
+
+def slash_validator(state: BeaconState,  # type: ignore
+                    slashed_index: ValidatorIndex,
+                    whistleblower_index: ValidatorIndex=None) -> None:
+    _slash_validator(state, slashed_index, whistleblower_index)
+    context = get_processing_context(state)
+    if context is None:
+        return
+    update_slashed_validators(state, context, slashed_index)
+    if context.slashings_sum is not None:
+        context.slashings_sum = Gwei(context.slashings_sum + state.validators[slashed_index].effective_balance)
+
+
+_process_slashings = process_slashings
+
+
+def process_slashings(state: BeaconState) -> None:  # type: ignore
+    context = get_processing_context(state)
+    assert context is not None
+    epoch = get_current_epoch(state)
+    slashed_indices = get_slashed_validators(state, context).get(Epoch(epoch + EPOCHS_PER_SLASHINGS_VECTOR // 2))
+    if not slashed_indices:
+        return
+    total_balance = get_total_active_balance(state)
+    slashings_sum = get_slashings_sum(state, context)
+    for index in sorted(slashed_indices):
+        validator = state.validators[index]
+        increment = EFFECTIVE_BALANCE_INCREMENT  # Factored out from penalty numerator to avoid uint64 overflow
+        penalty_numerator = validator.effective_balance // increment * min(slashings_sum * 3, total_balance)
+        penalty = penalty_numerator // total_balance * increment
+        decrease_balance(state, index, penalty)
+
+
+_process_final_updates = process_final_updates
+
+
+def process_final_updates(state: BeaconState) -> None:  # type: ignore
+    context = get_processing_context(state)
+    if context is not None and context.slashings_sum is not None:
+        next_epoch = Epoch(get_current_epoch(state) + 1)
+        context.slashings_sum = Gwei(context.slashings_sum - state.slashings[next_epoch % EPOCHS_PER_SLASHINGS_VECTOR])
+    _process_final_updates(state)
+
+
+def get_block_context(state: BeaconState) -> Optional[BlockContext]:
+    context = get_processing_context(state)
+    return None if context is None else context.block
+
+
+_process_block = process_block
+
+
+def process_block(state: BeaconState, block: BeaconBlock) -> None:  # type: ignore
+    context = get_processing_context(state)
+    assert context is not None
+    context.block = BlockContext()
+    try:
+        _process_block(state, block)
+    finally:
+        context.block = None
+
+
+_get_committee_count_at_slot = get_committee_count_at_slot
+
+
+def get_committee_count_at_slot(state: BeaconState, slot: Slot) -> uint64:  # type: ignore
+    block_context = get_block_context(state)
+    if block_context is None:
+        return _get_committee_count_at_slot(state, slot)
+    if slot not in block_context.committee_counts:
+        block_context.committee_counts[slot] = _get_committee_count_at_slot(state, slot)
+    return block_context.committee_counts[slot]
+
+
+_get_beacon_committee = get_beacon_committee
+
+
+def get_beacon_committee(state: BeaconState,  # type: ignore
+                         slot: Slot,
+                         index: CommitteeIndex) -> Sequence[ValidatorIndex]:
+    block_context = get_block_context(state)
+    if block_context is None:
+        return _get_beacon_committee(state, slot, index)
+    if (slot, index) not in block_context.committees:
+        block_context.committees[(slot, index)] = _get_beacon_committee(state, slot, index)
+    return block_context.committees[(slot, index)]
+
+
+_get_beacon_proposer_index = get_beacon_proposer_index
+
+
+def get_beacon_proposer_index(state: BeaconState) -> ValidatorIndex:  # type: ignore
+    block_context = get_block_context(state)
+    if block_context is None:
+        return _get_beacon_proposer_index(state)
+    # The slot does not change while processing a block
+    if block_context.proposer_index is None:
+        block_context.proposer_index = _get_beacon_proposer_index(state)
+    return block_context.proposer_index
+
+
+_get_domain = get_domain
+
+
+def get_domain(state: BeaconState, domain_type: DomainType, message_epoch: Epoch=None) -> Domain:  # type: ignore
+    block_context = get_block_context(state)
+    if block_context is None:
+        return _get_domain(state, domain_type, message_epoch)
+    epoch = get_current_epoch(state) if message_epoch is None else message_epoch
+    if (domain_type, epoch) not in block_context.domains:
+        block_context.domains[(domain_type, epoch)] = _get_domain(state, domain_type, epoch)
+    return block_context.domains[(domain_type, epoch)]
+
+
+def get_attestation_data_root(state: BeaconState, data: AttestationData) -> Hash:
+    block_context = get_block_context(state)
+    if block_context is None:
+        return hash_tree_root(data)
+    key = data.serialize()
+    if key not in block_context.attestation_data_roots:
+        block_context.attestation_data_roots[key] = hash_tree_root(data)
+    return block_context.attestation_data_roots[key]
+
+
+_is_valid_indexed_attestation = is_valid_indexed_attestation
+
+
+def is_valid_indexed_attestation(state: BeaconState,  # type: ignore
+                                 indexed_attestation: IndexedAttestation) -> bool:
+    indices = indexed_attestation.attesting_indices
+
+    # Verify max number of indices
+    if not len(indices) <= MAX_VALIDATORS_PER_COMMITTEE:
+        return False
+    # Verify indices are sorted
+    if not indices == sorted(indices):
+        return False
+    # Verify aggregate signature
+    if not bls_verify(
+        pubkey=bls_aggregate_pubkeys([state.validators[i].pubkey for i in indices]),
+        message_hash=get_attestation_data_root(state, indexed_attestation.data),
+        signature=indexed_attestation.signature,
+        domain=get_domain(state, DOMAIN_BEACON_ATTESTER, indexed_attestation.data.target.epoch),
+    ):
+        return False
+    return True
+
+
+# Monkey patch get_ancestor with a binary lifting table of the ancestors of the blocks of the store
+class AncestorIndex(object):
+    """
+    Ancestors of blocks at power-of-two distances: ``jumps[root][k]`` is the ancestor ``2**k`` blocks above ``root``.
+    Only ancestors in the store are indexed. The ancestors of a root never change, as the root commits to them.
+    """
+
+    def __init__(self) -> None:
+        self.jumps: Dict[Hash, MutableSequence[Hash]] = {}
+
+    def add(self, store: Store, root: Hash) -> None:
+        """
+        Index ``root``, after its ancestors that are not indexed yet.
+        """
+        added = []
+        while root not in self.jumps and root in store.blocks:
+            added.append(root)
+            root = store.blocks[root].parent_root
+        for root in reversed(added):
+            parent_root = store.blocks[root].parent_root
+            jumps = [parent_root] if parent_root in self.jumps else []
+            while len(jumps) > 0 and len(self.jumps[jumps[-1]]) >= len(jumps):
+                jumps.append(self.jumps[jumps[-1]][len(jumps) - 1])
+            self.jumps[root] = jumps
+
+    def remove(self, roots: Set[Hash]) -> None:
+        """
+        Remove ``roots``, and the jumps to them. Blocks above a removed ancestor are removed too.
+        """
+        for root in roots:
+            self.jumps.pop(root, None)
+        for jumps in self.jumps.values():
+            for k, ancestor in enumerate(jumps):
+                if ancestor in roots:
+                    del jumps[k:]
+                    break
+
+
+def get_ancestor_index(store: Store) -> AncestorIndex:
+    """
+    Return the ancestor index of ``store``, an attribute of the store.
+    """
+    ancestor_index = getattr(store, 'ancestor_index', None)
+    if ancestor_index is None:
+        ancestor_index = AncestorIndex()
+        setattr(store, 'ancestor_index', ancestor_index)
+    return ancestor_index
+
+
+_get_ancestor = get_ancestor
+
+
+def get_ancestor(store: Store, root: Hash, slot: Slot) -> Hash:  # type: ignore
+    ancestor_index = get_ancestor_index(store)
+    ancestor_index.add(store, root)
+    # Jump to the oldest ancestor not before the slot, by decreasing powers of two
+    for k in reversed(range(len(ancestor_index.jumps[root]))):
+        jumps = ancestor_index.jumps[root]
+        if k < len(jumps) and store.blocks[jumps[k]].slot >= slot:
+            root = jumps[k]
+    block = store.blocks[root]
+    if block.slot > slot:
+        # The parent is not in the store: like the spec, look it up
+        return _get_ancestor(store, block.parent_root, slot)
+    elif block.slot == slot:
+        return root
+    else:
+        return Bytes32()
+
+
+# Monkey patch the fork choice to validate attestations against checkpoint contexts, instead of checkpoint states
+@dataclass
+class CheckpointContext(object):
+    """
+    The parts of the state of a checkpoint that attestations to it are validated against:
+     the shuffling of its epoch, and the effective balances and pubkeys of the validators.
+    """
+    epoch: Epoch
+    active_indices: Sequence[ValidatorIndex]
+    seed: Hash
+    committees_per_slot: uint64
+    effective_balances: Sequence[Gwei]
+    pubkeys: Sequence[BLSPubkey]
+    domain: Domain
+
+
+def get_checkpoint_contexts(store: Store) -> Dict[Checkpoint, CheckpointContext]:
+    """
+    Return the checkpoint contexts of ``store``, an attribute of the store.
+    """
+    contexts = getattr(store, 'checkpoint_contexts', None)
+    if contexts is None:
+        contexts = {}
+        setattr(store, 'checkpoint_contexts', contexts)
+    return contexts
+
+
+def get_checkpoint_context(store: Store, checkpoint: Checkpoint) -> CheckpointContext:
+    """
+    Return the context of ``checkpoint``, from its state in the store if any. Otherwise from the state of its block,
+     through a copy advanced to the start of the epoch only when the block is before it. The copy is not kept.
+    """
+    contexts = get_checkpoint_contexts(store)
+    if checkpoint not in contexts:
+        if checkpoint in store.checkpoint_states:
+            state = store.checkpoint_states[checkpoint]
+        else:
+            state = store.block_states[checkpoint.root]
+            if state.slot != compute_start_slot_at_epoch(checkpoint.epoch):
+                state = state.copy()
+                process_slots(state, compute_start_slot_at_epoch(checkpoint.epoch))
+        epoch = get_current_epoch(state)
+        contexts[checkpoint] = CheckpointContext(
+            epoch=epoch,
+            active_indices=get_active_validator_indices(state, epoch),
+            seed=get_seed(state, epoch, DOMAIN_BEACON_ATTESTER),
+            committees_per_slot=get_committee_count_at_slot(state, compute_start_slot_at_epoch(epoch)),
+            effective_balances=[validator.effective_balance for validator in state.validators],
+            pubkeys=[validator.pubkey for validator in state.validators],
+            domain=get_domain(state, DOMAIN_BEACON_ATTESTER, epoch),
+        )
+    return contexts[checkpoint]
+
+
+def get_context_indexed_attestation(context: CheckpointContext, attestation: Attestation) -> IndexedAttestation:
+    """
+    Return the indexed attestation corresponding to ``attestation``, of the epoch of ``context``.
+    """
+    data = attestation.data
+    assert compute_epoch_at_slot(data.slot) == context.epoch
+    committee = compute_committee(
+        indices=context.active_indices,
+        seed=context.seed,
+        index=(data.slot % SLOTS_PER_EPOCH) * context.committees_per_slot + data.index,
+        count=context.committees_per_slot * SLOTS_PER_EPOCH,
+    )
+    attesting_indices = set(index for i, index in enumerate(committee) if attestation.aggregation_bits[i])
+    return IndexedAttestation(
+        attesting_indices=sorted(attesting_indices),
+        data=data,
+        signature=attestation.signature,
+    )
+
+
+def is_valid_context_indexed_attestation(context: CheckpointContext,
+                                         indexed_attestation: IndexedAttestation) -> bool:
+    """
+    Check if ``indexed_attestation``, of the epoch of ``context``, has valid indices and signature.
+    """
+    indices = indexed_attestation.attesting_indices
+    if not (len(indices) <= MAX_VALIDATORS_PER_COMMITTEE and indices == sorted(indices)):
+        return False
+    return bls_verify(
+        pubkey=bls_aggregate_pubkeys([context.pubkeys[i] for i in indices]),
+        message_hash=hash_tree_root(indexed_attestation.data),
+        signature=indexed_attestation.signature,
+        domain=context.domain,
+    )
+
+
+def get_store_attesting_indices(store: Store, attestation: Attestation) -> Sequence[ValidatorIndex]:
+    """
+    Return the attesting indices of ``attestation``, which ``on_attestation`` accepted.
+    """
+    target = attestation.data.target
+    if compute_epoch_at_slot(attestation.data.slot) != target.epoch:
+        return get_indexed_attestation(store.checkpoint_states[target], attestation).attesting_indices
+    return get_context_indexed_attestation(get_checkpoint_context(store, target), attestation).attesting_indices
+
+
+_get_latest_attesting_balance = get_latest_attesting_balance
+
+
+def get_latest_attesting_balance(store: Store, root: Hash) -> Gwei:  # type: ignore
+    context = get_checkpoint_context(store, store.justified_checkpoint)
+    return Gwei(sum(
+        context.effective_balances[i] for i in context.active_indices
+        if (i in store.latest_messages
+            and get_ancestor(store, store.latest_messages[i].root, store.blocks[root].slot) == root)
+    ))
+
+
+_on_attestation = on_attestation
+
+
+def on_attestation(store: Store, attestation: Attestation) -> None:  # type: ignore
+    target = attestation.data.target
+    # Attestations from outside of the epoch of their target are validated against the full checkpoint state
+    if compute_epoch_at_slot(attestation.data.slot) != target.epoch:
+        _on_attestation(store, attestation)
+        return
+
+    # Attestations must be from the current or previous epoch
+    current_epoch = compute_epoch_at_slot(get_current_slot(store))
+    # Use GENESIS_EPOCH for previous when genesis to avoid underflow
+    previous_epoch = current_epoch - 1 if current_epoch > GENESIS_EPOCH else GENESIS_EPOCH
+    assert target.epoch in [current_epoch, previous_epoch]
+    # Cannot calculate the current shuffling if have not seen the target
+    assert target.root in store.blocks
+
+    # Attestations cannot be from future epochs. If they are, delay consideration until the epoch arrives
+    base_state = store.block_states[target.root]
+    assert store.time >= base_state.genesis_time + compute_start_slot_at_epoch(target.epoch) * SECONDS_PER_SLOT
+    context = get_checkpoint_context(store, target)
+
+    # Attestations can only affect the fork choice of subsequent slots.
+    # Delay consideration in the fork choice until their slot is in the past.
+    assert store.time >= (attestation.data.slot + 1) * SECONDS_PER_SLOT
+
+    indexed_attestation = get_context_indexed_attestation(context, attestation)
+    assert is_valid_context_indexed_attestation(context, indexed_attestation)
+
+    # Update latest messages
+    for i in indexed_attestation.attesting_indices:
+        if i not in store.latest_messages or target.epoch > store.latest_messages[i].epoch:
+            store.latest_messages[i] = LatestMessage(epoch=target.epoch, root=attestation.data.beacon_block_root)
+
+
+# Pruning of the store on finalization
+@dataclass
+class PruneReport(object):
+    blocks: int = 0
+    block_states: int = 0
+    checkpoint_states: int = 0
+    checkpoint_contexts: int = 0
+    latest_messages: int = 0
+
+
+# Whether on_block prunes the store when the finalized checkpoint advances
+prune_on_finalization = False
+
+
+def prune_store(store: Store) -> PruneReport:
+    """
+    Remove the blocks that are not descendants of the finalized block, their states,
+     and the checkpoint states and contexts before the finalized epoch, except those of the checkpoints of the store.
+    Conflicting justified checkpoints are not expected, but their blocks after the finalized slot are kept.
+    The latest messages for removed blocks are moved to the finalized block, for which they have the same weight:
+     none for the children of the justified block, which are not descendants of removed blocks.
+    """
+    finalized_root = store.finalized_checkpoint.root
+    finalized_slot = store.blocks[finalized_root].slot
+    # The chains of the justified checkpoints after the finalized slot are kept, even if they conflict with it
+    justified_roots = (store.justified_checkpoint.root, store.best_justified_checkpoint.root)
+    removed = set(
+        root for root, block in store.blocks.items()
+        if get_ancestor(store, root, finalized_slot) != finalized_root and (
+            block.slot <= finalized_slot
+            or all(get_ancestor(store, justified_root, block.slot) != root for justified_root in justified_roots)
+        )
+    )
+    report = PruneReport()
+    for root in removed:
+        del store.blocks[root]
+        if root in store.block_states:
+            del store.block_states[root]
+            report.block_states += 1
+    report.blocks = len(removed)
+    get_ancestor_index(store).remove(removed)
+
+    kept_checkpoints = (store.justified_checkpoint, store.best_justified_checkpoint, store.finalized_checkpoint)
+    checkpoint_contexts = get_checkpoint_contexts(store)
+    for checkpoint in list(store.checkpoint_states.keys()) + list(checkpoint_contexts.keys()):
+        if checkpoint in kept_checkpoints:
+            continue
+        if checkpoint.root in removed or checkpoint.epoch < store.finalized_checkpoint.epoch:
+            if checkpoint in store.checkpoint_states:
+                del store.checkpoint_states[checkpoint]
+                report.checkpoint_states += 1
+            if checkpoint in checkpoint_contexts:
+                del checkpoint_contexts[checkpoint]
+                report.checkpoint_contexts += 1
+
+    for index, message in store.latest_messages.items():
+        if message.root in removed:
+            store.latest_messages[index] = LatestMessage(epoch=message.epoch, root=finalized_root)
+            report.latest_messages += 1
+    return report
+
+
+_on_block = on_block
+
+
+def on_block(store: Store, block: BeaconBlock) -> None:  # type: ignore
+    finalized_epoch = store.finalized_checkpoint.epoch
+    _on_block(store, block)
+    if prune_on_finalization and store.finalized_checkpoint.epoch > finalized_epoch:
+        # The report of the last pruning is an attribute of the store
+        setattr(store, 'prune_report', prune_store(store))
+
+
+def get_attestations_batch(store: Store, attestations: Sequence[Attestation]) -> Optional[Sequence[IndexedAttestation]]:
+    """
+    Return the indexed attestations of ``attestations``, or ``None`` if ``on_attestation`` rejects one of them,
+    or one of them is from outside of the epoch of its target.
+    """
+    current_epoch = compute_epoch_at_slot(get_current_slot(store))
+    previous_epoch = current_epoch - 1 if current_epoch > GENESIS_EPOCH else GENESIS_EPOCH
+    indexed_attestations = []
+    for attestation in attestations:
+        target = attestation.data.target
+        if target.epoch not in [current_epoch, previous_epoch] or target.root not in store.blocks:
+            return None
+        if compute_epoch_at_slot(attestation.data.slot) != target.epoch:
+            return None
+        target_slot = compute_start_slot_at_epoch(target.epoch)
+        if store.time < store.block_states[target.root].genesis_time + target_slot * SECONDS_PER_SLOT:
+            return None
+        # The context of each target is computed once
+        context = get_checkpoint_context(store, target)
+        if store.time < (attestation.data.slot + 1) * SECONDS_PER_SLOT:
+            return None
+        try:
+            indexed_attestation = get_context_indexed_attestation(context, attestation)
+        except IndexError:
+            return None
+        indices = indexed_attestation.attesting_indices
+        if not (len(indices) <= MAX_VALIDATORS_PER_COMMITTEE and indices == sorted(indices)):
+            return None
+        indexed_attestations.append(indexed_attestation)
+
+    # Verify the signatures of the attestations in a batch per target
+    batches: Dict[Checkpoint, MutableSequence[IndexedAttestation]] = {}
+    for indexed_attestation in indexed_attestations:
+        batches.setdefault(indexed_attestation.data.target, []).append(indexed_attestation)
+    for target, batch in batches.items():
+        context = get_checkpoint_context(store, target)
+        if not bls_verify_batch(
+            pubkeys=[bls_aggregate_pubkeys([context.pubkeys[i] for i in a.attesting_indices]) for a in batch],
+            message_hashes=[hash_tree_root(a.data) for a in batch],
+            signatures=[a.signature for a in batch],
+            domain=context.domain,
+        ):
+            return None
+    return indexed_attestations
+
+
+def on_attestations(store: Store, attestations: Sequence[Attestation]) -> None:
+    """
+    Run ``on_attestation`` on each of ``attestations``, in order, with the signatures verified in a batch per target.
+    If one of the attestations is invalid, they are run through ``on_attestation`` one by one,
+    up to the first invalid attestation, which raises.
+    """
+    indexed_attestations = get_attestations_batch(store, attestations)
+    if indexed_attestations is None:
+        for attestation in attestations:
+            on_attestation(store, attestation)
+        return
+
+    # Update latest messages
+    latest_messages: Dict[ValidatorIndex, LatestMessage] = {}
+    for indexed_attestation in indexed_attestations:
+        target = indexed_attestation.data.target
+        for i in indexed_attestation.attesting_indices:
+            message = latest_messages.get(i, store.latest_messages.get(i))
+            if message is None or target.epoch > message.epoch:
+                latest_messages[i] = LatestMessage(epoch=target.epoch, root=indexed_attestation.data.beacon_block_root)
+    store.latest_messages.update(latest_messages)
+
+
+state_transition = with_processing_context(state_transition)
+process_slots = with_processing_context(process_slots)
+process_epoch = with_processing_context(process_epoch)
+process_block = with_processing_context(process_block)
+process_registry_updates = with_processing_context(process_registry_updates)
+process_slashings = with_processing_context(process_slashings)
+
+
 # Access to overwrite spec constants based on configuration
 def apply_constants_preset(preset: Dict[str, Any]) -> None:
     global_vars = globals()
@@ -124,6 +1130,291 @@ def apply_constants_preset(preset: Dict[str, Any]) -> None:
     init_SSZ_types()
 '''
 
+PHASE1_SUNDRY_FUNCTIONS = '''
+
+# Monkey patch replace_empty_or_append with an index of the empty challenge records, while processing a state
+def get_empty_record_indices(context: ProcessingContext, records: MutableSequence[Any]) -> MutableSequence[int]:
+    """
+    Return the sorted indices of the empty elements of ``records``, a list of records of the state of ``context``.
+    """
+    key = id(records)
+    if key not in context.empty_records:
+        # The list is kept with its index, so that its id is not reused while the context lives
+        context.empty_records[key] = (records, [i for i, record in enumerate(records) if is_zero(record)])
+        # The list refers to the context until it is released, copies of the list do not
+        setattr(records, 'processing_context', context)
+    return context.empty_records[key][1]
+
+
+def drop_empty_record_indices(state: BeaconState) -> None:
+    """
+    Drop the indexes of the empty challenge records of ``state``, after records are cleared.
+    """
+    context = get_processing_context(state)
+    if context is not None:
+        for records in (state.custody_chunk_challenge_records, state.custody_bit_challenge_records):
+            context.empty_records.pop(id(records), None)
+
+
+_replace_empty_or_append = replace_empty_or_append
+
+
+def replace_empty_or_append(list: MutableSequence[Any], new_element: Any) -> int:  # type: ignore
+    context = getattr(list, 'processing_context', None)
+    if context is None or id(list) not in context.empty_records:
+        return _replace_empty_or_append(list, new_element)
+    empty_indices = context.empty_records[id(list)][1]
+    if len(empty_indices) > 0:
+        index = empty_indices.pop(0)
+        list[index] = new_element
+    else:
+        index = len(list)
+        list.append(new_element)
+    if is_zero(new_element):
+        insort(empty_indices, index)
+    return index
+
+
+# Monkey patch custody functions that postpone or restore withdrawability, to keep the slashed-validator index current
+_process_chunk_challenge = process_chunk_challenge
+
+
+def process_chunk_challenge(state: BeaconState, challenge: CustodyChunkChallenge) -> None:  # type: ignore
+    context = get_processing_context(state)
+    if context is not None:
+        get_empty_record_indices(context, state.custody_chunk_challenge_records)
+    _process_chunk_challenge(state, challenge)
+    if context is not None:
+        update_slashed_validators(state, context, challenge.responder_index)
+
+
+_process_bit_challenge = process_bit_challenge
+
+
+def process_bit_challenge(state: BeaconState, challenge: CustodyBitChallenge) -> None:  # type: ignore
+    context = get_processing_context(state)
+    if context is not None:
+        get_empty_record_indices(context, state.custody_bit_challenge_records)
+    _process_bit_challenge(state, challenge)
+    if context is not None:
+        update_slashed_validators(state, context, challenge.responder_index)
+
+
+_process_chunk_challenge_response = process_chunk_challenge_response
+
+
+def process_chunk_challenge_response(state: BeaconState,  # type: ignore
+                                     response: CustodyResponse,
+                                     challenge: CustodyChunkChallengeRecord) -> None:
+    try:
+        _process_chunk_challenge_response(state, response, challenge)
+    finally:
+        drop_empty_record_indices(state)
+
+
+_process_bit_challenge_response = process_bit_challenge_response
+
+
+def process_bit_challenge_response(state: BeaconState,  # type: ignore
+                                   response: CustodyResponse,
+                                   challenge: CustodyBitChallengeRecord) -> None:
+    try:
+        _process_bit_challenge_response(state, response, challenge)
+    finally:
+        drop_empty_record_indices(state)
+
+
+_process_challenge_deadlines = process_challenge_deadlines
+
+
+def process_challenge_deadlines(state: BeaconState) -> None:  # type: ignore
+    try:
+        _process_challenge_deadlines(state)
+    finally:
+        drop_empty_record_indices(state)
+
+
+_after_process_final_updates = after_process_final_updates
+
+
+def after_process_final_updates(state: BeaconState) -> None:  # type: ignore
+    _after_process_final_updates(state)
+    context = get_processing_context(state)
+    if context is not None and context.slashed_validators is not None:
+        # Only validators with a postponed withdrawable epoch are updated
+        for index in list(context.slashed_validators.get(FAR_FUTURE_EPOCH, set())):
+            update_slashed_validators(state, context, index)
+
+
+# Monkey patch period committees with a cache per shard and period epoch, while processing shard blocks
+_get_period_committee = get_period_committee
+
+
+@dataclass
+class PeriodCommittee(object):
+    committee: Sequence[ValidatorIndex]
+    # Position in the committee of each member
+    positions: Dict[ValidatorIndex, int]
+
+
+period_committee_caches: Dict[int, Dict[Tuple[Shard, Epoch], PeriodCommittee]] = {}
+
+
+def with_period_committee_cache(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Run ``fn(beacon_state, ...)`` with the period committees of ``beacon_state`` memoized, unless they are already.
+    The beacon state must not be modified meanwhile, as shard processing does not.
+    """
+    def entry(beacon_state: BeaconState, *args: Any, **kw: Any) -> Any:
+        key = id(beacon_state)
+        if key in period_committee_caches:
+            return fn(beacon_state, *args, **kw)
+        period_committee_caches[key] = {}
+        try:
+            return fn(beacon_state, *args, **kw)
+        finally:
+            del period_committee_caches[key]
+    return entry
+
+
+def get_cached_period_committee(beacon_state: BeaconState, shard: Shard, epoch: Epoch) -> PeriodCommittee:
+    cache = period_committee_caches.get(id(beacon_state))
+    if cache is not None and (shard, epoch) in cache:
+        return cache[(shard, epoch)]
+    committee = _get_period_committee(beacon_state, shard, epoch)
+    positions: Dict[ValidatorIndex, int] = {}
+    for position, index in enumerate(committee):
+        positions.setdefault(index, position)
+    period_committee = PeriodCommittee(committee=committee, positions=positions)
+    if cache is not None:
+        cache[(shard, epoch)] = period_committee
+    return period_committee
+
+
+def get_period_committee(beacon_state: BeaconState,  # type: ignore
+                         shard: Shard,
+                         epoch: Epoch) -> Sequence[ValidatorIndex]:
+    if id(beacon_state) not in period_committee_caches:
+        return _get_period_committee(beacon_state, shard, epoch)
+    return get_cached_period_committee(beacon_state, shard, epoch).committee
+
+
+_process_delta = process_delta
+
+
+def process_delta(beacon_state: BeaconState,  # type: ignore
+                  shard_state: ShardState,
+                  index: ValidatorIndex,
+                  delta: Gwei,
+                  positive: bool=True) -> None:
+    epoch = compute_epoch_of_shard_slot(shard_state.slot)
+    older_committee = get_cached_period_committee(
+        beacon_state, shard_state.shard, compute_shard_period_start_epoch(epoch, 2))
+    newer_committee = get_cached_period_committee(
+        beacon_state, shard_state.shard, compute_shard_period_start_epoch(epoch, 1))
+    if index in older_committee.positions:
+        if positive:
+            shard_state.older_committee_positive_deltas[older_committee.positions[index]] += delta
+        else:
+            shard_state.older_committee_negative_deltas[older_committee.positions[index]] += delta
+    elif index in newer_committee.positions:
+        if positive:
+            shard_state.newer_committee_positive_deltas[newer_committee.positions[index]] += delta
+        else:
+            shard_state.newer_committee_negative_deltas[newer_committee.positions[index]] += delta
+
+
+shard_state_transition = with_period_committee_cache(shard_state_transition)
+process_shard_block = with_period_committee_cache(process_shard_block)
+
+
+# Monkey patch update_period_committee to shuffle the active validators once for all the shards
+_update_period_committee = update_period_committee
+
+
+def compute_shuffled_indices(indices: Sequence[ValidatorIndex], seed: Hash) -> Sequence[ValidatorIndex]:
+    """
+    Return ``[indices[compute_shuffled_index(i, len(indices), seed)] for i in range(len(indices))]``,
+     running each round of the shuffling over all the indices at once.
+    """
+    index_count = len(indices)
+    if index_count == 0:
+        return []
+    positions = list(range(index_count))
+    for current_round in range(SHUFFLE_ROUND_COUNT):
+        round_bytes = int_to_bytes(current_round, length=1)
+        pivot = bytes_to_int(hash(seed + round_bytes)[0:8]) % index_count
+        sources = b''.join(
+            hash(seed + round_bytes + int_to_bytes(i, length=4)) for i in range((index_count + 255) // 256)
+        )
+        for i, index in enumerate(positions):
+            flip = (pivot + index_count - index) % index_count
+            position = max(index, flip)
+            if (sources[position // 8] >> (position % 8)) % 2:
+                positions[i] = flip
+    return [indices[position] for position in positions]
+
+
+def get_period_committees(state: BeaconState, epoch: Epoch) -> Sequence[Sequence[ValidatorIndex]]:
+    """
+    Return the period committees of all the shards at ``epoch``, like ``get_period_committee`` does for each.
+    """
+    indices = get_active_validator_indices(state, epoch)
+    seed = get_seed(state, epoch, DOMAIN_SHARD_ATTESTER)
+    shuffled_indices = compute_shuffled_indices(indices, seed)
+    committees = []
+    for shard in range(SHARD_COUNT):
+        start = (len(indices) * shard) // SHARD_COUNT
+        end = (len(indices) * (shard + 1)) // SHARD_COUNT
+        committees.append(shuffled_indices[start:end][:MAX_PERIOD_COMMITTEE_SIZE])
+    return committees
+
+
+def committees_to_compact_committees(state: BeaconState,
+                                     committees: Sequence[Sequence[ValidatorIndex]]) -> Sequence[CompactCommittee]:
+    """
+    Return the ``CompactCommittee`` of each of ``committees``, packing their members in a single pass.
+    """
+    members = [index for committee in committees for index in committee]
+    validators = [state.validators[i] for i in members]
+    compact_validators = [
+        pack_compact_validator(i, v.slashed, v.effective_balance // EFFECTIVE_BALANCE_INCREMENT)
+        for i, v in zip(members, validators)
+    ]
+    compact_committees = []
+    start = 0
+    for committee in committees:
+        end = start + len(committee)
+        compact_committees.append(CompactCommittee(
+            pubkeys=[v.pubkey for v in validators[start:end]],
+            compact_validators=compact_validators[start:end],
+        ))
+        start = end
+    return compact_committees
+
+
+def update_period_committee(state: BeaconState) -> None:  # type: ignore
+    if (get_current_epoch(state) + 1) % EPOCHS_PER_SHARD_PERIOD != 0:
+        return
+
+    period = (get_current_epoch(state) + 1) // EPOCHS_PER_SHARD_PERIOD
+    committees = get_period_committees(state, Epoch(get_current_epoch(state) + 1))
+    state.period_committee_roots[period % PERIOD_COMMITTEE_ROOT_LENGTH] = hash_tree_root(
+        Vector[CompactCommittee, SHARD_COUNT](committees_to_compact_committees(state, committees)))
+'''
+
+
+INSTRUMENTATION_IMPORTS = '''from eth2spec.utils.profiling import Profile
+'''
+INSTRUMENTATION = '''
+
+# Count calls and accumulate wall time of the spec functions, and of the hash, BLS and SSZ primitives they call
+profile = Profile()
+profile.instrument(globals(), __name__)
+dump_profile = profile.dump
+reset_profile = profile.reset
+'''
+
 
 def remove_for_phase1(functions: Dict[str, str]):
     for key, value in functions.items():
@@ -150,9 +1441,12 @@ def objects_to_spec(functions: Dict[str, str],
                     ssz_objects: Dict[str, str],
                     inserts: Dict[str, str],
                     imports: Dict[str, str],
+                    sundry_functions: str=SUNDRY_FUNCTIONS,
+                    instrument: bool=False,
                     ) -> str:
     """
     Given all the objects that constitute a spec, combine them into a single pyfile.
+    If ``instrument`` is set, the spec functions are profiled, see ``eth2spec.utils.profiling``.
     """
     new_type_definitions = (
         '\n\n'.join(
@@ -181,15 +1475,17 @@ def objects_to_spec(functions: Dict[str, str],
         + '\n'.join(map(lambda x: '    global_vars[\'%s\'] = %s' % (x, x), ssz_objects.keys()))
     )
     spec = (
-        imports
+        (INSTRUMENTATION_IMPORTS if instrument else '')
+        + imports
         + '\n\n' + new_type_definitions
         + '\n' + SUNDRY_CONSTANTS_FUNCTIONS
         + '\n\n' + constants_spec
         + '\n\n\n' + ssz_objects_instantiation_spec
         + '\n\n' + functions_spec
-        + '\n' + SUNDRY_FUNCTIONS
+        + '\n' + sundry_functions
         + '\n\n' + ssz_objects_reinitialization_spec
         + '\n'
+        + (INSTRUMENTATION if instrument else '')
     )
     # Handle @inserts
     for key, value in inserts.items():
@@ -275,14 +1571,14 @@ def combine_spec_objects(spec0: SpecObject, spec1: SpecObject) -> SpecObject:
 
 
 def build_phase0_spec(phase0_sourcefile: str, fork_choice_sourcefile: str,
-                      v_guide_sourcefile: str, outfile: str=None) -> Optional[str]:
+                      v_guide_sourcefile: str, outfile: str=None, instrument: bool=False) -> Optional[str]:
     phase0_spec = get_spec(phase0_sourcefile)
     fork_choice_spec = get_spec(fork_choice_sourcefile)
     v_guide = get_spec(v_guide_sourcefile)
     spec_objects = phase0_spec
     for value in [fork_choice_spec, v_guide]:
         spec_objects = combine_spec_objects(spec_objects, value)
-    spec = objects_to_spec(*spec_objects, PHASE0_IMPORTS)
+    spec = objects_to_spec(*spec_objects, PHASE0_IMPORTS, instrument=instrument)
     if outfile is not None:
         with open(outfile, 'w') as out:
             out.write(spec)
@@ -295,7 +1591,8 @@ def build_phase1_spec(phase0_beacon_sourcefile: str,
                       phase1_custody_sourcefile: str,
                       phase1_shard_sourcefile: str,
                       phase1_beacon_misc_sourcefile: str,
-                      outfile: str=None) -> Optional[str]:
+                      outfile: str=None,
+                      instrument: bool=False) -> Optional[str]:
     all_sourcefiles = (
         phase0_beacon_sourcefile,
         phase0_fork_choice_sourcefile,
@@ -310,7 +1607,7 @@ def build_phase1_spec(phase0_beacon_sourcefile: str,
     spec_objects = all_spescs[0]
     for value in all_spescs[1:]:
         spec_objects = combine_spec_objects(spec_objects, value)
-    spec = objects_to_spec(*spec_objects, PHASE1_IMPORTS)
+    spec = objects_to_spec(*spec_objects, PHASE1_IMPORTS, SUNDRY_FUNCTIONS + PHASE1_SUNDRY_FUNCTIONS, instrument)
     if outfile is not None:
         with open(outfile, 'w') as out:
             out.write(spec)
@@ -334,20 +1631,24 @@ If building phase 1:
     5th argument is input /core/1_shard-data-chains.md
     6th argument is input /core/1_beacon-chain-misc.md
     7th argument is output spec.py
+
+With --instrument, the spec counts calls and wall time of its functions, and prints them with dump_profile().
 '''
     parser = ArgumentParser(description=description)
     parser.add_argument("-p", "--phase", dest="phase", type=int, default=0, help="Build for phase #")
+    parser.add_argument("-i", "--instrument", dest="instrument", action="store_true",
+                        help="Build a spec that profiles its functions")
     parser.add_argument(dest="files", help="Input and output files", nargs="+")
 
     args = parser.parse_args()
     if args.phase == 0:
         if len(args.files) == 4:
-            build_phase0_spec(*args.files)
+            build_phase0_spec(*args.files, instrument=args.instrument)
         else:
             print(" Phase 0 requires spec, forkchoice, and v-guide inputs as well as an output file.")
     elif args.phase == 1:
         if len(args.files) == 7:
-            build_phase1_spec(*args.files)
+            build_phase1_spec(*args.files, instrument=args.instrument)
         else:
             print(
                 " Phase 1 requires input files as well as an output file:\n"
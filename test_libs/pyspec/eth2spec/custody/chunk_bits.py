@@ -0,0 +1,176 @@
+"""
+Accelerated custody chunk bits, for the phase 1 custody game.
+
+Computes the same bits as ``legendre_bit`` and ``get_custody_chunk_bit`` of the spec, but:
+ - with a Jacobi symbol that strips the factors of 2 at once, or that of ``gmpy2`` when it is installed,
+ - decompressing the custody key once, instead of for every chunk,
+ - over the chunks of a stream of crosslink data, for all the crosslinks of a custody period in one call,
+    optionally with a pool of processes.
+
+Usage: ``install(spec)`` swaps ``legendre_bit`` and ``get_custody_chunk_bit`` of the given phase 1 spec module,
+ ``uninstall(spec)`` restores them.
+"""
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+ACCELERATED_FUNCTIONS = (
+    'legendre_bit',
+    'get_custody_chunk_bit',
+)
+
+# Number of chunks per task of the pool of processes
+CHUNKS_PER_TASK = 64
+
+# Original spec functions, per spec module, for uninstalling
+_installed: Dict[str, Dict[str, Any]] = {}
+
+
+def jacobi_python(a: int, n: int) -> int:
+    """
+    Return the Jacobi symbol ``(a / n)`` of the odd ``n``: -1, 0 or 1.
+    """
+    assert n > 0 and n % 2 == 1
+    a %= n
+    t = 1
+    while a != 0:
+        # Strip all the factors of 2 at once, (2 / n) is -1 for n = 3 or 5 mod 8
+        zeros = (a & -a).bit_length() - 1
+        a >>= zeros
+        if zeros % 2 == 1 and n % 8 in (3, 5):
+            t = -t
+        # Quadratic reciprocity
+        if a % 4 == 3 and n % 4 == 3:
+            t = -t
+        a, n = n % a, a
+    return t if n == 1 else 0
+
+
+jacobi = jacobi_python if gmpy2 is None else gmpy2.jacobi
+
+
+def legendre_bit(a: int, q: int) -> int:
+    """
+    Return the ``legendre_bit`` of the spec: 1 if ``a`` is a non-zero square modulo the odd ``q``, 0 otherwise.
+    """
+    if a % q == 0:
+        return 0
+    return int(jacobi(a, q) == 1)
+
+
+def get_key_coefficients(spec, key) -> Tuple[int, int]:
+    """
+    Return the coefficients of the x coordinate of the decompressed custody ``key``, used for all its chunks.
+    """
+    s = spec.bls_signature_to_G2(key)[0].coeffs
+    return int(s[0]), int(s[1])
+
+
+def compute_chunk_bit(coefficients: Tuple[int, int], chunk: bytes, subchunk_size: int, q: int) -> bool:
+    """
+    Return the ``get_custody_chunk_bit`` of ``chunk``, for a key with the given ``coefficients``.
+    """
+    chunk = bytes(chunk) + b'\x00' * (-len(chunk) % subchunk_size)
+    bits = 0
+    for i, start in enumerate(range(0, len(chunk), subchunk_size)):
+        subchunk = int.from_bytes(chunk[start:start + subchunk_size], 'little')
+        bits += legendre_bit((i + 1) * coefficients[i % 2] + subchunk, q)
+    return bits % 2 == 1
+
+
+def compute_chunk_bits_task(args) -> List[bool]:
+    coefficients, chunks, subchunk_size, q = args
+    return [compute_chunk_bit(coefficients, chunk, subchunk_size, q) for chunk in chunks]
+
+
+def iter_custody_chunks(data: Union[bytes, Iterable[bytes]], chunk_size: int) -> Iterator[bytes]:
+    """
+    Yield the chunks of ``data``, bytes or a stream of blocks of bytes of any sizes,
+     with the last chunk padded with zeros to ``chunk_size``, like the chunks of custody responses.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = [data]
+    buffer = bytearray()
+    for block in data:
+        buffer += block
+        if len(buffer) >= chunk_size:
+            end = len(buffer) - len(buffer) % chunk_size
+            for start in range(0, end, chunk_size):
+                yield bytes(buffer[start:start + chunk_size])
+            del buffer[:end]
+    if len(buffer) > 0:
+        yield bytes(buffer.ljust(chunk_size, b'\x00'))
+
+
+def iter_tasks(coefficients, chunks: Iterator[bytes], subchunk_size: int, q: int) -> Iterator[tuple]:
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) == CHUNKS_PER_TASK:
+            yield coefficients, batch, subchunk_size, q
+            batch = []
+    if len(batch) > 0:
+        yield coefficients, batch, subchunk_size, q
+
+
+def get_custody_period_chunk_bits(spec, key, crosslinks_data: Sequence[Union[bytes, Iterable[bytes]]],
+                                  processes=1) -> List[List[bool]]:
+    """
+    Return the chunk bits of the data of each crosslink of a custody period, for the custody ``key``:
+     ``[spec.get_custody_chunk_bit(key, chunk) for chunk in chunks]`` for the chunks of each crosslink data.
+    :param processes: Number of processes to compute the bits with, ``None`` for the number of CPUs.
+     1 to not fork.
+    """
+    coefficients = get_key_coefficients(spec, key)
+    pool = Pool(processes) if processes != 1 else None
+    try:
+        results = []
+        for data in crosslinks_data:
+            tasks = iter_tasks(coefficients, iter_custody_chunks(data, spec.BYTES_PER_CUSTODY_CHUNK),
+                               spec.BYTES_PER_CUSTODY_SUBCHUNK, spec.BLS12_381_Q)
+            bits = []
+            for task_bits in (map if pool is None else pool.imap)(compute_chunk_bits_task, tasks):
+                bits.extend(task_bits)
+            results.append(bits)
+    finally:
+        if pool is not None:
+            pool.close()
+    return results
+
+
+def get_custody_chunk_bits(spec, key, data: Union[bytes, Iterable[bytes]], processes=1) -> List[bool]:
+    """
+    Return the chunk bits of the crosslink ``data`` for the custody ``key``, see ``get_custody_period_chunk_bits``.
+    """
+    return get_custody_period_chunk_bits(spec, key, [data], processes)[0]
+
+
+def get_custody_chunk_bit(spec, key, chunk: bytes) -> bool:
+    return compute_chunk_bit(get_key_coefficients(spec, key), chunk, spec.BYTES_PER_CUSTODY_SUBCHUNK, spec.BLS12_381_Q)
+
+
+def install(spec):
+    """
+    Replace ``legendre_bit`` and ``get_custody_chunk_bit`` of ``spec`` with their accelerated equivalents.
+    """
+    if spec.__name__ in _installed:
+        return
+    _installed[spec.__name__] = {name: getattr(spec, name) for name in ACCELERATED_FUNCTIONS}
+    spec.legendre_bit = legendre_bit
+    spec.get_custody_chunk_bit = lambda key, chunk: get_custody_chunk_bit(spec, key, chunk)
+
+
+def uninstall(spec):
+    """
+    Restore the spec ``legendre_bit`` and ``get_custody_chunk_bit`` of ``spec``.
+    """
+    for name, fn in _installed.pop(spec.__name__, {}).items():
+        setattr(spec, name, fn)
+
+
+def is_installed(spec) -> bool:
+    return spec.__name__ in _installed
@@ -0,0 +1,207 @@
+"""
+Stress benchmark of the fork choice, on synthetic stores with forks and churning votes.
+
+Usage: ``python -m eth2spec.fork_choice.benchmark [--validators 1024] [--epochs 4] [--fan-out 3] [--depth 4]
+ [--attestations 8] [--engines spec cached proto_array] [--config minimal]``
+"""
+import os
+import time
+from argparse import ArgumentParser
+from random import Random
+
+from eth2spec.fork_choice import proto_array
+from eth2spec.genesis.benchmark import make_deposits
+from eth2spec.genesis.builder import build_genesis_state
+from eth2spec.phase0 import spec as spec_phase0
+from eth2spec.replay.replay import use_backend
+from eth2spec.utils import bls
+from eth2spec.utils.ssz.ssz_typing import Bitlist
+
+ENGINES = ('spec', 'cached', 'proto_array')
+OPERATIONS = ('on_block', 'on_attestation', 'get_head')
+
+DEFAULT_CONFIGS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'configs')
+
+
+def build_block(spec, state, slot, graffiti, attestations=()):
+    """
+    Return the root of an unsigned block at ``slot`` on top of ``state``, the block and its post-state.
+    """
+    state = state.copy()
+    spec.process_slots(state, slot)
+    block = spec.BeaconBlock(slot=slot, parent_root=spec.signing_root(state.latest_block_header))
+    block.body.eth1_data = state.eth1_data
+    block.body.graffiti = graffiti
+    block.body.attestations = list(attestations)
+    spec.process_block(state, block)
+    block.state_root = spec.hash_tree_root(state)
+    return spec.signing_root(block), block, state
+
+
+def build_attestation(spec, state, root, index, rng):
+    """
+    Return an attestation of a random half of committee ``index`` at the slot of ``state``, for block ``root``.
+    """
+    epoch = spec.compute_epoch_at_slot(state.slot)
+    if state.slot == spec.compute_start_slot_at_epoch(epoch):
+        target_root = root
+    else:
+        target_root = spec.get_block_root(state, epoch)
+    committee = spec.get_beacon_committee(state, state.slot, index)
+    return spec.Attestation(
+        aggregation_bits=Bitlist[spec.MAX_VALIDATORS_PER_COMMITTEE](*(rng.random() < 0.5 for _ in committee)),
+        data=spec.AttestationData(
+            slot=state.slot,
+            index=index,
+            beacon_block_root=root,
+            source=state.current_justified_checkpoint,
+            target=spec.Checkpoint(epoch=epoch, root=target_root),
+        ),
+    )
+
+
+def build_workload(spec, state, epochs, fan_out, depth, attestations_per_slot, seed=0):
+    """
+    Return the blocks and the attestations to add to a store, by slot, for ``epochs`` epochs after the genesis
+     ``state``: a list of ``(slot, blocks, attestations)``, with the attestations of the previous slot.
+    The canonical chain has a block every slot, with the attestations of the previous slot for its head.
+    Every ``depth`` slots, ``fan_out - 1`` forks branch off it, each growing a block per slot.
+    Every slot, ``attestations_per_slot`` attestations of random halves of committees vote for random tips.
+    """
+    rng = Random(seed)
+    head = (spec.signing_root(spec.BeaconBlock(state_root=spec.hash_tree_root(state))), state)
+    forks = []
+    attestations = []
+    workload = []
+    for slot in range(1, epochs * spec.SLOTS_PER_EPOCH + 1):
+        included = [a for a in attestations if a.data.beacon_block_root == head[0]][:spec.MAX_ATTESTATIONS]
+        if slot % depth == 0:
+            forks = [head] * (fan_out - 1)
+        root, block, head_state = build_block(spec, head[1], slot, b'\x00' * 32, included)
+        blocks = [block]
+        for i, (_, fork_state) in enumerate(forks):
+            graffiti = (slot * fan_out + i + 1).to_bytes(32, 'little')
+            fork_root, fork_block, fork_state = build_block(spec, fork_state, slot, graffiti)
+            forks[i] = (fork_root, fork_state)
+            blocks.append(fork_block)
+        head = (root, head_state)
+        workload.append((slot, blocks, attestations))
+
+        tips = [head] + forks
+        committee_count = spec.get_committee_count_at_slot(head_state, slot)
+        attestations = []
+        for i in range(attestations_per_slot):
+            tip_root, tip_state = rng.choice(tips)
+            attestations.append(build_attestation(spec, tip_state, tip_root, i % committee_count, rng))
+    return workload
+
+
+class ForkChoiceStats(object):
+
+    def __init__(self):
+        self.times = {name: [] for name in OPERATIONS}
+        # The head after each slot
+        self.heads = []
+
+    def time(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.times[name].append(time.perf_counter() - start)
+        return result
+
+
+def use_engine(spec, engine):
+    """
+    Make ``spec`` use the fork choice of ``engine``, and return a function restoring it:
+     - ``spec``: the functions of the specification, without the caches and indexes of the pyspec,
+     - ``cached``: the pyspec as built,
+     - ``proto_array``: the proto-array fork choice over the pyspec, see ``eth2spec.fork_choice.proto_array``.
+    """
+    assert engine in ENGINES
+    if engine == 'proto_array':
+        proto_array.install(spec)
+        return lambda: proto_array.uninstall(spec)
+    return use_backend(spec, engine)
+
+
+def run_workload(spec, state, workload):
+    """
+    Add the blocks and attestations of ``workload`` to a store from the genesis ``state``, slot by slot,
+     running ``get_head`` after each slot, and return the ``ForkChoiceStats``.
+    """
+    store = spec.get_genesis_store(state)
+    stats = ForkChoiceStats()
+    for slot, blocks, attestations in workload:
+        spec.on_tick(store, store.genesis_time + slot * spec.SECONDS_PER_SLOT)
+        for block in blocks:
+            stats.time('on_block', spec.on_block, store, block)
+        for attestation in attestations:
+            stats.time('on_attestation', spec.on_attestation, store, attestation)
+        stats.heads.append(stats.time('get_head', spec.get_head, store))
+    return stats
+
+
+def get_percentiles(times, percentiles=(0.5, 0.9, 0.99)):
+    ordered = sorted(times)
+    return [ordered[min(len(ordered) - 1, int(len(ordered) * p))] for p in percentiles]
+
+
+def print_report(results, file=None):
+    """
+    Print the latencies of the operations of the ``ForkChoiceStats`` of each engine in ``results``.
+    """
+    print(f"{'engine':>12} {'operation':>15} {'count':>6} {'mean (ms)':>10} {'p50 (ms)':>9}"
+          f" {'p90 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}", file=file)
+    for engine, stats in results.items():
+        for name in OPERATIONS:
+            times = stats.times[name]
+            if len(times) == 0:
+                continue
+            p50, p90, p99 = get_percentiles(times)
+            print(f'{engine:>12} {name:>15} {len(times):>6} {sum(times) / len(times) * 1000:>10.2f}'
+                  f' {p50 * 1000:>9.2f} {p90 * 1000:>9.2f} {p99 * 1000:>9.2f} {max(times) * 1000:>9.2f}', file=file)
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m eth2spec.fork_choice.benchmark',
+                            description='Benchmark the fork choice on synthetic stores with forks and churning votes.')
+    parser.add_argument('--validators', type=int, default=1024, help='Number of validators')
+    parser.add_argument('--epochs', type=int, default=4, help='Number of epochs of blocks')
+    parser.add_argument('--fan-out', type=int, default=3, help='Number of tips at every fork')
+    parser.add_argument('--depth', type=int, default=4, help='Number of slots between forks')
+    parser.add_argument('--attestations', type=int, default=8, help='Number of attestations per slot')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=ENGINES,
+                        help='spec: functions of the specification, cached: the pyspec as built,'
+                             ' proto_array: the proto-array fork choice')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the votes')
+    parser.add_argument('--config', default='minimal', help='Name of the config')
+    parser.add_argument('--configs-dir', default=DEFAULT_CONFIGS_DIR, help='Directory of the configs')
+    args = parser.parse_args(argv)
+
+    from preset_loader import loader
+    spec = spec_phase0
+    spec.apply_constants_preset(loader.load_presets(args.configs_dir, args.config))
+    # Deposits, blocks and attestations are unsigned
+    bls.bls_active = False
+    state = build_genesis_state(spec, b'\x12' * 32, spec.MIN_GENESIS_TIME,
+                                make_deposits(spec, args.validators, False))
+    start = time.perf_counter()
+    workload = build_workload(spec, state, args.epochs, args.fan_out, args.depth, args.attestations, args.seed)
+    print(f'{args.validators} validators, {sum(len(blocks) for _, blocks, _ in workload)} blocks,'
+          f' {sum(len(attestations) for _, _, attestations in workload)} attestations,'
+          f' built in {time.perf_counter() - start:.2f} s')
+
+    results = {}
+    for engine in args.engines:
+        restore = use_engine(spec, engine)
+        try:
+            results[engine] = run_workload(spec, state, workload)
+        finally:
+            restore()
+    heads = [stats.heads for stats in results.values()]
+    assert all(engine_heads == heads[0] for engine_heads in heads), 'The engines disagree on the heads'
+    print_report(results)
+
+
+if __name__ == '__main__':
+    main()
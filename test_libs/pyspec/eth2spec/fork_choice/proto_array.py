@@ -0,0 +1,219 @@
+"""
+Proto-array fork choice: the LMD-GHOST head of ``get_head``, with node weights maintained incrementally.
+
+Blocks are nodes of an array, parents before children. Each node keeps its weight, the attesting balance of
+ the votes for it and its descendants, and its best child. Vote and balance changes are applied as deltas,
+ propagated only up the ancestors of the changed nodes, and head queries walk the best children: O(depth).
+
+Usage: ``install(spec)`` makes ``spec.on_block`` and ``spec.on_attestation`` maintain a proto-array per store,
+ and ``spec.get_head`` answer from it. ``uninstall(spec)`` restores the spec functions.
+"""
+import heapq
+import weakref
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class ProtoNode(object):
+
+    def __init__(self, root: bytes, parent: Optional[int], slot: int):
+        self.root = root
+        self.parent = parent
+        self.slot = slot
+        self.weight = 0
+        self.children: List[int] = []
+        self.best_child: Optional[int] = None
+
+
+class ProtoArray(object):
+    """
+    Block tree with the latest votes of validators, and the weights of the blocks with the current balances.
+    """
+
+    def __init__(self):
+        self.nodes: List[ProtoNode] = []
+        self.indices: Dict[bytes, int] = {}
+        # Roots of the latest votes of validators, and the node and balance of the votes counted in the weights
+        self.votes: Dict[int, bytes] = {}
+        self.applied: Dict[int, Tuple[int, int]] = {}
+        # Validators with a vote or balance change not counted in the weights yet
+        self.changed: Set[int] = set()
+        # Validators with a vote for each root not in the array yet
+        self.pending: Dict[bytes, Set[int]] = {}
+        self.balances: Dict[int, int] = {}
+        # The checkpoint of the balances, for stores
+        self.balances_checkpoint: Any = None
+
+    def add_block(self, root: bytes, parent_root: bytes, slot: int) -> None:
+        if root in self.indices:
+            return
+        parent = self.indices.get(parent_root)
+        index = len(self.nodes)
+        self.nodes.append(ProtoNode(root, parent, slot))
+        self.indices[root] = index
+        if parent is not None:
+            self.nodes[parent].children.append(index)
+            self.update_best_child(parent)
+        # Votes for the block may have arrived before it
+        self.changed.update(self.pending.pop(root, ()))
+
+    def process_vote(self, validator_index: int, root: bytes) -> None:
+        if self.votes.get(validator_index) != root:
+            self.votes[validator_index] = root
+            self.changed.add(validator_index)
+            if root not in self.indices:
+                self.pending.setdefault(root, set()).add(validator_index)
+
+    def set_balances(self, balances: Dict[int, int]) -> None:
+        """
+        Set the balances to weigh votes with, e.g. the effective balances of the active validators
+         at the justified checkpoint.
+        """
+        self.changed.update(i for i in self.votes if self.applied.get(i, (None, 0))[1] != balances.get(i, 0))
+        self.balances = balances
+
+    def key(self, index: int) -> Tuple[int, bytes]:
+        node = self.nodes[index]
+        return node.weight, node.root
+
+    def update_best_child(self, index: int) -> None:
+        node = self.nodes[index]
+        node.best_child = max(node.children, key=self.key) if len(node.children) > 0 else None
+
+    def apply_score_changes(self) -> None:
+        deltas: Dict[int, int] = {}
+        for validator_index in self.changed:
+            old_node, old_balance = self.applied.pop(validator_index, (None, 0))
+            if old_node is not None:
+                deltas[old_node] = deltas.get(old_node, 0) - old_balance
+            new_node = self.indices.get(self.votes.get(validator_index))
+            new_balance = self.balances.get(validator_index, 0)
+            if new_node is not None and new_balance > 0:
+                deltas[new_node] = deltas.get(new_node, 0) + new_balance
+                self.applied[validator_index] = (new_node, new_balance)
+        self.changed.clear()
+
+        # Propagate the deltas to the ancestors, children first: children have higher indices than their parents
+        queue = [-index for index in deltas]
+        heapq.heapify(queue)
+        touched_parents = set()
+        while len(queue) > 0:
+            index = -heapq.heappop(queue)
+            delta = deltas.pop(index)
+            node = self.nodes[index]
+            node.weight += delta
+            if node.parent is not None:
+                if node.parent not in deltas:
+                    deltas[node.parent] = 0
+                    heapq.heappush(queue, -node.parent)
+                deltas[node.parent] += delta
+                touched_parents.add(node.parent)
+        for index in touched_parents:
+            self.update_best_child(index)
+
+    def find_head(self, justified_root: bytes, justified_slot: int) -> bytes:
+        """
+        Return the head from ``justified_root``, like ``get_head``: blocks not after ``justified_slot`` are ignored.
+        """
+        self.apply_score_changes()
+        index = self.indices[justified_root]
+        # Only children of the justified block can be at or before the justified slot
+        children = [child for child in self.nodes[index].children if self.nodes[child].slot > justified_slot]
+        if len(children) == 0:
+            return justified_root
+        index = max(children, key=self.key)
+        while self.nodes[index].best_child is not None:
+            index = self.nodes[index].best_child
+        return self.nodes[index].root
+
+
+# Proto-arrays of stores: id of the store -> (weak reference to the store, proto-array)
+proto_arrays: Dict[int, Tuple[Any, ProtoArray]] = {}
+
+
+def get_balances(context) -> Dict[int, int]:
+    return {index: context.effective_balances[index] for index in context.active_indices}
+
+
+def build_proto_array(spec, store) -> ProtoArray:
+    proto_array = ProtoArray()
+    for root, block in sorted(store.blocks.items(), key=lambda item: item[1].slot):
+        proto_array.add_block(root, block.parent_root, block.slot)
+    for validator_index, message in store.latest_messages.items():
+        proto_array.process_vote(validator_index, message.root)
+    return proto_array
+
+
+def get_proto_array(spec, store, create: bool = True) -> Optional[ProtoArray]:
+    """
+    Return the proto-array of ``store``, built from its blocks and latest messages on first use.
+    """
+    entry = proto_arrays.get(id(store))
+    if entry is not None and entry[0]() is store:
+        return entry[1]
+    if not create:
+        return None
+    proto_array = build_proto_array(spec, store)
+    key = id(store)
+    proto_arrays[key] = (weakref.ref(store, lambda _: proto_arrays.pop(key, None)), proto_array)
+    return proto_array
+
+
+def get_head(spec, store) -> bytes:
+    proto_array = get_proto_array(spec, store)
+    checkpoint = proto_array.balances_checkpoint
+    if checkpoint is None or checkpoint != store.justified_checkpoint:
+        proto_array.set_balances(get_balances(spec.get_checkpoint_context(store, store.justified_checkpoint)))
+        proto_array.balances_checkpoint = store.justified_checkpoint
+    justified_slot = spec.compute_start_slot_at_epoch(store.justified_checkpoint.epoch)
+    return proto_array.find_head(store.justified_checkpoint.root, justified_slot)
+
+
+_installed: Dict[str, Dict[str, Any]] = {}
+
+
+def install(spec) -> None:
+    """
+    Make the fork choice of ``spec`` maintain proto-arrays, and answer ``get_head`` from them.
+    """
+    if spec.__name__ in _installed:
+        return
+    originals = {name: getattr(spec, name) for name in ('on_block', 'on_attestation', 'on_attestations', 'get_head')}
+    _installed[spec.__name__] = originals
+
+    def on_block(store, block):
+        originals['on_block'](store, block)
+        proto_array = get_proto_array(spec, store, create=False)
+        if proto_array is not None:
+            proto_array.add_block(spec.signing_root(block), block.parent_root, block.slot)
+
+    def process_votes(store, attestations):
+        proto_array = get_proto_array(spec, store, create=False)
+        if proto_array is not None:
+            for attestation in attestations:
+                for index in spec.get_store_attesting_indices(store, attestation):
+                    proto_array.process_vote(index, store.latest_messages[index].root)
+
+    def on_attestation(store, attestation):
+        originals['on_attestation'](store, attestation)
+        process_votes(store, [attestation])
+
+    def on_attestations(store, attestations):
+        originals['on_attestations'](store, attestations)
+        process_votes(store, attestations)
+
+    spec.on_block = on_block
+    spec.on_attestation = on_attestation
+    spec.on_attestations = on_attestations
+    spec.get_head = lambda store: get_head(spec, store)
+
+
+def uninstall(spec) -> None:
+    """
+    Restore the fork choice functions of ``spec``.
+    """
+    for name, fn in _installed.pop(spec.__name__, {}).items():
+        setattr(spec, name, fn)
+
+
+def is_installed(spec) -> bool:
+    return spec.__name__ in _installed
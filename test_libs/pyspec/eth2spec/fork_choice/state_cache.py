@@ -0,0 +1,146 @@
+"""
+Bounded cache of the post-states of the blocks of a fork choice store, in place of ``store.block_states``.
+
+States are kept within a budget of serialized bytes, least recently used first out, except for the hot states:
+ those of the checkpoints of the store, of the latest block, and of blocks without a parent in the store.
+An evicted state is regenerated on access, by replaying the blocks from the nearest cached ancestor state.
+
+Usage: ``use_state_cache(spec, store, byte_budget)``, and ``store.block_states.stats`` to observe it.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, MutableMapping, Set
+
+from eth2spec.utils import bls
+from eth2spec.utils.ssz.ssz_impl import serialized_size
+
+
+class StateCacheStats(object):
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Time to regenerate each missed state, and the number of blocks replayed
+        self.regeneration_times: List[float] = []
+        self.replayed_blocks = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 1.0
+
+
+class StateCache(MutableMapping):
+    """
+    Mapping from block roots to post-states, keeping at most ``byte_budget`` serialized bytes of states
+     besides the hot states.
+    """
+
+    def __init__(self, spec, store, byte_budget: int, states: Dict[bytes, Any] = None):
+        self.spec = spec
+        self.store = store
+        self.byte_budget = byte_budget
+        # Cached states and their sizes, least recently used first
+        self.states: OrderedDict = OrderedDict()
+        self.sizes: Dict[bytes, int] = {}
+        self.size = 0
+        # Roots of all the states, cached or not
+        self.roots: Set[bytes] = set()
+        self.latest_root = None
+        self.stats = StateCacheStats()
+        for root, state in ({} if states is None else states).items():
+            self[root] = state
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.roots)
+
+    def __contains__(self, root: object) -> bool:
+        return root in self.roots
+
+    def __getitem__(self, root: bytes) -> Any:
+        if root not in self.roots:
+            raise KeyError(root)
+        if root in self.states:
+            self.stats.hits += 1
+            self.states.move_to_end(root)
+            return self.states[root]
+        self.stats.misses += 1
+        start = time.perf_counter()
+        state = self.regenerate(root)
+        self.stats.regeneration_times.append(time.perf_counter() - start)
+        self.cache(root, state)
+        return state
+
+    def __setitem__(self, root: bytes, state: Any) -> None:
+        self.roots.add(root)
+        self.latest_root = root
+        self.cache(root, state)
+
+    def __delitem__(self, root: bytes) -> None:
+        self.roots.remove(root)
+        if root in self.states:
+            del self.states[root]
+            self.size -= self.sizes.pop(root)
+
+    def cache(self, root: bytes, state: Any) -> None:
+        if root in self.states:
+            self.size -= self.sizes[root]
+        self.states[root] = state
+        self.states.move_to_end(root)
+        self.sizes[root] = serialized_size(state)
+        self.size += self.sizes[root]
+        self.evict()
+
+    def get_hot_roots(self) -> Set[bytes]:
+        store = self.store
+        return {
+            store.justified_checkpoint.root,
+            store.best_justified_checkpoint.root,
+            store.finalized_checkpoint.root,
+            self.latest_root,
+        }
+
+    def is_evictable(self, root: bytes, hot_roots: Set[bytes]) -> bool:
+        # States of blocks without a parent in the store cannot be regenerated
+        blocks = self.store.blocks
+        return root not in hot_roots and root in blocks and blocks[root].parent_root in blocks
+
+    def evict(self) -> None:
+        if self.size <= self.byte_budget:
+            return
+        hot_roots = self.get_hot_roots()
+        for root in [root for root in self.states if self.is_evictable(root, hot_roots)]:
+            if self.size <= self.byte_budget:
+                break
+            del self.states[root]
+            self.size -= self.sizes.pop(root)
+            self.stats.evictions += 1
+
+    def regenerate(self, root: bytes) -> Any:
+        """
+        Return the state of ``root``, replaying the blocks from the nearest cached ancestor state.
+        """
+        blocks = []
+        while root not in self.states:
+            block = self.store.blocks[root]
+            blocks.append(block)
+            root = block.parent_root
+        state = self.states[root].copy()
+        # The blocks were verified when they were added to the store
+        with bls.use_bls(False):
+            for block in reversed(blocks):
+                state = self.spec.state_transition(state, block, False)
+        self.stats.replayed_blocks += len(blocks)
+        return state
+
+
+def use_state_cache(spec, store, byte_budget: int) -> StateCache:
+    """
+    Replace the block states of ``store`` with a ``StateCache`` of ``byte_budget`` serialized bytes.
+    """
+    store.block_states = StateCache(spec, store, byte_budget, store.block_states)
+    return store.block_states
@@ -0,0 +1,100 @@
+"""
+Benchmark of the genesis state builder, for large numbers of deposits.
+
+Usage: ``python -m eth2spec.genesis.benchmark [--counts 16384 65536 300000] [--processes N] [--bls] [--spec]``
+"""
+import time
+from argparse import ArgumentParser
+
+from py_ecc import bls as py_ecc_bls
+
+from eth2spec.genesis.builder import build_genesis_state
+from eth2spec.phase0 import spec as spec_phase0
+from eth2spec.utils import bls
+from eth2spec.utils.hash_function import hash
+from eth2spec.utils.merkle_minimal import calc_merkle_tree_from_leaves, zerohashes
+from eth2spec.utils.ssz.ssz_impl import hash_tree_root, signing_root
+
+DEFAULT_COUNTS = [16384, 65536, 300000]
+
+
+def get_genesis_deposit_proof(tree, index):
+    """
+    Return the proof of deposit ``index`` against the deposit root when it is processed,
+     i.e. with all later deposits left out of the tree.
+    """
+    proof = []
+    for height in range(len(tree) - 1):
+        node = index >> height
+        # Only left siblings were deposited before
+        proof.append(tree[height][node - 1] if node % 2 == 1 else zerohashes[height])
+    return proof + [(index + 1).to_bytes(32, 'little')]
+
+
+def make_deposits(spec, count, signed):
+    """
+    Make ``count`` deposits of distinct validators, with proofs for genesis.
+    Unsigned deposits get made-up pubkeys, as key generation and signing are slow.
+    """
+    domain = spec.compute_domain(spec.DOMAIN_DEPOSIT)
+    deposit_data_list = []
+    for index in range(count):
+        if signed:
+            privkey = index + 1
+            pubkey = py_ecc_bls.privtopub(privkey)
+        else:
+            pubkey = index.to_bytes(48, 'little')
+        deposit_data = spec.DepositData(
+            pubkey=pubkey,
+            withdrawal_credentials=spec.BLS_WITHDRAWAL_PREFIX + hash(pubkey)[1:],
+            amount=spec.MAX_EFFECTIVE_BALANCE,
+        )
+        if signed:
+            deposit_data.signature = py_ecc_bls.sign(signing_root(deposit_data), privkey, domain)
+        deposit_data_list.append(deposit_data)
+
+    tree = calc_merkle_tree_from_leaves(tuple(hash_tree_root(d) for d in deposit_data_list),
+                                        spec.DEPOSIT_CONTRACT_TREE_DEPTH)
+    return [
+        spec.Deposit(proof=get_genesis_deposit_proof(tree, index), data=deposit_data)
+        for index, deposit_data in enumerate(deposit_data_list)
+    ]
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark genesis state building for large numbers of deposits.')
+    parser.add_argument('--counts', type=int, nargs='+', default=DEFAULT_COUNTS, help='Numbers of deposits')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of processes to verify signatures with, defaults to the number of CPUs')
+    parser.add_argument('--bls', action='store_true', help='Sign and verify deposits (slow)')
+    parser.add_argument('--spec', action='store_true',
+                        help='Also time initialize_beacon_state_from_eth1, and check the states are equal (slow)')
+    args = parser.parse_args()
+
+    spec = spec_phase0
+    bls.bls_active = args.bls
+    eth1_block_hash = b'\x12' * 32
+    eth1_timestamp = spec.MIN_GENESIS_TIME
+
+    print(f"{'deposits':>10} {'prepare (s)':>12} {'build (s)':>10} {'deposits/s':>11} {'spec (s)':>9}")
+    for count in args.counts:
+        start = time.perf_counter()
+        deposits = make_deposits(spec, count, args.bls)
+        prepare_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        state = build_genesis_state(spec, eth1_block_hash, eth1_timestamp, deposits, processes=args.processes)
+        build_time = time.perf_counter() - start
+
+        spec_time = '-'
+        if args.spec:
+            start = time.perf_counter()
+            expected = spec.initialize_beacon_state_from_eth1(eth1_block_hash, eth1_timestamp, deposits)
+            spec_time = f'{time.perf_counter() - start:.2f}'
+            assert hash_tree_root(state) == hash_tree_root(expected)
+
+        print(f'{count:>10} {prepare_time:>12.2f} {build_time:>10.2f} {count / build_time:>11.0f} {spec_time:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Genesis state builder for large validator sets.
+
+``build_genesis_state`` produces the same state as ``initialize_beacon_state_from_eth1``, but:
+ - maintains the deposit root incrementally, instead of re-hashing the list of deposits for every deposit,
+ - looks up pubkeys in a map, instead of scanning the registry for every deposit,
+ - verifies the proofs of possession up-front, optionally with a pool of processes.
+"""
+from multiprocessing import Pool
+
+from eth2spec.utils import bls
+from eth2spec.utils.hash_function import hash
+from eth2spec.utils.merkle_minimal import IncrementalMerkleTree
+from eth2spec.utils.ssz.ssz_impl import hash_tree_root, signing_root
+
+
+def verify_deposit_signature(args):
+    pubkey, message_hash, signature, domain = args
+    return bls.bls_verify(pubkey, message_hash, signature, domain)
+
+
+def get_new_validator_deposits(spec, deposits, processes=None):
+    """
+    Return the indices of the deposits that add a validator to the registry.
+    A pubkey is added by its first deposit with a valid proof of possession, later deposits are top-ups.
+    :param processes: Number of processes to verify signatures with, defaults to the number of CPUs. 1 to not fork.
+    """
+    domain = spec.compute_domain(spec.DOMAIN_DEPOSIT)
+    # Deposits of each pubkey, that may add the validator
+    pending = {}
+    for index, deposit in enumerate(deposits):
+        pending.setdefault(deposit.data.pubkey, []).append(index)
+
+    pool = Pool(processes) if processes != 1 and bls.is_bls_active() and len(deposits) > 1 else None
+    try:
+        new_validator_deposits = set()
+        # Verify the first pending deposit of each pubkey, until a valid one is found
+        while len(pending) > 0:
+            candidates = [indices[0] for indices in pending.values()]
+            signatures = [
+                (deposit.data.pubkey, signing_root(deposit.data), deposit.data.signature, domain)
+                for deposit in (deposits[index] for index in candidates)
+            ]
+            results = (map if pool is None else pool.map)(verify_deposit_signature, signatures)
+            next_pending = {}
+            for index, valid in zip(candidates, results):
+                pubkey = deposits[index].data.pubkey
+                if valid:
+                    new_validator_deposits.add(index)
+                elif len(pending[pubkey]) > 1:
+                    next_pending[pubkey] = pending[pubkey][1:]
+            pending = next_pending
+    finally:
+        if pool is not None:
+            pool.close()
+    return new_validator_deposits
+
+
+def is_valid_merkle_branch(leaf, branch, depth, index, root):
+    """
+    Like the spec function, without the spec hash cache, as none of these hashes are repeated.
+    """
+    value = leaf
+    for i in range(depth):
+        if index // (2**i) % 2:
+            value = hash(branch[i] + value)
+        else:
+            value = hash(value + branch[i])
+    return value == root
+
+
+def build_genesis_state(spec, eth1_block_hash, eth1_timestamp, deposits, processes=None, verify_proofs=True):
+    """
+    Build the genesis state, like ``spec.initialize_beacon_state_from_eth1``.
+    :param processes: Number of processes to verify proofs of possession with, see ``get_new_validator_deposits``.
+    :param verify_proofs: Whether to verify the merkle proofs of the deposits, like the spec does.
+    """
+    state = spec.BeaconState(
+        genesis_time=eth1_timestamp - eth1_timestamp % spec.SECONDS_PER_DAY + 2 * spec.SECONDS_PER_DAY,
+        eth1_data=spec.Eth1Data(block_hash=eth1_block_hash, deposit_count=len(deposits)),
+        latest_block_header=spec.BeaconBlockHeader(body_root=hash_tree_root(spec.BeaconBlockBody())),
+        randao_mixes=[eth1_block_hash] * spec.EPOCHS_PER_HISTORICAL_VECTOR,  # Seed RANDAO with Eth1 entropy
+    )
+
+    new_validator_deposits = get_new_validator_deposits(spec, deposits, processes)
+
+    # Process deposits
+    deposit_tree = IncrementalMerkleTree(spec.DEPOSIT_CONTRACT_TREE_DEPTH)
+    validator_indices = {}
+    for index, deposit in enumerate(deposits):
+        leaf = hash_tree_root(deposit.data)
+        deposit_tree.append(leaf)
+        if verify_proofs:
+            # Mix in the length of the deposit list, like the SSZ List root
+            deposit_root = hash(deposit_tree.get_root() + deposit_tree.count.to_bytes(32, 'little'))
+            assert is_valid_merkle_branch(
+                leaf=leaf,
+                branch=deposit.proof,
+                depth=spec.DEPOSIT_CONTRACT_TREE_DEPTH + 1,  # Add 1 for the `List` length mix-in
+                index=index,
+                root=deposit_root,
+            )
+
+        pubkey = deposit.data.pubkey
+        amount = deposit.data.amount
+        if index in new_validator_deposits:
+            validator_indices[pubkey] = len(state.validators)
+            state.validators.append(spec.Validator(
+                pubkey=pubkey,
+                withdrawal_credentials=deposit.data.withdrawal_credentials,
+                activation_eligibility_epoch=spec.FAR_FUTURE_EPOCH,
+                activation_epoch=spec.FAR_FUTURE_EPOCH,
+                exit_epoch=spec.FAR_FUTURE_EPOCH,
+                withdrawable_epoch=spec.FAR_FUTURE_EPOCH,
+                effective_balance=min(amount - amount % spec.EFFECTIVE_BALANCE_INCREMENT, spec.MAX_EFFECTIVE_BALANCE),
+            ))
+            state.balances.append(amount)
+        elif pubkey in validator_indices:
+            spec.increase_balance(state, validator_indices[pubkey], amount)
+    state.eth1_deposit_index = len(deposits)
+    if len(deposits) > 0:
+        state.eth1_data.deposit_root = hash(deposit_tree.get_root() + len(deposits).to_bytes(32, 'little'))
+
+    # Process activations
+    for index, validator in enumerate(state.validators):
+        balance = state.balances[index]
+        validator.effective_balance = min(balance - balance % spec.EFFECTIVE_BALANCE_INCREMENT,
+                                          spec.MAX_EFFECTIVE_BALANCE)
+        if validator.effective_balance == spec.MAX_EFFECTIVE_BALANCE:
+            validator.activation_eligibility_epoch = spec.GENESIS_EPOCH
+            validator.activation_epoch = spec.GENESIS_EPOCH
+
+    # Index the pubkeys of the registry for later deposits
+    spec.get_pubkey_index(state.validators)
+    return state
@@ -0,0 +1,3 @@
+from eth2spec.replay.replay import main
+
+main()
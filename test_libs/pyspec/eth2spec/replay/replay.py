@@ -0,0 +1,223 @@
+"""
+Replay of blocks through the spec state transition, to benchmark the spec.
+
+Usage: ``python -m eth2spec.replay PRE_STATE BLOCKS_DIR [--config minimal] [--backend cached]
+ [--checkpoint-epochs N --checkpoint-dir DIR] [--validate-state-root] [--bls] [--profile]``
+"""
+import os
+import re
+import sys
+import time
+from argparse import ArgumentParser
+from importlib import import_module
+
+from eth2spec.utils import bls
+from eth2spec.utils.ssz.ssz_impl import deserialize, serialize
+
+BACKENDS = ('spec', 'cached', 'vectorized')
+
+DEFAULT_CONFIGS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'configs')
+
+
+def load_ssz(path, typ):
+    with open(path, 'rb') as f:
+        return deserialize(f.read(), typ)
+
+
+def natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def list_block_files(blocks_dir):
+    """
+    Return the paths of the SSZ files in ``blocks_dir``, by file name, with numbers ordered numerically.
+    """
+    names = sorted((name for name in os.listdir(blocks_dir) if name.endswith('.ssz')), key=natural_key)
+    return [os.path.join(blocks_dir, name) for name in names]
+
+
+def get_spec_functions(spec):
+    """
+    Return the names of the spec functions replaced by the pyspec, with the originals kept as ``_name``.
+    """
+    return [
+        name[1:] for name in dir(spec)
+        if name.startswith('_') and not name.startswith('__')
+        and callable(getattr(spec, name)) and callable(getattr(spec, name[1:], None))
+    ]
+
+
+def use_backend(spec, backend):
+    """
+    Switch ``spec`` to ``backend``, and return a function to switch it back:
+     - ``spec``: the functions of the specification, without the caches and indexes of the pyspec,
+     - ``cached``: the pyspec as built,
+     - ``vectorized``: the pyspec with vectorized epoch processing, see ``eth2spec.vectorized``.
+    """
+    assert backend in BACKENDS
+    if backend == 'vectorized':
+        from eth2spec.vectorized import epoch_processing
+        epoch_processing.install(spec)
+        return lambda: epoch_processing.uninstall(spec)
+
+    replaced = {}
+    if backend == 'spec':
+        replaced = {name: getattr(spec, name) for name in get_spec_functions(spec)}
+        for name in replaced:
+            setattr(spec, name, getattr(spec, '_' + name))
+
+    def restore():
+        for name, fn in replaced.items():
+            setattr(spec, name, fn)
+    return restore
+
+
+class ReplayStats(object):
+
+    def __init__(self):
+        self.block_times = []
+        self.epoch_times = []
+        # Time in process_slots, excluding epoch transitions, and the number of slots processed
+        self.slots_time = 0.0
+        self.slot_count = 0
+
+    def time(self, spec, name, record):
+        fn = getattr(spec, name)
+
+        def timed(*args, **kw):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kw)
+            finally:
+                record(time.perf_counter() - start)
+        setattr(spec, name, timed)
+        return fn
+
+    @property
+    def transition_time(self):
+        return sum(self.block_times) + sum(self.epoch_times) + self.slots_time
+
+
+def replay(spec, state, blocks, validate_state_root=False, checkpoint_epochs=None, checkpoint_dir=None):
+    """
+    Apply ``blocks`` to ``state`` with ``spec.state_transition``, and return the ``ReplayStats``.
+    With ``checkpoint_epochs``, the state is written to ``checkpoint_dir`` as ``epoch_<epoch>.ssz``,
+     after the first block of every ``checkpoint_epochs``-th epoch.
+    """
+    stats = ReplayStats()
+    epoch_times = []
+
+    def record_slots(elapsed):
+        stats.slots_time += elapsed - sum(epoch_times)
+        stats.epoch_times.extend(epoch_times)
+        epoch_times.clear()
+
+    originals = {
+        'process_slots': stats.time(spec, 'process_slots', record_slots),
+        'process_epoch': stats.time(spec, 'process_epoch', epoch_times.append),
+        'process_block': stats.time(spec, 'process_block', stats.block_times.append),
+    }
+    try:
+        next_checkpoint_epoch = None
+        if checkpoint_epochs is not None:
+            next_checkpoint_epoch = (spec.get_current_epoch(state) // checkpoint_epochs + 1) * checkpoint_epochs
+        for block in blocks:
+            stats.slot_count += block.slot - state.slot
+            spec.state_transition(state, block, validate_state_root)
+            epoch = spec.get_current_epoch(state)
+            if next_checkpoint_epoch is not None and epoch >= next_checkpoint_epoch:
+                with open(os.path.join(checkpoint_dir, f'epoch_{epoch}.ssz'), 'wb') as f:
+                    f.write(serialize(state))
+                next_checkpoint_epoch = (epoch // checkpoint_epochs + 1) * checkpoint_epochs
+    finally:
+        for name, fn in originals.items():
+            setattr(spec, name, fn)
+    return stats
+
+
+def get_peak_memory():
+    """
+    Return the peak resident memory of the process in bytes, or None if not available on this platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_latencies(times):
+    if len(times) == 0:
+        return '-'
+    ordered = sorted(times)
+    percentile = lambda p: ordered[min(len(ordered) - 1, int(len(ordered) * p))]  # noqa: E731
+    return (f'mean {sum(times) / len(times) * 1000:.2f} ms, p50 {percentile(0.5) * 1000:.2f} ms,'
+            f' p90 {percentile(0.9) * 1000:.2f} ms, max {ordered[-1] * 1000:.2f} ms')
+
+
+def print_report(stats, decode_time, file=None):
+    file = sys.stdout if file is None else file
+    block_count = len(stats.block_times)
+    transition_time = stats.transition_time
+    print(f'blocks:            {block_count}', file=file)
+    print(f'transition time:   {transition_time:.3f} s', file=file)
+    print(f'blocks/s:          {block_count / transition_time if transition_time > 0 else 0:.2f}', file=file)
+    print(f'decoding time:     {decode_time:.3f} s', file=file)
+    print(f'block processing:  {format_latencies(stats.block_times)}', file=file)
+    slot_latency = stats.slots_time / stats.slot_count * 1000 if stats.slot_count > 0 else 0
+    print(f'slot processing:   {stats.slot_count} slots, mean {slot_latency:.2f} ms', file=file)
+    print(f'epoch processing:  {len(stats.epoch_times)} epochs, {format_latencies(stats.epoch_times)}', file=file)
+    peak_memory = get_peak_memory()
+    if peak_memory is not None:
+        print(f'peak memory:       {peak_memory / 2**20:.1f} MiB', file=file)
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m eth2spec.replay',
+                            description='Replay SSZ blocks through the spec state transition, to benchmark it.')
+    parser.add_argument('pre_state', help='SSZ file of the pre-state')
+    parser.add_argument('blocks_dir', help='Directory of SSZ blocks, applied in the order of their file names')
+    parser.add_argument('--phase', type=int, default=0, choices=[0, 1], help='Spec phase')
+    parser.add_argument('--config', default='minimal', help='Name of the config of the blocks')
+    parser.add_argument('--configs-dir', default=DEFAULT_CONFIGS_DIR, help='Directory of the configs')
+    parser.add_argument('--backend', default='cached', choices=BACKENDS,
+                        help='spec: functions of the specification, cached: the pyspec, '
+                             'vectorized: the pyspec with vectorized epoch processing')
+    parser.add_argument('--checkpoint-epochs', type=int, default=None, help='Write the state every N epochs')
+    parser.add_argument('--checkpoint-dir', default='.', help='Directory to write the checkpoints to')
+    parser.add_argument('--validate-state-root', action='store_true', help='Check the state roots of the blocks')
+    parser.add_argument('--bls', action='store_true', help='Verify signatures')
+    parser.add_argument('--profile', action='store_true',
+                        help='Use the instrumented spec (make instrumented_pyspec), and print its profile')
+    args = parser.parse_args(argv)
+
+    from preset_loader import loader
+    spec = import_module(f'eth2spec.phase{args.phase}.{"instrumented_spec" if args.profile else "spec"}')
+    spec.apply_constants_preset(loader.load_presets(args.configs_dir, args.config))
+    bls.bls_active = args.bls
+
+    start = time.perf_counter()
+    state = load_ssz(args.pre_state, spec.BeaconState)
+    decode_time = time.perf_counter() - start
+
+    def load_blocks():
+        nonlocal decode_time
+        for path in list_block_files(args.blocks_dir):
+            start = time.perf_counter()
+            block = load_ssz(path, spec.BeaconBlock)
+            decode_time += time.perf_counter() - start
+            yield block
+
+    restore = use_backend(spec, args.backend)
+    try:
+        if args.profile:
+            spec.reset_profile()
+        stats = replay(spec, state, load_blocks(), args.validate_state_root,
+                       args.checkpoint_epochs, args.checkpoint_dir)
+    finally:
+        restore()
+    print_report(stats, decode_time)
+    if args.profile:
+        spec.dump_profile(limit=50)
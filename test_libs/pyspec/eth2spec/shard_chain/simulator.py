@@ -0,0 +1,253 @@
+"""
+Simulator of shard chains, advancing the states of many shards in parallel against a shared beacon state.
+
+Between crosslinks, shard chains are independent of each other, and ``shard_state_transition`` only reads
+ the beacon state: the shards are split over a pool of processes, which receive the beacon state once,
+ with the constants of the spec and the BLS setting, and move it to each shard epoch themselves.
+Every shard slot, each shard gets a generated block, with a random body and random attestations.
+Blocks are unsigned, signatures are not verified.
+
+As ``SHARD_GENESIS_EPOCH`` is a placeholder, the beacon state is moved to the start slot of each shard epoch
+ without processing the slots in between, like the phase 1 tests do.
+
+Usage: ``python -m eth2spec.shard_chain.simulator [--validators 16384] [--shards N] [--slots N] [--processes N]
+ [--body-size 4096] [--participation 0.5] [--config minimal]``
+"""
+import os
+import time
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from random import Random
+
+from eth2spec.genesis.benchmark import make_deposits
+from eth2spec.genesis.builder import build_genesis_state
+from eth2spec.phase1 import spec as spec_phase1
+from eth2spec.utils import bls
+from eth2spec.utils.ssz.ssz_impl import deserialize, hash_tree_root, serialize, signing_root
+
+DEFAULT_CONFIGS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'configs')
+
+# Beacon state of the worker processes, set by ``init_worker``, and its copy at the shard epoch of the last task
+_beacon_state = None
+_epoch_beacon_state = None
+
+
+class ShardStats(object):
+
+    def __init__(self, shard):
+        self.shard = shard
+        self.blocks = 0
+        self.body_bytes = 0
+        self.attestations = 0
+        # Time to build the blocks, and to run the state transitions
+        self.build_time = 0.0
+        self.transition_time = 0.0
+
+    def add(self, stats):
+        self.blocks += stats.blocks
+        self.body_bytes += stats.body_bytes
+        self.attestations += stats.attestations
+        self.build_time += stats.build_time
+        self.transition_time += stats.transition_time
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.blocks / self.transition_time if self.transition_time > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.body_bytes / self.transition_time if self.transition_time > 0 else 0.0
+
+
+def get_epoch_beacon_state(spec, beacon_state, epoch):
+    """
+    Return a copy of ``beacon_state`` at the start slot of the shard ``epoch``, with the root of the state cached
+     in its latest block header, like ``process_slot`` does.
+    """
+    beacon_state = beacon_state.copy()
+    if beacon_state.latest_block_header.state_root == spec.Bytes32():
+        beacon_state.latest_block_header.state_root = hash_tree_root(beacon_state)
+    beacon_state.slot = spec.Slot(epoch * spec.SLOTS_PER_EPOCH)
+    return beacon_state
+
+
+def build_shard_block(spec, beacon_state, shard_state, slot, body_size, participation, rng):
+    """
+    Return an unsigned block at ``slot`` on top of ``shard_state``, with a random body of ``body_size`` bytes,
+     and the attestation bits of a random ``participation`` fraction of the shard committee.
+    """
+    parent_header = shard_state.latest_block_header.copy()
+    if parent_header.state_root == spec.Bytes32():
+        parent_header.state_root = hash_tree_root(shard_state)
+    body = [rng.getrandbits(8) for _ in range(body_size)]
+    block = spec.ShardBlock(
+        shard=shard_state.shard,
+        slot=slot,
+        beacon_block_root=signing_root(beacon_state.latest_block_header),
+        parent_root=signing_root(parent_header),
+        body=body,
+        block_size_sum=shard_state.block_size_sum + spec.SHARD_HEADER_SIZE + len(body),
+    )
+    # The committee of the slot, like process_shard_attestations
+    committee = spec.get_shard_committee(beacon_state, shard_state.shard, slot)
+    block.aggregation_bits = [i < len(committee) and rng.random() < participation
+                              for i in range(2 * spec.MAX_PERIOD_COMMITTEE_SIZE)]
+    return block
+
+
+def advance_shard(spec, beacon_state, shard_state, slots, body_size, participation, seed):
+    """
+    Advance ``shard_state`` with a generated block for each of ``slots``, and return its ``ShardStats``.
+    The blocks only depend on ``seed``, the shard and the slot, not on the process running them.
+    """
+    stats = ShardStats(shard_state.shard)
+    for slot in slots:
+        start = time.perf_counter()
+        rng = Random(f'{seed}-{shard_state.shard}-{slot}')
+        block = build_shard_block(spec, beacon_state, shard_state, slot, body_size, participation, rng)
+        stats.build_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        spec.shard_state_transition(beacon_state, shard_state, block)
+        stats.transition_time += time.perf_counter() - start
+        stats.blocks += 1
+        stats.body_bytes += len(block.body)
+        stats.attestations += sum(block.aggregation_bits)
+    return stats
+
+
+def get_constants(spec):
+    """
+    Return the constants of ``spec``, as a preset for ``apply_constants_preset``.
+    """
+    return {name: value for name, value in vars(spec).items()
+            if name.isupper() and isinstance(value, (int, bytes, str))}
+
+
+def init_worker(constants, bls_active, beacon_state_bytes):
+    """
+    Set up a worker process, which may not inherit the state of the parent process, e.g. when processes are spawned.
+    """
+    global _beacon_state, _epoch_beacon_state
+    spec_phase1.apply_constants_preset(constants)
+    bls.bls_active = bls_active
+    _beacon_state = deserialize(beacon_state_bytes, spec_phase1.BeaconState)
+    _epoch_beacon_state = None
+
+
+def advance_shard_task(args):
+    global _epoch_beacon_state
+    shard_state_bytes, epoch, slots, body_size, participation, seed = args
+    if _epoch_beacon_state is None or spec_phase1.compute_epoch_at_slot(_epoch_beacon_state.slot) != epoch:
+        _epoch_beacon_state = get_epoch_beacon_state(spec_phase1, _beacon_state, epoch)
+    shard_state = deserialize(shard_state_bytes, spec_phase1.ShardState)
+    stats = advance_shard(spec_phase1, _epoch_beacon_state, shard_state, slots, body_size, participation, seed)
+    return serialize(shard_state), stats
+
+
+def simulate(spec, beacon_state, shard_states, slot_count, body_size=4096, participation=0.5, seed=0,
+             processes=None, start_method=None):
+    """
+    Advance each of ``shard_states`` with ``slot_count`` generated blocks against ``beacon_state``,
+     and return the ``ShardStats`` of each shard. The list ``shard_states`` holds the post-states on return.
+    :param processes: Number of processes to advance the shards with, defaults to the number of CPUs. 1 to not fork.
+    :param start_method: Start method of the processes, e.g. ``'spawn'``, defaults to that of the platform.
+    """
+    body_size -= body_size % spec.SHARD_HEADER_SIZE
+    assert 0 <= body_size <= spec.MAX_SHARD_BLOCK_SIZE - spec.SHARD_HEADER_SIZE
+    results = {shard_state.shard: ShardStats(shard_state.shard) for shard_state in shard_states}
+    first_slot = shard_states[0].slot + 1
+    assert all(shard_state.slot + 1 == first_slot for shard_state in shard_states)
+
+    pool = None
+    if processes != 1 and len(shard_states) > 1:
+        assert spec is spec_phase1
+        # One pool for all the epochs, the workers get the beacon state once
+        pool = get_context(start_method).Pool(
+            processes, initializer=init_worker,
+            initargs=(get_constants(spec), bls.is_bls_active(), serialize(beacon_state)))
+    try:
+        slot = first_slot
+        while slot < first_slot + slot_count:
+            # Slots of the shard epoch, which are processed against the same beacon state
+            epoch = spec.compute_epoch_of_shard_slot(slot)
+            end = min(first_slot + slot_count, (epoch + 1) * spec.SHARD_SLOTS_PER_EPOCH)
+            slots = [spec.ShardSlot(s) for s in range(slot, end)]
+            if pool is None:
+                epoch_beacon_state = get_epoch_beacon_state(spec, beacon_state, epoch)
+                epoch_results = [
+                    advance_shard(spec, epoch_beacon_state, shard_state, slots, body_size, participation, seed)
+                    for shard_state in shard_states
+                ]
+            else:
+                tasks = [(serialize(shard_state), epoch, slots, body_size, participation, seed)
+                         for shard_state in shard_states]
+                outputs = pool.map(advance_shard_task, tasks)
+                shard_states[:] = [deserialize(shard_state_bytes, spec.ShardState)
+                                   for shard_state_bytes, _ in outputs]
+                epoch_results = [stats for _, stats in outputs]
+            for stats in epoch_results:
+                results[stats.shard].add(stats)
+            slot = end
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return [results[shard_state.shard] for shard_state in shard_states]
+
+
+def print_report(results, elapsed, file=None):
+    """
+    Print the throughput of each shard in ``results``, and of all the shards over ``elapsed`` seconds.
+    """
+    print(f"{'shard':>6} {'blocks':>7} {'attested':>9} {'build (s)':>10} {'transition (s)':>15}"
+          f" {'blocks/s':>9} {'KiB/s':>9}", file=file)
+    for stats in results:
+        print(f'{stats.shard:>6} {stats.blocks:>7} {stats.attestations:>9} {stats.build_time:>10.2f}'
+              f' {stats.transition_time:>15.2f} {stats.blocks_per_second:>9.1f} {stats.bytes_per_second / 1024:>9.1f}',
+              file=file)
+    blocks = sum(stats.blocks for stats in results)
+    body_bytes = sum(stats.body_bytes for stats in results)
+    print(f'{len(results)} shards, {blocks} blocks in {elapsed:.2f} s: {blocks / elapsed:.1f} blocks/s,'
+          f' {body_bytes / 1024 / elapsed:.1f} KiB/s of block bodies', file=file)
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m eth2spec.shard_chain.simulator',
+                            description='Simulate shard chains in parallel against a shared beacon state.')
+    parser.add_argument('--validators', type=int, default=16384, help='Number of validators')
+    parser.add_argument('--shards', type=int, default=None, help='Number of shards, defaults to SHARD_COUNT')
+    parser.add_argument('--slots', type=int, default=None,
+                        help='Number of shard slots, defaults to SHARD_SLOTS_PER_EPOCH')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of processes to advance the shards with, defaults to the number of CPUs')
+    parser.add_argument('--body-size', type=int, default=4096,
+                        help='Size of the block bodies in bytes, rounded down to a multiple of SHARD_HEADER_SIZE')
+    parser.add_argument('--participation', type=float, default=0.5,
+                        help='Fraction of the shard committees attesting to each block')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the blocks')
+    parser.add_argument('--config', default='minimal', help='Name of the config')
+    parser.add_argument('--configs-dir', default=DEFAULT_CONFIGS_DIR, help='Directory of the configs')
+    args = parser.parse_args(argv)
+
+    from preset_loader import loader
+    spec = spec_phase1
+    spec.apply_constants_preset(loader.load_presets(args.configs_dir, args.config))
+    bls.bls_active = False
+    start = time.perf_counter()
+    beacon_state = build_genesis_state(spec, b'\x12' * 32, spec.MIN_GENESIS_TIME,
+                                       make_deposits(spec, args.validators, False))
+    shard_count = spec.SHARD_COUNT if args.shards is None else args.shards
+    shard_states = [spec.get_genesis_shard_state(spec.Shard(shard)) for shard in range(shard_count)]
+    slot_count = spec.SHARD_SLOTS_PER_EPOCH if args.slots is None else args.slots
+    print(f'{args.validators} validators, {shard_count} shards, {slot_count} slots,'
+          f' built in {time.perf_counter() - start:.2f} s')
+
+    start = time.perf_counter()
+    results = simulate(spec, beacon_state, shard_states, slot_count, args.body_size, args.participation, args.seed,
+                       args.processes)
+    print_report(results, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
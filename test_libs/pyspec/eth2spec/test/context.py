@@ -1,5 +1,5 @@
 from eth2spec.phase0 import spec as spec_phase0
-# from eth2spec.phase1 import spec as spec_phase1
+from eth2spec.phase1 import spec as spec_phase1
 from eth2spec.utils import bls
 
 from .helpers.genesis import create_genesis_state
@@ -169,6 +169,19 @@ def with_all_phases_except(exclusion_phases):
     return decorator
 
 
+def with_phase1(fn):
+    """
+    A decorator for running a test with the phase 1 spec only, regardless of phase 1 being disabled in ``with_phases``,
+     for tests of the pyspec optimizations of phase 1 functions.
+    """
+    def wrapper(*args, **kw):
+        if kw.pop('phase', 'phase1') != 'phase1':
+            return
+        kw['spec'] = spec_phase1
+        return fn(*args, **kw)
+    return wrapper
+
+
 def with_phases(phases):
     """
     Decorator factory that returns a decorator that runs a test for the appropriate phases
@@ -0,0 +1,89 @@
+from random import Random
+
+import pytest
+from py_ecc import bls as py_ecc_bls
+
+from eth2spec.custody import chunk_bits
+from eth2spec.phase1 import spec as spec_phase1
+from eth2spec.test.helpers.custody import custody_chunkify
+from eth2spec.utils import bls
+
+
+def get_custody_key():
+    return py_ecc_bls.sign(b'\x42' * 32, 12345, b'\x01' * 8)
+
+
+def stream(data, block_size):
+    return (data[i:i + block_size] for i in range(0, len(data), block_size))
+
+
+def test_legendre_bit():
+    spec = spec_phase1
+    rng = Random(1)
+    q = spec.BLS12_381_Q
+    values = [0, 1, 2, q - 1, q, q + 1, 2 * q, 2**384 - 1] + [rng.getrandbits(384) for _ in range(200)]
+    for a in values:
+        assert chunk_bits.legendre_bit(a, q) == spec.legendre_bit(a, q)
+    for n in (1, 3, 5, 7, 9, 15, 21, 105):
+        for a in range(3 * n):
+            assert chunk_bits.legendre_bit(a, n) == spec.legendre_bit(a, n)
+
+
+@pytest.mark.skipif(chunk_bits.gmpy2 is None, reason='gmpy2 is not installed')
+def test_jacobi_gmpy2():
+    rng = Random(2)
+    for _ in range(200):
+        n = rng.getrandbits(381) | 1
+        a = rng.getrandbits(384)
+        assert chunk_bits.jacobi_python(a, n) == chunk_bits.gmpy2.jacobi(a, n)
+
+
+def test_iter_custody_chunks():
+    spec = spec_phase1
+    rng = Random(3)
+    data = bytes(rng.getrandbits(8) for _ in range(3 * spec.BYTES_PER_CUSTODY_CHUNK + 100))
+    expected = custody_chunkify(spec, data)
+    assert list(chunk_bits.iter_custody_chunks(stream(data, 77), spec.BYTES_PER_CUSTODY_CHUNK)) == expected
+    assert list(chunk_bits.iter_custody_chunks(data, spec.BYTES_PER_CUSTODY_CHUNK)) == expected
+    assert list(chunk_bits.iter_custody_chunks(b'', spec.BYTES_PER_CUSTODY_CHUNK)) == []
+
+
+def test_get_custody_chunk_bits():
+    spec = spec_phase1
+    rng = Random(4)
+    key = get_custody_key()
+    crosslinks_data = [
+        bytes(rng.getrandbits(8) for _ in range(length))
+        for length in (5 * spec.BYTES_PER_CUSTODY_CHUNK + 100, spec.BYTES_PER_CUSTODY_CHUNK, 1)
+    ]
+    bls_active = bls.bls_active
+    bls.bls_active = True
+    try:
+        expected = [[spec.get_custody_chunk_bit(key, chunk) for chunk in custody_chunkify(spec, data)]
+                    for data in crosslinks_data]
+        assert any(any(bits) for bits in expected)
+        assert chunk_bits.get_custody_period_chunk_bits(spec, key, crosslinks_data) == expected
+        # Streamed data, over a pool of processes
+        streams = [stream(data, 100) for data in crosslinks_data]
+        assert chunk_bits.get_custody_period_chunk_bits(spec, key, streams, processes=2) == expected
+        assert chunk_bits.get_custody_chunk_bits(spec, key, crosslinks_data[0]) == expected[0]
+    finally:
+        bls.bls_active = bls_active
+
+
+def test_install_uninstall():
+    spec = spec_phase1
+    original = spec.get_custody_chunk_bit
+    key = get_custody_key()
+    chunk = bytes(range(256)) * 2
+    expected = spec.get_custody_chunk_bit(key, chunk)
+    chunk_bits.install(spec)
+    try:
+        assert chunk_bits.is_installed(spec)
+        assert spec.get_custody_chunk_bit is not original
+        assert spec.get_custody_chunk_bit(key, chunk) == expected
+        assert spec.get_chunk_bits_root([True, False, True, True]) == chunk_bits.legendre_bit(13, spec.BLS12_381_Q)
+    finally:
+        chunk_bits.uninstall(spec)
+    assert not chunk_bits.is_installed(spec)
+    assert spec.get_custody_chunk_bit is original
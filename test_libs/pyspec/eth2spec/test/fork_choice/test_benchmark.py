@@ -0,0 +1,33 @@
+from io import StringIO
+
+from eth2spec.fork_choice.benchmark import ENGINES, build_workload, print_report, run_workload, use_engine
+from eth2spec.test.context import spec_state_test, with_phases
+
+
+@with_phases(['phase0'])
+@spec_state_test
+def test_benchmark(spec, state):
+    workload = build_workload(spec, state, 2, 3, 2, 4)
+    assert len(workload) == 2 * spec.SLOTS_PER_EPOCH
+    assert sum(len(blocks) for _, blocks, _ in workload) == len(workload) + 2 * (len(workload) - 1)
+
+    results = {}
+    for engine in ENGINES:
+        restore = use_engine(spec, engine)
+        try:
+            # The spec engine runs the functions of the specification
+            assert (spec.get_ancestor is spec._get_ancestor) == (engine == 'spec')
+            assert (spec.on_attestation is spec._on_attestation) == (engine == 'spec')
+            results[engine] = run_workload(spec, state, workload)
+        finally:
+            restore()
+    assert spec.get_ancestor is not spec._get_ancestor
+    assert results['spec'].heads == results['cached'].heads == results['proto_array'].heads
+    # The head follows the blocks
+    assert len(set(results['spec'].heads)) > 1
+    assert results['spec'].heads[-1] in set(spec.signing_root(block) for _, blocks, _ in workload for block in blocks)
+    assert len(results['spec'].times['on_attestation']) == 4 * (len(workload) - 1)
+
+    out = StringIO()
+    print_report(results, file=out)
+    assert len(out.getvalue().splitlines()) == 1 + len(ENGINES) * 3
@@ -0,0 +1,97 @@
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.fork_choice import add_attestation_to_store, add_block_to_store
+from eth2spec.test.helpers.attestations import get_valid_attestation
+from eth2spec.test.helpers.block import build_empty_block
+from eth2spec.test.helpers.state import next_epoch_with_attestations, state_transition_and_sign_block
+
+
+def get_checkpoint_state(spec, store, checkpoint):
+    """
+    Return the state of ``checkpoint``, like ``on_attestation`` of the spec computes it.
+    """
+    state = store.block_states[checkpoint.root].copy()
+    spec.process_slots(state, spec.compute_start_slot_at_epoch(checkpoint.epoch))
+    return state
+
+
+def assert_context_of_state(spec, context, state):
+    epoch = spec.get_current_epoch(state)
+    assert context.epoch == epoch
+    assert context.active_indices == spec.get_active_validator_indices(state, epoch)
+    assert context.seed == spec.get_seed(state, epoch, spec.DOMAIN_BEACON_ATTESTER)
+    assert context.effective_balances == [validator.effective_balance for validator in state.validators]
+    assert context.pubkeys == [validator.pubkey for validator in state.validators]
+    assert context.domain == spec.get_domain(state, spec.DOMAIN_BEACON_ATTESTER, epoch)
+
+
+@with_all_phases
+@spec_state_test
+def test_checkpoint_context(spec, state):
+    store = spec.get_genesis_store(state)
+    for _ in range(2):
+        _, blocks, state = next_epoch_with_attestations(spec, state, True, False)
+        for block in blocks:
+            add_block_to_store(spec, store, block)
+    attestations = [attestation for block in blocks for attestation in block.body.attestations]
+    checkpoint_states = dict(store.checkpoint_states)
+    for attestation in attestations:
+        spec.on_attestation(store, attestation)
+
+    # No checkpoint states are kept for the targets of the attestations
+    assert store.checkpoint_states == checkpoint_states
+    contexts = spec.get_checkpoint_contexts(store)
+    assert len(contexts) > 0
+    target_states = {target: get_checkpoint_state(spec, store, target) for target in contexts}
+    for target, context in contexts.items():
+        assert_context_of_state(spec, context, target_states[target])
+    for attestation in attestations:
+        context = contexts[attestation.data.target]
+        expected = spec.get_indexed_attestation(target_states[attestation.data.target], attestation)
+        assert spec.get_context_indexed_attestation(context, attestation) == expected
+        assert spec.get_store_attesting_indices(store, attestation) == expected.attesting_indices
+
+    # The attesting balances are those of the state of the justified checkpoint
+    for root in store.blocks:
+        expected = spec._get_latest_attesting_balance(store, root)
+        assert spec.get_latest_attesting_balance(store, root) == expected
+    assert any(spec.get_latest_attesting_balance(store, root) > 0 for root in store.blocks)
+
+
+@with_all_phases
+@spec_state_test
+def test_checkpoint_context_skipped_epoch_start(spec, state):
+    store = spec.get_genesis_store(state)
+    genesis_root = store.finalized_checkpoint.root
+    block = build_empty_block(spec, state, spec.SLOTS_PER_EPOCH + 1)
+    state_transition_and_sign_block(spec, state, block)
+    add_block_to_store(spec, store, block)
+
+    # The target is the genesis block, of which the state is advanced to the start of the epoch
+    attestation = get_valid_attestation(spec, state, slot=block.slot, signed=True)
+    target = attestation.data.target
+    assert target == spec.Checkpoint(epoch=1, root=genesis_root)
+    add_attestation_to_store(spec, store, attestation)
+    assert target not in store.checkpoint_states
+    context = spec.get_checkpoint_contexts(store)[target]
+    assert_context_of_state(spec, context, get_checkpoint_state(spec, store, target))
+    assert spec.get_head(store) == spec.signing_root(block)
+
+
+@with_all_phases
+@spec_state_test
+def test_checkpoint_context_other_epoch(spec, state):
+    store = spec.get_genesis_store(state)
+    genesis_root = store.finalized_checkpoint.root
+    block = build_empty_block(spec, state, 2 * spec.SLOTS_PER_EPOCH + 1)
+    state_transition_and_sign_block(spec, state, block)
+    add_block_to_store(spec, store, block)
+
+    # Attestations from outside of the epoch of their target are validated against the full checkpoint state
+    attestation = get_valid_attestation(spec, state, slot=block.slot)
+    attestation.data.target = spec.Checkpoint(epoch=1, root=genesis_root)
+    spec.on_tick(store, store.genesis_time + (block.slot + 1) * spec.SECONDS_PER_SLOT)
+    spec.on_attestation(store, attestation)
+    assert attestation.data.target in store.checkpoint_states
+    indices = spec.get_store_attesting_indices(store, attestation)
+    assert len(indices) > 0
+    assert all(store.latest_messages[i].root == spec.signing_root(block) for i in indices)
@@ -0,0 +1,45 @@
+from random import Random
+
+from eth2spec.test.context import spec_state_test, with_all_phases
+
+
+def add_blocks(spec, store, parent_root, slots, rng):
+    """
+    Add blocks on top of ``parent_root``, at increasing ``slots``, directly to the store. Return their roots.
+    """
+    roots = []
+    for slot in slots:
+        state_root = rng.randrange(2**32).to_bytes(32, 'little')
+        block = spec.BeaconBlock(slot=slot, parent_root=parent_root, state_root=state_root)
+        parent_root = spec.signing_root(block)
+        store.blocks[parent_root] = block
+        roots.append(parent_root)
+    return roots
+
+
+@with_all_phases
+@spec_state_test
+def test_get_ancestor_forks(spec, state):
+    rng = Random(3)
+    store = spec.get_genesis_store(state)
+    genesis_root = store.finalized_checkpoint.root
+    main = add_blocks(spec, store, genesis_root, [s for s in range(1, 80) if rng.random() < 0.7], rng)
+    fork_root = main[10]
+    fork = add_blocks(spec, store, fork_root, range(store.blocks[fork_root].slot + 1, 100, 3), rng)
+
+    for root in [genesis_root] + main + fork:
+        for slot in range(0, store.blocks[root].slot + 2):
+            assert spec.get_ancestor(store, root, slot) == spec._get_ancestor(store, root, slot)
+
+
+@with_all_phases
+@spec_state_test
+def test_get_ancestor_long_chain(spec, state):
+    rng = Random(4)
+    store = spec.get_genesis_store(state)
+    genesis_root = store.finalized_checkpoint.root
+    # Longer than the recursion limit of the spec function
+    roots = add_blocks(spec, store, genesis_root, range(1, 5000), rng)
+    assert spec.get_ancestor(store, roots[-1], 0) == genesis_root
+    assert spec.get_ancestor(store, roots[-1], 1234) == roots[1233]
+    assert spec.get_ancestor(store, roots[2000], 2002) == spec.Bytes32()
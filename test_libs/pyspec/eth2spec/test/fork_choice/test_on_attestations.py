@@ -0,0 +1,137 @@
+from eth2spec.fork_choice import proto_array
+from eth2spec.test.context import always_bls, spec_state_test, with_all_phases
+from eth2spec.test.helpers.fork_choice import add_block_to_store
+from eth2spec.test.helpers.attestations import get_valid_attestation, sign_attestation
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.state import next_epoch_with_attestations, state_transition_and_sign_block
+from eth2spec.utils.ssz.ssz_impl import hash_tree_root
+
+
+def build_store(spec, state):
+    """
+    Return a store with a chain of two epochs, its attestations of the last epoch and of the head,
+     and an attestation for a fork.
+    """
+    store = spec.get_genesis_store(state)
+    fork_state = state.copy()
+    for _ in range(2):
+        _, blocks, state = next_epoch_with_attestations(spec, state, True, False)
+        for block in blocks:
+            add_block_to_store(spec, store, block)
+    attestations = [attestation for block in blocks for attestation in block.body.attestations]
+
+    block = build_empty_block_for_next_slot(spec, state)
+    state_transition_and_sign_block(spec, state, block)
+    add_block_to_store(spec, store, block)
+    fork_block = build_empty_block_for_next_slot(spec, fork_state)
+    fork_block.slot = block.slot
+    state_transition_and_sign_block(spec, fork_state, fork_block)
+    add_block_to_store(spec, store, fork_block)
+    spec.on_tick(store, store.time + 2 * spec.SECONDS_PER_SLOT)
+    attestations.append(get_valid_attestation(spec, state, slot=block.slot, signed=True))
+    attestations.append(get_valid_attestation(spec, fork_state, slot=fork_block.slot, signed=True))
+    return store, attestations
+
+
+def copy_store(spec, store):
+    return spec.Store(
+        time=store.time,
+        genesis_time=store.genesis_time,
+        justified_checkpoint=store.justified_checkpoint,
+        finalized_checkpoint=store.finalized_checkpoint,
+        best_justified_checkpoint=store.best_justified_checkpoint,
+        blocks=dict(store.blocks),
+        block_states=dict(store.block_states),
+        checkpoint_states=dict(store.checkpoint_states),
+        latest_messages=dict(store.latest_messages),
+    )
+
+
+def assert_stores_equal(spec, store, expected_store):
+    assert store.latest_messages == expected_store.latest_messages
+    assert list(spec.get_checkpoint_contexts(store)) == list(spec.get_checkpoint_contexts(expected_store))
+    assert list(store.checkpoint_states.keys()) == list(expected_store.checkpoint_states.keys())
+    for checkpoint, state in store.checkpoint_states.items():
+        assert hash_tree_root(state) == hash_tree_root(expected_store.checkpoint_states[checkpoint])
+
+
+@with_all_phases
+@spec_state_test
+def test_on_attestations(spec, state):
+    store, attestations = build_store(spec, state)
+    assert len(set(attestation.data.target for attestation in attestations)) > 1
+    expected_store = copy_store(spec, store)
+    for attestation in attestations:
+        spec.on_attestation(expected_store, attestation)
+
+    spec.on_attestations(store, attestations)
+    assert_stores_equal(spec, store, expected_store)
+    assert spec.get_head(store) == spec.get_head(expected_store)
+
+
+@with_all_phases
+@spec_state_test
+def test_on_attestations_invalid(spec, state):
+    store, attestations = build_store(spec, state)
+    # An attestation for a block that is not in the store, after valid attestations
+    invalid_attestation = attestations[-1].copy()
+    invalid_attestation.data.target.root = b'\x42' * 32
+    attestations.insert(len(attestations) // 2, invalid_attestation)
+    expected_store = copy_store(spec, store)
+    for attestation in attestations[:len(attestations) // 2]:
+        spec.on_attestation(expected_store, attestation)
+
+    # The attestations before the invalid one are applied, like with on_attestation
+    try:
+        spec.on_attestations(store, attestations)
+    except AssertionError:
+        pass
+    else:
+        assert False
+    assert_stores_equal(spec, store, expected_store)
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_on_attestations_signatures(spec, state):
+    # Attestations of the genesis block, in two halves of its committee
+    store = spec.get_genesis_store(state)
+    spec.on_tick(store, store.time + spec.SECONDS_PER_SLOT)
+    attestations = []
+    for i in range(2):
+        attestation = get_valid_attestation(spec, state, slot=state.slot)
+        for j in range(len(attestation.aggregation_bits)):
+            attestation.aggregation_bits[j] = j % 2 == i
+        sign_attestation(spec, state, attestation)
+        attestations.append(attestation)
+
+    # Signatures that cancel out in their sum are rejected
+    attestations[0].signature, attestations[1].signature = attestations[1].signature, attestations[0].signature
+    invalid_store = copy_store(spec, store)
+    try:
+        spec.on_attestations(invalid_store, attestations)
+    except AssertionError:
+        pass
+    else:
+        assert False
+    assert len(invalid_store.latest_messages) == 0
+
+    attestations[0].signature, attestations[1].signature = attestations[1].signature, attestations[0].signature
+    spec.on_attestations(store, attestations)
+    assert len(store.latest_messages) == len(spec.get_beacon_committee(state, state.slot, 0))
+
+
+@with_all_phases
+@spec_state_test
+def test_on_attestations_with_proto_array(spec, state):
+    spec_get_head = spec.get_head
+    proto_array.install(spec)
+    try:
+        store, attestations = build_store(spec, state)
+        spec.get_head(store)
+        spec.on_attestations(store, attestations)
+        assert proto_array.get_proto_array(spec, store, create=False) is not None
+        assert spec.get_head(store) == spec_get_head(store)
+    finally:
+        proto_array.uninstall(spec)
@@ -0,0 +1,118 @@
+from random import Random
+
+import pytest
+
+from eth2spec.fork_choice import proto_array
+from eth2spec.phase0 import spec as spec_phase0
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.fork_choice import test_get_head, test_on_attestation, test_on_block
+from eth2spec.test.helpers.attestations import get_valid_attestation, sign_attestation
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.cases import collect_test_cases
+from eth2spec.test.helpers.fork_choice import add_attestation_to_store, add_block_to_store, add_fork
+from eth2spec.test.helpers.state import next_epoch_with_attestations, state_transition_and_sign_block
+
+
+cases = collect_test_cases(test_get_head, test_on_attestation, test_on_block)
+
+
+@pytest.mark.parametrize('module_name,name,fn', cases, ids=[f'{m}.{n}' for m, n, _ in cases])
+def test_fork_choice_tests_with_proto_array(module_name, name, fn):
+    proto_array.install(spec_phase0)
+    try:
+        fn(generator_mode=False, phase='phase0', bls_active=False)
+    finally:
+        proto_array.uninstall(spec_phase0)
+
+
+def add_random_fork(spec, store, rng, length):
+    """
+    Add ``length`` empty blocks on top of a random recent block of the store, with random graffiti.
+    """
+    current_slot = spec.get_current_slot(store)
+    roots = [root for root, block in store.blocks.items() if block.slot + spec.SLOTS_PER_EPOCH > current_slot]
+    add_fork(spec, store, rng.choice(sorted(roots)), length, bytes([rng.randrange(256)]) * 32)
+
+
+def add_random_attestation(spec, store, rng):
+    """
+    Add an attestation of a random part of the committee of a random recent block, for that block.
+    """
+    current_epoch = spec.compute_epoch_at_slot(spec.get_current_slot(store))
+    roots = [root for root, block in store.blocks.items()
+             if spec.compute_epoch_at_slot(block.slot) + 1 >= current_epoch and block.slot > 0]
+    if len(roots) == 0:
+        return
+    state = store.block_states[rng.choice(sorted(roots))]
+    attestation = get_valid_attestation(spec, state, slot=state.slot)
+    for i in range(len(attestation.aggregation_bits)):
+        attestation.aggregation_bits[i] = rng.random() < 0.5
+    attestation.aggregation_bits[0] = True
+    sign_attestation(spec, state, attestation)
+    add_attestation_to_store(spec, store, attestation)
+
+
+@with_all_phases
+@spec_state_test
+def test_random_forks_and_votes(spec, state):
+    rng = Random(1234)
+    spec_get_head = spec.get_head
+    proto_array.install(spec)
+    try:
+        store = spec.get_genesis_store(state)
+        assert spec.get_head(store) == spec_get_head(store)
+        # A chain justifying checkpoints, with forks and attestations for forks
+        for _ in range(3):
+            _, blocks, state = next_epoch_with_attestations(spec, state, True, False)
+            for block in blocks:
+                add_block_to_store(spec, store, block)
+                if rng.random() < 0.3:
+                    add_random_fork(spec, store, rng, rng.randrange(1, 3))
+                for _ in range(rng.randrange(3)):
+                    add_random_attestation(spec, store, rng)
+                assert spec.get_head(store) == spec_get_head(store)
+        assert store.justified_checkpoint.epoch > spec.GENESIS_EPOCH
+    finally:
+        proto_array.uninstall(spec)
+
+
+@with_all_phases
+@spec_state_test
+def test_build_from_store(spec, state):
+    store = spec.get_genesis_store(state)
+    block = build_empty_block_for_next_slot(spec, state)
+    state_transition_and_sign_block(spec, state, block)
+    add_block_to_store(spec, store, block)
+    add_attestation_to_store(spec, store, get_valid_attestation(spec, state, slot=block.slot, signed=True))
+
+    # The proto-array of a store is built from its contents when first needed
+    assert proto_array.get_proto_array(spec, store, create=False) is None
+    assert proto_array.get_head(spec, store) == spec.get_head(store) == spec.signing_root(block)
+    array = proto_array.get_proto_array(spec, store, create=False)
+    assert array.nodes[array.indices[spec.signing_root(block)]].weight > 0
+
+
+def test_proto_array():
+    array = proto_array.ProtoArray()
+    array.add_block(b'\x00' * 32, b'', 0)
+    array.add_block(b'\x02' * 32, b'\x00' * 32, 1)
+    array.add_block(b'\x01' * 32, b'\x00' * 32, 1)
+    array.add_block(b'\x03' * 32, b'\x01' * 32, 2)
+    array.set_balances({0: 10, 1: 10, 2: 30})
+    # Ties are broken by root
+    assert array.find_head(b'\x00' * 32, 0) == b'\x02' * 32
+
+    array.process_vote(1, b'\x03' * 32)
+    assert array.find_head(b'\x00' * 32, 0) == b'\x03' * 32
+    array.process_vote(0, b'\x02' * 32)
+    array.process_vote(2, b'\x04' * 32)
+    assert array.find_head(b'\x00' * 32, 0) == b'\x02' * 32
+    # Votes for blocks are counted once the blocks are added
+    array.add_block(b'\x04' * 32, b'\x02' * 32, 2)
+    assert array.find_head(b'\x00' * 32, 0) == b'\x04' * 32
+    assert [node.weight for node in array.nodes] == [50, 40, 10, 10, 30]
+
+    array.set_balances({0: 10, 1: 50})
+    assert array.find_head(b'\x00' * 32, 0) == b'\x03' * 32
+    # Blocks not after the justified slot are ignored
+    assert array.find_head(b'\x00' * 32, 1) == b'\x00' * 32
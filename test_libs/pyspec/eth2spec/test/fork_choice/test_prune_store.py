@@ -0,0 +1,76 @@
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.attestations import get_valid_attestation
+from eth2spec.test.helpers.fork_choice import add_attestation_to_store, add_block_to_store, add_fork
+from eth2spec.test.helpers.state import next_epoch_with_attestations
+
+
+def add_checkpoint_state(spec, store, checkpoint):
+    """
+    Add the state of ``checkpoint`` to the store, like ``on_attestation`` does for the targets of attestations.
+    """
+    if checkpoint not in store.checkpoint_states:
+        state = store.block_states[checkpoint.root].copy()
+        spec.process_slots(state, spec.compute_start_slot_at_epoch(checkpoint.epoch))
+        store.checkpoint_states[checkpoint] = state
+
+
+def build_finalizing_store(spec, state):
+    """
+    Return a store with a chain finalizing a checkpoint after genesis, and a conflicting fork with a vote for it.
+    """
+    store = spec.get_genesis_store(state)
+    genesis_root = store.finalized_checkpoint.root
+    fork_block, fork_state = add_fork(spec, store, genesis_root, 1)
+    add_attestation_to_store(spec, store, get_valid_attestation(spec, fork_state, slot=fork_block.slot, signed=True))
+
+    while store.finalized_checkpoint.epoch == spec.GENESIS_EPOCH:
+        _, blocks, state = next_epoch_with_attestations(spec, state, True, state.slot >= spec.SLOTS_PER_EPOCH)
+        for block in blocks:
+            add_block_to_store(spec, store, block)
+    return store, spec.signing_root(fork_block)
+
+
+@with_all_phases
+@spec_state_test
+def test_prune_store(spec, state):
+    store, fork_root = build_finalizing_store(spec, state)
+    add_checkpoint_state(spec, store, store.justified_checkpoint)
+    head = spec.get_head(store)
+    block_count = len(store.blocks)
+    voters = [i for i, message in store.latest_messages.items() if message.root == fork_root]
+    assert len(voters) > 0
+
+    report = spec.prune_store(store)
+
+    finalized_root = store.finalized_checkpoint.root
+    finalized_slot = store.blocks[finalized_root].slot
+    assert fork_root not in store.blocks
+    assert report.blocks == block_count - len(store.blocks) > 0
+    assert report.block_states == report.blocks
+    assert report.checkpoint_states > 0
+    assert report.checkpoint_contexts > 0
+    assert report.latest_messages == len(voters)
+    assert all(spec.get_ancestor(store, root, finalized_slot) == finalized_root for root in store.blocks)
+    assert set(store.block_states.keys()) == set(store.blocks.keys())
+    for checkpoints in (store.checkpoint_states, spec.get_checkpoint_contexts(store)):
+        assert all(checkpoint.epoch >= store.finalized_checkpoint.epoch for checkpoint in checkpoints)
+    assert all(store.latest_messages[i].root == finalized_root for i in voters)
+    assert spec.get_head(store) == head
+
+    # The store keeps working after pruning
+    block, _ = add_fork(spec, store, head, 1)
+    assert spec.get_head(store) == spec.signing_root(block)
+    assert spec.prune_store(store) == spec.PruneReport()
+
+
+@with_all_phases
+@spec_state_test
+def test_prune_on_finalization(spec, state):
+    spec.prune_on_finalization = True
+    try:
+        store, fork_root = build_finalizing_store(spec, state)
+    finally:
+        spec.prune_on_finalization = False
+    assert store.prune_report.blocks > 0
+    assert fork_root not in store.blocks
+    assert spec.prune_store(store).blocks == 0
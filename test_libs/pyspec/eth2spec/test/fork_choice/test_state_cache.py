@@ -0,0 +1,56 @@
+from eth2spec.fork_choice.state_cache import StateCache, use_state_cache
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.fork_choice import add_block_to_store, add_fork
+from eth2spec.test.helpers.state import next_epoch_with_attestations
+from eth2spec.utils.ssz.ssz_impl import serialized_size
+
+
+@with_all_phases
+@spec_state_test
+def test_state_cache(spec, state):
+    store = spec.get_genesis_store(state)
+    state_size = serialized_size(state)
+    cache = use_state_cache(spec, store, 3 * state_size)
+    assert isinstance(store.block_states, StateCache)
+
+    for _ in range(2):
+        _, blocks, state = next_epoch_with_attestations(spec, state, True, False)
+        for block in blocks:
+            add_block_to_store(spec, store, block)
+        add_fork(spec, store, spec.signing_root(blocks[2]), 3)
+    assert len(cache) == len(store.blocks)
+    assert cache.stats.evictions > 0
+    # Besides the budget, the hot states: of the checkpoints, the latest block and the genesis block
+    assert cache.size <= 3 * state_size + 4 * max(cache.sizes.values())
+
+    # Evicted states are regenerated from the nearest cached ancestor state
+    for root, block in store.blocks.items():
+        assert store.block_states[root].hash_tree_root() == block.state_root
+    assert cache.stats.misses > 0
+    assert cache.stats.replayed_blocks >= cache.stats.misses
+    assert len(cache.stats.regeneration_times) == cache.stats.misses
+    assert 0 < cache.stats.hit_rate < 1
+
+    hits = cache.stats.hits
+    assert store.block_states[store.finalized_checkpoint.root] is store.block_states[store.finalized_checkpoint.root]
+    assert cache.stats.hits == hits + 2
+
+
+@with_all_phases
+@spec_state_test
+def test_state_cache_mapping(spec, state):
+    store = spec.get_genesis_store(state)
+    genesis_root = store.finalized_checkpoint.root
+    cache = use_state_cache(spec, store, 0)
+    add_fork(spec, store, genesis_root, 3)
+
+    roots = set(store.blocks.keys())
+    assert set(cache) == roots
+    # Only the hot states are cached with no budget
+    assert set(cache.states) == {genesis_root, cache.latest_root}
+    child_root = next(root for root, block in store.blocks.items() if block.parent_root == genesis_root)
+    assert child_root in cache and child_root not in cache.states
+    assert cache[child_root].slot == store.blocks[child_root].slot
+    del cache[child_root]
+    assert child_root not in cache
+    assert len(cache) == len(roots) - 1
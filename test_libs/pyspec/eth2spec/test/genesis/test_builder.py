@@ -0,0 +1,59 @@
+from eth2spec.genesis.builder import build_genesis_state
+from eth2spec.test.context import always_bls, spec_test, with_phases
+from eth2spec.test.helpers.deposits import (
+    prepare_genesis_deposits,
+)
+from eth2spec.utils.ssz.ssz_impl import hash_tree_root
+
+
+def assert_builds_spec_genesis(spec, deposits, processes=1):
+    eth1_block_hash = b'\x12' * 32
+    eth1_timestamp = spec.MIN_GENESIS_TIME
+    state = build_genesis_state(spec, eth1_block_hash, eth1_timestamp, deposits, processes=processes)
+    expected = spec.initialize_beacon_state_from_eth1(eth1_block_hash, eth1_timestamp, deposits)
+    assert hash_tree_root(state) == hash_tree_root(expected)
+    return state
+
+
+@with_phases(['phase0'])
+@spec_test
+def test_build_genesis_state(spec):
+    deposits, _, _ = prepare_genesis_deposits(spec, spec.MIN_GENESIS_ACTIVE_VALIDATOR_COUNT, spec.MAX_EFFECTIVE_BALANCE)
+
+    state = assert_builds_spec_genesis(spec, deposits)
+    assert spec.is_valid_genesis_state(state)
+
+
+@with_phases(['phase0'])
+@spec_test
+def test_build_genesis_state_no_deposits(spec):
+    assert_builds_spec_genesis(spec, [])
+
+
+@with_phases(['phase0'])
+@spec_test
+def test_build_genesis_state_top_ups(spec):
+    deposit_count = 8
+    deposits, _, deposit_data_list = prepare_genesis_deposits(spec, deposit_count, spec.EFFECTIVE_BALANCE_INCREMENT)
+    # Top up the same validators to a full balance
+    top_ups, _, _ = prepare_genesis_deposits(spec, deposit_count, spec.MAX_EFFECTIVE_BALANCE,
+                                             deposit_data_list=deposit_data_list)
+
+    state = assert_builds_spec_genesis(spec, deposits + top_ups)
+    assert len(state.validators) == deposit_count
+    assert spec.get_total_active_balance(state) == deposit_count * spec.MAX_EFFECTIVE_BALANCE
+
+
+@with_phases(['phase0'])
+@spec_test
+@always_bls
+def test_build_genesis_state_invalid_signatures(spec):
+    deposit_count = 3
+    # The first deposits are not signed, the validators are only added by the signed deposits that follow
+    unsigned, _, deposit_data_list = prepare_genesis_deposits(spec, deposit_count, spec.MAX_EFFECTIVE_BALANCE)
+    signed, _, deposit_data_list = prepare_genesis_deposits(spec, deposit_count - 1, spec.MAX_EFFECTIVE_BALANCE,
+                                                            signed=True, deposit_data_list=deposit_data_list)
+    deposits = unsigned + signed
+
+    state = assert_builds_spec_genesis(spec, deposits, processes=2)
+    assert len(state.validators) == deposit_count - 1
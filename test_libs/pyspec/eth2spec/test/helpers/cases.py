@@ -0,0 +1,10 @@
+def collect_test_cases(*modules):
+    """
+    Return the ``(module name, test name, test function)`` of the tests of ``modules``, to run them in another setup.
+    """
+    return [
+        (module.__name__.split('.')[-1], name, getattr(module, name))
+        for module in modules
+        for name in dir(module)
+        if name.startswith('test_')
+    ]
@@ -0,0 +1,38 @@
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+
+
+def add_block_to_store(spec, store, block):
+    pre_state = store.block_states[block.parent_root]
+    block_time = pre_state.genesis_time + block.slot * spec.SECONDS_PER_SLOT
+
+    if store.time < block_time:
+        spec.on_tick(store, block_time)
+
+    spec.on_block(store, block)
+
+
+def add_attestation_to_store(spec, store, attestation):
+    parent_block = store.blocks[attestation.data.beacon_block_root]
+    pre_state = store.block_states[spec.signing_root(parent_block)]
+    block_time = pre_state.genesis_time + parent_block.slot * spec.SECONDS_PER_SLOT
+    next_epoch_time = block_time + spec.SLOTS_PER_EPOCH * spec.SECONDS_PER_SLOT
+
+    if store.time < next_epoch_time:
+        spec.on_tick(store, next_epoch_time)
+
+    spec.on_attestation(store, attestation)
+
+
+def add_fork(spec, store, parent_root, length, graffiti=b'\x42' * 32):
+    """
+    Add ``length`` empty blocks with ``graffiti`` on top of the block ``parent_root`` of the store,
+     to fork from the blocks without graffiti. Return the last block and its post-state.
+    """
+    state = store.block_states[parent_root].copy()
+    for _ in range(length):
+        block = build_empty_block_for_next_slot(spec, state)
+        block.body.graffiti = graffiti
+        state_transition_and_sign_block(spec, state, block)
+        add_block_to_store(spec, store, block)
+    return block, state
@@ -0,0 +1,100 @@
+from copy import deepcopy
+
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.deposits import prepare_state_and_deposit
+from eth2spec.test.helpers.keys import pubkeys
+
+
+def deposit(spec, state, validator_index):
+    deposit = prepare_state_and_deposit(spec, state, validator_index, spec.MAX_EFFECTIVE_BALANCE)
+    expected = deepcopy(state)
+    spec._process_deposit(expected, deposit)
+    spec.process_deposit(state, deposit)
+    assert state.hash_tree_root() == expected.hash_tree_root()
+
+
+@with_all_phases
+@spec_state_test
+def test_new_and_top_up_deposits(spec, state):
+    validator_count = len(state.validators)
+    for validator_index in (0, validator_count, validator_count + 1, validator_count, 1):
+        deposit(spec, state, validator_index)
+
+    assert len(state.validators) == validator_count + 2
+    for index in range(len(state.validators)):
+        assert spec.get_validator_index_by_pubkey(state, pubkeys[index]) == index
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[len(state.validators)]) is None
+
+
+@with_all_phases
+@spec_state_test
+def test_index_shared_between_copies(spec, state):
+    validator_count = len(state.validators)
+    spec.get_pubkey_index(state.validators)
+    copied_state = state.copy()
+    assert spec.get_pubkey_index(copied_state.validators) is spec.get_pubkey_index(state.validators)
+
+    deposit(spec, copied_state, validator_count)
+
+    assert spec.get_validator_index_by_pubkey(copied_state, pubkeys[validator_count]) == validator_count
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count]) is None
+
+
+@with_all_phases
+@spec_state_test
+def test_diverging_copies(spec, state):
+    validator_count = len(state.validators)
+    spec.get_pubkey_index(state.validators)
+    state_a = state.copy()
+    state_b = state.copy()
+
+    # Different validators at the same index
+    deposit(spec, state_a, validator_count)
+    deposit(spec, state_b, validator_count + 1)
+    deposit(spec, state_b, validator_count)
+
+    assert spec.get_validator_index_by_pubkey(state_a, pubkeys[validator_count]) == validator_count
+    assert spec.get_validator_index_by_pubkey(state_a, pubkeys[validator_count + 1]) is None
+    assert spec.get_validator_index_by_pubkey(state_b, pubkeys[validator_count]) == validator_count + 1
+    assert spec.get_validator_index_by_pubkey(state_b, pubkeys[validator_count + 1]) == validator_count
+
+
+@with_all_phases
+@spec_state_test
+def test_shrunk_registry(spec, state):
+    validator_count = len(state.validators)
+    spec.get_pubkey_index(state.validators)
+    deposit(spec, state, validator_count)
+    deposit(spec, state, validator_count + 1)
+
+    # Indexed up to validator_count + 2, then shrunk and grown back to validator_count + 1
+    del state.validators[validator_count:]
+    del state.balances[validator_count:]
+    state.validators.append(state.validators[0].copy())
+    state.validators[validator_count].pubkey = pubkeys[validator_count + 2]
+    state.balances.append(0)
+
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count + 2]) == validator_count
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count]) is None
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count + 1]) is None
+    # A top-up, not a duplicate validator
+    deposit(spec, state, validator_count)
+    deposit(spec, state, validator_count)
+    assert len(state.validators) == validator_count + 2
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count]) == validator_count + 1
+
+
+@with_all_phases
+@spec_state_test
+def test_validator_replaced_in_place(spec, state):
+    validator_count = len(state.validators)
+    spec.get_pubkey_index(state.validators)
+    replacement = state.validators[0].copy()
+    replacement.pubkey = pubkeys[validator_count]
+    state.validators[0] = replacement
+
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count]) == 0
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[0]) is None
+    # A top-up of the replacement, not a duplicate validator
+    deposit(spec, state, validator_count)
+    assert len(state.validators) == validator_count
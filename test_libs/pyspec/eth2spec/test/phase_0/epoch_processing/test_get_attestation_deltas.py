@@ -0,0 +1,95 @@
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.attestations import (
+    add_attestations_to_state,
+    get_valid_attestation,
+)
+from eth2spec.test.helpers.state import (
+    next_epoch,
+    next_slot,
+)
+
+
+def fill_previous_epoch_attestations(spec, state, participation_fn=None):
+    """
+    Fill the previous epoch with attestations for every slot,
+    optionally limiting the aggregation bits of each attestation to those where ``participation_fn`` returns True.
+    """
+    attestations = []
+    for slot in range(spec.SLOTS_PER_EPOCH + spec.MIN_ATTESTATION_INCLUSION_DELAY):
+        if slot < spec.SLOTS_PER_EPOCH:
+            attestation = get_valid_attestation(spec, state)
+            if participation_fn is not None:
+                for i in range(len(attestation.aggregation_bits)):
+                    attestation.aggregation_bits[i] = participation_fn(slot, i)
+            attestations.append(attestation)
+        if slot - spec.MIN_ATTESTATION_INCLUSION_DELAY >= 0:
+            include_att = attestations[slot - spec.MIN_ATTESTATION_INCLUSION_DELAY]
+            add_attestations_to_state(spec, state, [include_att], state.slot)
+        next_slot(spec, state)
+    return attestations
+
+
+def assert_deltas_match_spec(spec, state):
+    assert spec.get_attestation_deltas(state) == spec._get_attestation_deltas(state)
+
+
+@with_all_phases
+@spec_state_test
+def test_no_attestations(spec, state):
+    next_epoch(spec, state)
+    next_epoch(spec, state)
+
+    assert_deltas_match_spec(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_full_attestations(spec, state):
+    fill_previous_epoch_attestations(spec, state)
+
+    assert_deltas_match_spec(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_partial_attestations(spec, state):
+    fill_previous_epoch_attestations(spec, state, lambda slot, i: (slot + i) % 3 != 0)
+
+    assert_deltas_match_spec(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_some_slashed(spec, state):
+    attestations = fill_previous_epoch_attestations(spec, state)
+    attesting_indices = sorted(spec.get_unslashed_attesting_indices(state, attestations))
+    for index in attesting_indices[:spec.MIN_PER_EPOCH_CHURN_LIMIT]:
+        spec.slash_validator(state, index)
+
+    assert_deltas_match_spec(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_duplicate_inclusions(spec, state):
+    attestation = get_valid_attestation(spec, state)
+    inclusion_slot = state.slot + spec.MIN_ATTESTATION_INCLUSION_DELAY
+    add_attestations_to_state(spec, state, [attestation, attestation], inclusion_slot)
+    add_attestations_to_state(spec, state, [attestation], inclusion_slot + 1)
+    # Equal inclusion delays by different proposers: the first attestation must win the proposer reward
+    first, second, _ = state.current_epoch_attestations
+    second.proposer_index = (first.proposer_index + 1) % len(state.validators)
+    next_epoch(spec, state)
+
+    assert_deltas_match_spec(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_inactivity_leak(spec, state):
+    fill_previous_epoch_attestations(spec, state, lambda slot, i: i % 2 == 0)
+    # Pretend finality has been lost for a long time, without running the full transition
+    state.slot += spec.SLOTS_PER_EPOCH * (spec.MIN_EPOCHS_TO_INACTIVITY_PENALTY + 2)
+    assert spec.get_previous_epoch(state) - state.finalized_checkpoint.epoch > spec.MIN_EPOCHS_TO_INACTIVITY_PENALTY
+
+    assert_deltas_match_spec(spec, state)
@@ -0,0 +1,166 @@
+from copy import deepcopy
+
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.state import next_epoch
+from eth2spec.test.phase_0.epoch_processing.run_epoch_process_base import run_epoch_processing_to
+from eth2spec.test.phase_0.epoch_processing.test_process_registry_updates import mock_deposit
+from eth2spec.test.phase_0.epoch_processing.test_process_slashings import slash_validators
+
+# Spec functions replaced to maintain indexes in a processing context, kept as ``_name``
+CONTEXT_FUNCTIONS = [
+    'get_validator_churn_limit',
+    'initiate_validator_exit',
+    'process_registry_updates',
+    'slash_validator',
+    'process_slashings',
+    'process_final_updates',
+]
+
+
+def run_without_processing_context(spec, fn, *args):
+    patched = {name: getattr(spec, name) for name in CONTEXT_FUNCTIONS}
+    for name in CONTEXT_FUNCTIONS:
+        setattr(spec, name, getattr(spec, '_' + name))
+    try:
+        fn(*args)
+    finally:
+        for name, patched_fn in patched.items():
+            setattr(spec, name, patched_fn)
+
+
+def assert_matches_spec(spec, state, fn, *args):
+    expected = deepcopy(state)
+    run_without_processing_context(spec, fn, expected, *args)
+    fn(state, *args)
+    assert spec.get_processing_context(state) is None
+    assert state.hash_tree_root() == expected.hash_tree_root()
+
+
+def mock_ejections(spec, state, indices):
+    for index in indices:
+        state.validators[index].effective_balance = spec.EJECTION_BALANCE
+
+
+@with_all_phases
+@spec_state_test
+def test_mass_ejection(spec, state):
+    next_epoch(spec, state)
+    ejections = spec.get_validator_churn_limit(state) * 3 + 1
+    mock_ejections(spec, state, range(ejections))
+    run_epoch_processing_to(spec, state, 'process_registry_updates')
+
+    assert_matches_spec(spec, state, spec.process_registry_updates)
+    exit_epochs = set(state.validators[index].exit_epoch for index in range(ejections))
+    assert len(exit_epochs) == 4
+
+
+@with_all_phases
+@spec_state_test
+def test_ejection_after_prior_exits(spec, state):
+    next_epoch(spec, state)
+    churn_limit = spec.get_validator_churn_limit(state)
+    exit_epoch = spec.compute_activation_exit_epoch(spec.get_current_epoch(state)) + 2
+    for index in range(churn_limit - 1):
+        state.validators[len(state.validators) - 1 - index].exit_epoch = exit_epoch
+    mock_ejections(spec, state, range(2))
+    run_epoch_processing_to(spec, state, 'process_registry_updates')
+
+    assert_matches_spec(spec, state, spec.process_registry_updates)
+    assert state.validators[0].exit_epoch == exit_epoch
+    assert state.validators[1].exit_epoch == exit_epoch + 1
+
+
+@with_all_phases
+@spec_state_test
+def test_activation_queue(spec, state):
+    mock_activations = spec.get_validator_churn_limit(state) * 2 + 1
+    epoch = spec.get_current_epoch(state)
+    for index in range(mock_activations):
+        mock_deposit(spec, state, index)
+        state.validators[index].activation_eligibility_epoch = epoch + 1 - index % 2
+    # Newly eligible validators join at the end of the queue
+    state.validators[mock_activations].effective_balance = spec.MAX_EFFECTIVE_BALANCE
+    mock_deposit(spec, state, mock_activations)
+    run_epoch_processing_to(spec, state, 'process_registry_updates')
+
+    assert_matches_spec(spec, state, spec.process_registry_updates)
+
+
+@with_all_phases
+@spec_state_test
+def test_queues_across_epochs(spec, state):
+    churn_limit = spec.get_validator_churn_limit(state)
+    for index in range(churn_limit * 2):
+        mock_deposit(spec, state, index)
+    mock_ejections(spec, state, range(churn_limit * 2, churn_limit * 6))
+
+    # Multiple epoch transitions within a single processing context
+    slot = state.slot + spec.SLOTS_PER_EPOCH * 4
+    assert_matches_spec(spec, state, spec.process_slots, slot)
+
+
+@with_all_phases
+@spec_state_test
+def test_slashed_validator_index(spec, state):
+    penalty_epoch = spec.get_current_epoch(state) + spec.EPOCHS_PER_SLASHINGS_VECTOR // 2
+    slash_validators(spec, state, range(4), [penalty_epoch, penalty_epoch + 1, penalty_epoch, penalty_epoch - 1])
+    # Not slashed, not penalized
+    state.validators[4].withdrawable_epoch = penalty_epoch
+    run_epoch_processing_to(spec, state, 'process_slashings')
+
+    assert_matches_spec(spec, state, spec.process_slashings)
+    assert state.balances[0] < state.balances[1]
+    assert state.balances[4] == state.balances[5]
+
+
+@with_all_phases
+@spec_state_test
+def test_slashings_sum_across_epochs(spec, state):
+    epochs = 4
+    penalty_epoch = spec.get_current_epoch(state) + spec.EPOCHS_PER_SLASHINGS_VECTOR // 2
+    slash_validators(spec, state, range(epochs), [penalty_epoch + i for i in range(epochs)])
+    # Slashings that are reset while processing
+    for i in range(epochs):
+        state.slashings[(spec.get_current_epoch(state) + 1 + i) % spec.EPOCHS_PER_SLASHINGS_VECTOR] = (
+            spec.MAX_EFFECTIVE_BALANCE * (i + 1)
+        )
+
+    def slash_and_process_slots(state):
+        spec.process_slots(state, state.slot + spec.SLOTS_PER_EPOCH)
+        spec.slash_validator(state, epochs)
+        spec.process_slots(state, state.slot + spec.SLOTS_PER_EPOCH * (epochs - 1))
+
+    # Slashings and epoch transitions within a single processing context
+    assert_matches_spec(spec, state, spec.with_processing_context(slash_and_process_slots))
+
+
+@with_all_phases
+@spec_state_test
+def test_slash_validator_updates_indexes(spec, state):
+    slash_validators(spec, state, [0], [spec.get_current_epoch(state) + spec.EPOCHS_PER_SLASHINGS_VECTOR // 2])
+
+    def slash(state):
+        context = spec.get_processing_context(state)
+        spec.get_slashed_validators(state, context)
+        spec.get_slashings_sum(state, context)
+        spec.slash_validator(state, 1)
+        expected = spec.ProcessingContext()
+        assert spec.get_slashed_validators(state, context) == spec.get_slashed_validators(state, expected)
+        assert spec.get_slashings_sum(state, context) == spec.get_slashings_sum(state, expected)
+
+    spec.with_processing_context(slash)(state)
+
+
+@with_all_phases
+@spec_state_test
+def test_processing_context_of_state(spec, state):
+    def process(state):
+        context = spec.get_processing_context(state)
+        assert context is not None
+        # Copies are processed in their own contexts
+        assert spec.get_processing_context(state.copy()) is None
+        assert spec.with_processing_context(lambda copy: spec.get_processing_context(copy) is not context)(state.copy())
+        assert spec.get_processing_context(state) is context
+
+    spec.with_processing_context(process)(state)
+    assert spec.get_processing_context(state) is None
@@ -0,0 +1,92 @@
+from eth2spec.test.context import spec_state_test, with_phase1
+
+
+def new_record(spec, challenge_index, inclusion_epoch=0):
+    return spec.CustodyBitChallengeRecord(
+        challenge_index=challenge_index,
+        challenger_index=challenge_index % 8,
+        responder_index=challenge_index % 8 + 8,
+        inclusion_epoch=inclusion_epoch,
+        chunk_count=1,
+    )
+
+
+def replace_records(spec, state, challenge_indices, clear_indices):
+    """
+    Add the records of ``challenge_indices`` with ``spec.replace_empty_or_append``, clearing the records at
+     ``clear_indices`` halfway, and return the indices of the added records.
+    """
+    records = state.custody_bit_challenge_records
+    half = len(challenge_indices) // 2
+    indices = [spec.replace_empty_or_append(records, new_record(spec, i)) for i in challenge_indices[:half]]
+    for index in clear_indices:
+        records[index] = spec.CustodyBitChallengeRecord()
+    spec.drop_empty_record_indices(state)
+    indices += [spec.replace_empty_or_append(records, new_record(spec, i)) for i in challenge_indices[half:]]
+    return indices
+
+
+@with_phase1
+@spec_state_test
+def test_replace_empty_or_append(spec, state):
+    # Records with empty slots in between
+    state.custody_bit_challenge_records = [
+        new_record(spec, i + 1) if i % 3 == 0 else spec.CustodyBitChallengeRecord() for i in range(10)
+    ]
+    expected = state.copy()
+    challenge_indices = list(range(100, 112))
+    clear_indices = [0, 4, 9]
+
+    expected_indices = []
+    records = expected.custody_bit_challenge_records
+    for i in challenge_indices[:len(challenge_indices) // 2]:
+        expected_indices.append(spec._replace_empty_or_append(records, new_record(spec, i)))
+    for index in clear_indices:
+        records[index] = spec.CustodyBitChallengeRecord()
+    for i in challenge_indices[len(challenge_indices) // 2:]:
+        expected_indices.append(spec._replace_empty_or_append(records, new_record(spec, i)))
+
+    def run(state):
+        context = spec.get_processing_context(state)
+        spec.get_empty_record_indices(context, state.custody_bit_challenge_records)
+        return replace_records(spec, state, challenge_indices, clear_indices)
+
+    assert spec.with_processing_context(run)(state) == expected_indices
+    assert state.hash_tree_root() == expected.hash_tree_root()
+    # Outside of a processing context, the records are scanned
+    assert spec.get_processing_context(state) is None
+    assert replace_records(spec, state, [200, 201], [1]) == replace_records(spec, expected, [200, 201], [1])
+    assert state.hash_tree_root() == expected.hash_tree_root()
+
+
+@with_phase1
+@spec_state_test
+def test_empty_record_indices_after_deadlines(spec, state):
+    # The second record is past its response deadline
+    state.slot = spec.compute_start_slot_at_epoch(spec.CUSTODY_RESPONSE_DEADLINE + 1)
+    epoch = spec.get_current_epoch(state)
+    state.custody_bit_challenge_records = [new_record(spec, 1, epoch), new_record(spec, 2), new_record(spec, 3, epoch)]
+    expected = state.copy()
+
+    records = expected.custody_bit_challenge_records
+    expected_indices = [spec._replace_empty_or_append(records, new_record(spec, 10, epoch))]
+    spec._process_challenge_deadlines(expected)
+    spec._after_process_final_updates(expected)
+    expected_indices += [spec._replace_empty_or_append(records, new_record(spec, i, epoch)) for i in (11, 12)]
+
+    def run(state):
+        context = spec.get_processing_context(state)
+        records = state.custody_bit_challenge_records
+        spec.get_empty_record_indices(context, records)
+        indices = [spec.replace_empty_or_append(records, new_record(spec, 10, epoch))]
+        spec.process_challenge_deadlines(state)
+        spec.after_process_final_updates(state)
+        # Rebuilt by the next challenge, like process_bit_challenge does
+        spec.get_empty_record_indices(context, records)
+        indices += [spec.replace_empty_or_append(records, new_record(spec, i, epoch)) for i in (11, 12)]
+        return indices
+
+    assert spec.with_processing_context(run)(state) == expected_indices == [3, 1, 4]
+    assert state.hash_tree_root() == expected.hash_tree_root()
+    # The records no longer refer to the released context
+    assert getattr(state.custody_bit_challenge_records, 'processing_context') is None
@@ -0,0 +1,43 @@
+from eth2spec.test.context import spec_state_test, with_phase1
+
+
+@with_phase1
+@spec_state_test
+def test_compute_shuffled_indices(spec, state):
+    seed = spec.get_seed(state, spec.get_current_epoch(state), spec.DOMAIN_SHARD_ATTESTER)
+    for count in (0, 1, 2, 255, 256, 300):
+        indices = [spec.ValidatorIndex(i * 3) for i in range(count)]
+        expected = spec._compute_committee(indices, seed, 0, 1)
+        assert spec.compute_shuffled_indices(indices, seed) == expected
+
+
+@with_phase1
+@spec_state_test
+def test_update_period_committee(spec, state):
+    # The last epoch of a shard period, with a slashed validator in the next committees
+    state.slot = spec.compute_start_slot_at_epoch(spec.EPOCHS_PER_SHARD_PERIOD - 1)
+    state.validators[3].slashed = True
+    epoch = spec.get_current_epoch(state) + 1
+    period = epoch // spec.EPOCHS_PER_SHARD_PERIOD
+
+    spec.committee_cache.clear()
+    expected = state.copy()
+    spec._update_period_committee(expected)
+    expected_committees = [spec._get_period_committee(state, spec.Shard(shard), epoch)
+                           for shard in range(spec.SHARD_COUNT)]
+    spec.committee_cache.clear()
+    assert spec.get_period_committees(state, epoch) == expected_committees
+    spec.update_period_committee(state)
+
+    root = state.period_committee_roots[period % spec.PERIOD_COMMITTEE_ROOT_LENGTH]
+    assert root != spec.Hash()
+    assert root == expected.period_committee_roots[period % spec.PERIOD_COMMITTEE_ROOT_LENGTH]
+    assert state.hash_tree_root() == expected.hash_tree_root()
+
+
+@with_phase1
+@spec_state_test
+def test_update_period_committee_not_period_end(spec, state):
+    pre_roots = state.period_committee_roots.copy()
+    spec.update_period_committee(state)
+    assert state.period_committee_roots == pre_roots
@@ -0,0 +1,80 @@
+from eth2spec.test.context import spec_state_test, with_phase1
+from eth2spec.test.helpers.phase1.shard_state import configure_shard_state
+
+
+def get_period_committees(spec, beacon_state, shard_state):
+    epoch = spec.compute_epoch_of_shard_slot(shard_state.slot)
+    older_committee = spec.get_period_committee(
+        beacon_state, shard_state.shard, spec.compute_shard_period_start_epoch(epoch, 2))
+    newer_committee = spec.get_period_committee(
+        beacon_state, shard_state.shard, spec.compute_shard_period_start_epoch(epoch, 1))
+    return older_committee, newer_committee
+
+
+def configure_committee_shard_state(spec, state):
+    """
+    Return the beacon state and the state of the first shard of which both period committees have members.
+    """
+    for shard in range(spec.SHARD_COUNT):
+        beacon_state, shard_state = configure_shard_state(spec, state, shard)
+        if all(len(committee) > 0 for committee in get_period_committees(spec, beacon_state, shard_state)):
+            return beacon_state, shard_state
+    raise Exception('No shard with period committees')
+
+
+def get_deltas(spec, beacon_state, shard_state):
+    older_committee, newer_committee = get_period_committees(spec, beacon_state, shard_state)
+    non_member = next(i for i in range(len(beacon_state.validators))
+                      if i not in older_committee and i not in newer_committee)
+    indices = list(older_committee[:3]) + list(newer_committee[-3:]) + [non_member]
+    return [(index, spec.Gwei(i + 1), i % 2 == 0) for i, index in enumerate(indices)]
+
+
+@with_phase1
+@spec_state_test
+def test_process_delta(spec, state):
+    beacon_state, shard_state = configure_committee_shard_state(spec, state)
+    deltas = get_deltas(spec, beacon_state, shard_state)
+
+    expected = shard_state.copy()
+    for index, delta, positive in deltas:
+        spec._process_delta(beacon_state, expected, index, delta, positive=positive)
+    process_delta = spec.with_period_committee_cache(spec.process_delta)
+    for index, delta, positive in deltas:
+        process_delta(beacon_state, shard_state, index, delta, positive=positive)
+        # Outside of the processing of a shard block, the committees are not kept
+        assert len(spec.period_committee_caches) == 0
+    assert shard_state.hash_tree_root() == expected.hash_tree_root()
+    assert shard_state.older_committee_positive_deltas[0] == 1
+
+
+@with_phase1
+@spec_state_test
+def test_process_deltas_period_committees(spec, state):
+    beacon_state, shard_state = configure_committee_shard_state(spec, state)
+    deltas = get_deltas(spec, beacon_state, shard_state)
+    expected = shard_state.copy()
+    for index, delta, positive in deltas:
+        spec._process_delta(beacon_state, expected, index, delta, positive=positive)
+
+    # Each period committee is computed once while the cache is active
+    get_period_committee = spec._get_period_committee
+    computed = []
+
+    def counted(beacon_state, shard, epoch):
+        computed.append((shard, epoch))
+        return get_period_committee(beacon_state, shard, epoch)
+
+    def process_deltas(beacon_state, shard_state):
+        for index, delta, positive in deltas:
+            spec.process_delta(beacon_state, shard_state, index, delta, positive=positive)
+            assert len(spec.period_committee_caches) == 1
+
+    spec._get_period_committee = counted
+    try:
+        spec.with_period_committee_cache(process_deltas)(beacon_state, shard_state)
+    finally:
+        spec._get_period_committee = get_period_committee
+    assert len(computed) == len(set(computed)) == 2
+    assert len(spec.period_committee_caches) == 0
+    assert shard_state.hash_tree_root() == expected.hash_tree_root()
@@ -0,0 +1,91 @@
+import os
+from copy import deepcopy
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from eth2spec.replay.replay import list_block_files, load_ssz, main, print_report, replay, use_backend
+from eth2spec.test.context import spec_state_test, with_all_phases, with_phases
+from eth2spec.test.helpers.block import build_empty_block
+from eth2spec.test.helpers.state import next_epoch, next_epoch_with_attestations, state_transition_and_sign_block
+from eth2spec.utils.ssz.ssz_impl import serialize
+
+
+def build_chain(spec, state, epochs):
+    """
+    Return blocks with attestations for ``epochs`` epochs after ``state``, and the post-state.
+    """
+    next_epoch(spec, state)
+    blocks = []
+    post_state = state
+    for _ in range(epochs):
+        _, epoch_blocks, post_state = next_epoch_with_attestations(spec, post_state, True, True)
+        blocks.extend(epoch_blocks)
+    # Skip slots, over an epoch transition
+    block = build_empty_block(spec, post_state, post_state.slot + spec.SLOTS_PER_EPOCH + 1)
+    state_transition_and_sign_block(spec, post_state, block)
+    blocks.append(block)
+    return blocks, post_state
+
+
+@with_all_phases
+@spec_state_test
+def test_replay(spec, state):
+    blocks, expected = build_chain(spec, state, 2)
+
+    with TemporaryDirectory() as checkpoint_dir:
+        stats = replay(spec, state, blocks, validate_state_root=True,
+                       checkpoint_epochs=2, checkpoint_dir=checkpoint_dir)
+        checkpoints = sorted(os.listdir(checkpoint_dir))
+        assert checkpoints == ['epoch_2.ssz', 'epoch_4.ssz']
+        checkpoint = load_ssz(os.path.join(checkpoint_dir, 'epoch_4.ssz'), spec.BeaconState)
+        assert checkpoint.hash_tree_root() == expected.hash_tree_root()
+
+    assert state.hash_tree_root() == expected.hash_tree_root()
+    assert len(stats.block_times) == len(blocks)
+    assert stats.slot_count == len(blocks) + spec.SLOTS_PER_EPOCH
+    assert len(stats.epoch_times) == 3
+    assert callable(spec.process_slots) and spec.process_slots.__name__ != 'timed'
+
+    out = StringIO()
+    print_report(stats, 0.0, file=out)
+    assert f'blocks:            {len(blocks)}' in out.getvalue()
+
+
+@with_all_phases
+@spec_state_test
+def test_replay_backends(spec, state):
+    blocks, expected = build_chain(spec, state, 1)
+    process_slots = spec.process_slots
+    for backend in ('spec', 'vectorized'):
+        restore = use_backend(spec, backend)
+        try:
+            if backend == 'spec':
+                assert spec.process_slots is spec._process_slots
+            pre_state = deepcopy(state)
+            replay(spec, pre_state, blocks, validate_state_root=True)
+        finally:
+            restore()
+        assert pre_state.hash_tree_root() == expected.hash_tree_root()
+    assert spec.process_slots is process_slots
+
+
+@with_phases(['phase0'])
+@spec_state_test
+def test_main(spec, state):
+    blocks, expected = build_chain(spec, state, 1)
+
+    with TemporaryDirectory() as data_dir:
+        pre_state_path = os.path.join(data_dir, 'pre.ssz')
+        with open(pre_state_path, 'wb') as f:
+            f.write(serialize(state))
+        blocks_dir = os.path.join(data_dir, 'blocks')
+        os.mkdir(blocks_dir)
+        for i, block in enumerate(blocks):
+            with open(os.path.join(blocks_dir, f'block_{i}.ssz'), 'wb') as f:
+                f.write(serialize(block))
+        assert list_block_files(blocks_dir)[2].endswith('block_2.ssz')
+
+        main([pre_state_path, blocks_dir, '--validate-state-root',
+              '--checkpoint-epochs', '1', '--checkpoint-dir', data_dir])
+        checkpoint = load_ssz(os.path.join(data_dir, 'epoch_3.ssz'), spec.BeaconState)
+        assert checkpoint.hash_tree_root() == expected.hash_tree_root()
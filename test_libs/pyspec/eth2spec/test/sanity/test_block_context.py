@@ -0,0 +1,84 @@
+from copy import deepcopy
+
+from eth2spec.test.context import always_bls, expect_assertion_error, spec_state_test, with_all_phases
+from eth2spec.test.helpers.attestations import get_valid_attestation, sign_attestation
+from eth2spec.test.helpers.attester_slashings import get_valid_attester_slashing
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot, sign_block
+from eth2spec.test.helpers.state import next_epoch, state_transition_and_sign_block
+
+
+def get_split_attestations(spec, state, slot, index):
+    """
+    Two aggregates of the same attestation data, each with a half of the committee.
+    """
+    attestations = []
+    for half in (0, 1):
+        attestation = get_valid_attestation(spec, state, slot=slot, index=index)
+        for i in range(len(attestation.aggregation_bits)):
+            attestation.aggregation_bits[i] = (i % 2 == half)
+        sign_attestation(spec, state, attestation)
+        attestations.append(attestation)
+    return attestations
+
+
+def build_attestations_block(spec, state):
+    next_epoch(spec, state)
+    block = build_empty_block_for_next_slot(spec, state)
+    for slot in range(state.slot - spec.SLOTS_PER_EPOCH + 1, state.slot + 1):
+        for index in range(spec.get_committee_count_at_slot(state, slot)):
+            block.body.attestations.extend(get_split_attestations(spec, state, slot, index))
+    block.body.attester_slashings.append(get_valid_attester_slashing(spec, state, signed_1=True, signed_2=True))
+    sign_block(spec, state, block)
+    return block
+
+
+def count_calls(spec, name, calls):
+    fn = getattr(spec, name)
+
+    def counted(*args):
+        calls.append(args[1:])
+        return fn(*args)
+    setattr(spec, name, counted)
+    return fn
+
+
+@with_all_phases
+@spec_state_test
+def test_attestations_block(spec, state):
+    block = build_attestations_block(spec, state)
+
+    expected = deepcopy(state)
+    process_block = spec.process_block
+    spec.process_block = spec._process_block
+    try:
+        spec.state_transition(expected, block)
+    finally:
+        spec.process_block = process_block
+
+    committee_calls = []
+    get_beacon_committee = count_calls(spec, '_get_beacon_committee', committee_calls)
+    proposer_calls = []
+    get_beacon_proposer_index = count_calls(spec, '_get_beacon_proposer_index', proposer_calls)
+    try:
+        state_transition_and_sign_block(spec, state, block)
+    finally:
+        spec._get_beacon_committee = get_beacon_committee
+        spec._get_beacon_proposer_index = get_beacon_proposer_index
+
+    assert spec.get_processing_context(state) is None
+    assert state.hash_tree_root() == expected.hash_tree_root()
+    # Each committee is computed once, for both aggregates and the attester slashing
+    assert len(committee_calls) == len(set(committee_calls)) == len(block.body.attestations) // 2
+    assert len(proposer_calls) == 1
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_invalid_attestation_signature(spec, state):
+    block = build_attestations_block(spec, state)
+    block.body.attestations[1].signature = block.body.attestations[0].signature
+    sign_block(spec, state, block)
+
+    expect_assertion_error(lambda: spec.state_transition(state, block))
+    assert spec.get_processing_context(state) is None
@@ -0,0 +1,56 @@
+from copy import deepcopy
+
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+
+
+def assert_matches_slot_by_slot(spec, state, slots):
+    expected = deepcopy(state)
+    spec._process_slots(expected, expected.slot + slots)
+    spec.process_slots(state, state.slot + slots)
+    assert state.slot == expected.slot
+    assert state.state_roots == expected.state_roots
+    assert state.block_roots == expected.block_roots
+    assert state.hash_tree_root() == expected.hash_tree_root()
+
+
+@with_all_phases
+@spec_state_test
+def test_no_slots(spec, state):
+    assert_matches_slot_by_slot(spec, state, 0)
+
+
+@with_all_phases
+@spec_state_test
+def test_slots_within_epoch(spec, state):
+    assert_matches_slot_by_slot(spec, state, spec.SLOTS_PER_EPOCH - 1)
+
+
+@with_all_phases
+@spec_state_test
+def test_slots_to_epoch_boundary(spec, state):
+    assert_matches_slot_by_slot(spec, state, spec.SLOTS_PER_EPOCH)
+
+
+@with_all_phases
+@spec_state_test
+def test_slots_from_last_slot_of_epoch(spec, state):
+    state.slot = spec.SLOTS_PER_EPOCH - 1
+    assert_matches_slot_by_slot(spec, state, 2)
+
+
+@with_all_phases
+@spec_state_test
+def test_slots_after_block(spec, state):
+    block = build_empty_block_for_next_slot(spec, state, signed=True)
+    state_transition_and_sign_block(spec, state, block)
+    # The state root of the latest block header is cached in the first slot
+    assert state.latest_block_header.state_root == spec.Bytes32()
+    assert_matches_slot_by_slot(spec, state, spec.SLOTS_PER_EPOCH * 2 + 1)
+
+
+@with_all_phases
+@spec_state_test
+def test_slots_wrapping_historical_roots(spec, state):
+    assert_matches_slot_by_slot(spec, state, spec.SLOTS_PER_HISTORICAL_ROOT + spec.SLOTS_PER_EPOCH // 2)
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from eth2spec.genesis.benchmark import make_deposits
+from eth2spec.genesis.builder import build_genesis_state
+from eth2spec.phase1 import spec as spec_phase1
+from eth2spec.shard_chain import simulator
+from eth2spec.utils import bls
+from eth2spec.utils.ssz.ssz_impl import hash_tree_root
+
+
+def run_simulation(spec, beacon_state, shard_count, slot_count, processes, start_method=None):
+    # Shard states 3 slots before the end of the epoch, for the blocks to span two beacon states
+    shard_states = []
+    for shard in range(shard_count):
+        shard_state = spec.get_genesis_shard_state(spec.Shard(shard))
+        shard_state.slot = spec.ShardSlot((spec.SHARD_GENESIS_EPOCH + 1) * spec.SHARD_SLOTS_PER_EPOCH - 4)
+        shard_states.append(shard_state)
+    results = simulator.simulate(spec, beacon_state, shard_states, slot_count, processes=processes,
+                                 start_method=start_method)
+    return shard_states, results
+
+
+def test_simulate():
+    spec = spec_phase1
+    # Deposits and blocks are unsigned
+    with bls.use_bls(False):
+        # Enough validators for the shard committees of the first shards
+        beacon_state = build_genesis_state(spec, b'\x12' * 32, spec.MIN_GENESIS_TIME,
+                                           make_deposits(spec, 2048, False))
+        shard_count = 3
+        slot_count = 6
+        shard_states, results = run_simulation(spec, beacon_state, shard_count, slot_count, 1)
+        # The shards advanced by a pool of processes have the same states
+        pool_shard_states, pool_results = run_simulation(spec, beacon_state, shard_count, slot_count, 2)
+        # Also with processes that do not inherit the constants and the BLS setting of the spec
+        spawn_shard_states, _ = run_simulation(spec, beacon_state, shard_count, slot_count, 2, 'spawn')
+
+    assert [stats.shard for stats in results] == list(range(shard_count))
+    for shard_state, stats in zip(shard_states, results):
+        assert stats.blocks == slot_count
+        assert shard_state.slot == (spec.SHARD_GENESIS_EPOCH + 1) * spec.SHARD_SLOTS_PER_EPOCH + 2
+        assert shard_state.block_size_sum == slot_count * (spec.SHARD_HEADER_SIZE + 4096)
+        assert stats.body_bytes == slot_count * 4096
+        assert stats.transition_time > 0
+    assert sum(stats.attestations for stats in results) > 0
+    assert [hash_tree_root(state) for state in pool_shard_states] == [hash_tree_root(state) for state in shard_states]
+    assert [hash_tree_root(state) for state in spawn_shard_states] == [hash_tree_root(state) for state in shard_states]
+    assert [stats.attestations for stats in pool_results] == [stats.attestations for stats in results]
+
+    out = StringIO()
+    simulator.print_report(results, 1.0, file=out)
+    assert f'{shard_count} shards, {shard_count * slot_count} blocks' in out.getvalue()
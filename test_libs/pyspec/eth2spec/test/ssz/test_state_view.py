@@ -0,0 +1,34 @@
+import os
+from tempfile import TemporaryDirectory
+
+from eth2spec.test.context import spec_state_test, with_all_phases
+from eth2spec.test.helpers.state import next_epoch, next_epoch_with_attestations
+from eth2spec.utils.ssz.ssz_impl import hash_tree_root, serialize
+from eth2spec.utils.ssz.ssz_view import open_view
+
+
+def assert_view(spec, state, view):
+    assert view.slot == state.slot
+    assert view.finalized_checkpoint.value() == state.finalized_checkpoint
+    assert view.validators[3].value() == state.validators[3]
+    assert view.validators[3].pubkey == state.validators[3].pubkey
+    assert view.balances[5] == state.balances[5]
+    assert len(view.previous_epoch_attestations) == len(state.previous_epoch_attestations) > 0
+    attestation = view.previous_epoch_attestations[0]
+    assert attestation.data.target.root == state.previous_epoch_attestations[0].data.target.root
+    assert attestation.hash_tree_root() == hash_tree_root(state.previous_epoch_attestations[0])
+    assert view.field_hash_tree_root('validators') == hash_tree_root(state.validators)
+    assert view.hash_tree_root() == hash_tree_root(state)
+
+
+@with_all_phases
+@spec_state_test
+def test_state_view(spec, state):
+    next_epoch(spec, state)
+    _, _, state = next_epoch_with_attestations(spec, state, True, False)
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'state.ssz')
+        with open(path, 'wb') as f:
+            f.write(serialize(state))
+        with open_view(path, spec.BeaconState) as view:
+            assert_view(spec, state, view)
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+
+from eth2spec.test.context import spec_state_test, with_phase1
+
+np = pytest.importorskip('numpy')
+
+from eth2spec.vectorized import compact_committee  # noqa: E402
+
+
+def get_persistent_committee_pubkeys_and_balances(spec, memory, epoch):
+    """
+    ``get_persistent_committee_pubkeys_and_balances`` of the light client sync protocol.
+    """
+    current_period = spec.compute_epoch_at_slot(memory.header.slot) // spec.EPOCHS_PER_SHARD_PERIOD
+    next_period = epoch // spec.EPOCHS_PER_SHARD_PERIOD
+    assert next_period in (current_period, current_period + 1)
+    if next_period == current_period:
+        earlier_committee, later_committee = memory.previous_committee, memory.current_committee
+    else:
+        earlier_committee, later_committee = memory.current_committee, memory.next_committee
+
+    pubkeys = []
+    balances = []
+    for pubkey, compact_validator in zip(earlier_committee.pubkeys, earlier_committee.compact_validators):
+        index, slashed, balance = spec.unpack_compact_validator(compact_validator)
+        if epoch % spec.EPOCHS_PER_SHARD_PERIOD < index % spec.EPOCHS_PER_SHARD_PERIOD:
+            pubkeys.append(pubkey)
+            balances.append(balance)
+    for pubkey, compact_validator in zip(later_committee.pubkeys, later_committee.compact_validators):
+        index, slashed, balance = spec.unpack_compact_validator(compact_validator)
+        if epoch % spec.EPOCHS_PER_SHARD_PERIOD >= index % spec.EPOCHS_PER_SHARD_PERIOD:
+            pubkeys.append(pubkey)
+            balances.append(balance)
+    return pubkeys, balances
+
+
+def get_committees(spec, state):
+    # Committees of the shards, with slashed validators and various effective balances
+    for index in (1, 5, 17):
+        state.validators[index].slashed = True
+    for index in range(0, len(state.validators), 3):
+        state.validators[index].effective_balance = index * spec.EFFECTIVE_BALANCE_INCREMENT
+    return spec.get_period_committees(state, spec.get_current_epoch(state))
+
+
+@with_phase1
+@spec_state_test
+def test_pack_unpack_compact_validators(spec, state):
+    indices = [0, 1, 2**20, 2**40 - 1]
+    slashed = [False, True, True, False]
+    balances = [0, 32, 2**15 - 1, 17]
+    compact_validators = compact_committee.pack_compact_validators(indices, slashed, balances)
+    assert compact_validators.dtype == np.uint64
+    assert compact_validators.tolist() == [spec.pack_compact_validator(*args)
+                                           for args in zip(indices, slashed, balances)]
+    unpacked = compact_committee.unpack_compact_validators(compact_validators)
+    assert list(zip(*(column.tolist() for column in unpacked))) == [
+        spec.unpack_compact_validator(compact_validator) for compact_validator in compact_validators.tolist()]
+
+
+@with_phase1
+@spec_state_test
+def test_committees_to_compact_committees(spec, state):
+    committees = get_committees(spec, state)
+    expected = [spec.committee_to_compact_committee(state, committee) for committee in committees]
+    assert spec.committees_to_compact_committees(state, committees) == expected
+
+    # The period committee roots are unchanged
+    state.slot = spec.compute_start_slot_at_epoch(spec.EPOCHS_PER_SHARD_PERIOD - 1)
+    expected_state = state.copy()
+    spec.update_period_committee(expected_state)
+    compact_committee.install(spec)
+    try:
+        assert [spec.committee_to_compact_committee(state, committee) for committee in committees] == expected
+        assert spec.committees_to_compact_committees(state, committees) == expected
+        spec.update_period_committee(state)
+    finally:
+        compact_committee.uninstall(spec)
+    assert not compact_committee.is_installed(spec)
+    assert state.hash_tree_root() == expected_state.hash_tree_root()
+
+
+@with_phase1
+@spec_state_test
+def test_get_persistent_committee_pubkeys_and_balances(spec, state):
+    committees = spec.committees_to_compact_committees(state, get_committees(spec, state))
+    # The committees of three shards with members
+    committees = [committee for committee in committees if len(committee.pubkeys) > 0][:3]
+    assert len(committees) == 3
+    memory = SimpleNamespace(
+        shard=spec.Shard(0),
+        header=spec.BeaconBlockHeader(slot=spec.compute_start_slot_at_epoch(spec.EPOCHS_PER_SHARD_PERIOD)),
+        previous_committee=committees[0],
+        current_committee=committees[1],
+        next_committee=committees[2],
+    )
+    member_count = 0
+    for epoch in range(spec.EPOCHS_PER_SHARD_PERIOD, 3 * spec.EPOCHS_PER_SHARD_PERIOD):
+        expected = get_persistent_committee_pubkeys_and_balances(spec, memory, epoch)
+        assert compact_committee.get_persistent_committee_pubkeys_and_balances(spec, memory, epoch) == expected
+        member_count += len(expected[0])
+    assert member_count > 0
@@ -0,0 +1,63 @@
+import pytest
+
+from eth2spec.phase0 import spec as spec_phase0
+from eth2spec.test.phase_0.epoch_processing import (
+    test_process_final_updates,
+    test_process_justification_and_finalization,
+    test_process_registry_updates,
+    test_process_rewards_and_penalties,
+    test_process_slashings,
+)
+from eth2spec.test.helpers.cases import collect_test_cases
+from eth2spec.test.sanity import test_blocks, test_slots
+from eth2spec.test import test_finality
+
+np = pytest.importorskip('numpy')
+
+from eth2spec.vectorized import epoch_processing  # noqa: E402
+
+
+cases = collect_test_cases(
+    test_process_final_updates,
+    test_process_justification_and_finalization,
+    test_process_registry_updates,
+    test_process_rewards_and_penalties,
+    test_process_slashings,
+    test_blocks,
+    test_slots,
+    test_finality,
+)
+
+
+def run_vectors(fn):
+    out = fn(generator_mode=True, phase='phase0', bls_active=False)
+    return None if out is None else list(out)
+
+
+@pytest.mark.parametrize('module_name,name,fn', cases, ids=[f'{m}.{n}' for m, n, _ in cases])
+def test_vectors_match_spec(module_name, name, fn):
+    expected = run_vectors(fn)
+    epoch_processing.install(spec_phase0)
+    try:
+        actual = run_vectors(fn)
+    finally:
+        epoch_processing.uninstall(spec_phase0)
+    assert actual == expected
+
+
+def test_install_uninstall():
+    original = spec_phase0.process_final_updates
+    epoch_processing.install(spec_phase0)
+    try:
+        assert epoch_processing.is_installed(spec_phase0)
+        assert spec_phase0.process_final_updates is not original
+    finally:
+        epoch_processing.uninstall(spec_phase0)
+    assert not epoch_processing.is_installed(spec_phase0)
+    assert spec_phase0.process_final_updates is original
+
+
+def test_mul_div_no_overflow():
+    values = np.array([2**40, 3, 0], dtype=np.uint64)
+    multiplier = 2**40
+    assert list(epoch_processing.mul_div(values, multiplier, 2**20)) == [v * multiplier // 2**20 for v in [2**40, 3, 0]]
@@ -0,0 +1,93 @@
+"""
+Benchmark of the diff-based snapshot store against full snapshots, on the post-states of consecutive slots.
+
+Usage: ``python -m eth2spec.utils.benchmark_snapshots [--validators 16384] [--slots 128] [--base-interval 64]``
+"""
+import os
+import time
+from argparse import ArgumentParser
+from random import Random
+from tempfile import TemporaryDirectory
+
+from eth2spec.genesis.benchmark import make_deposits
+from eth2spec.genesis.builder import build_genesis_state
+from eth2spec.phase0 import spec as spec_phase0
+from eth2spec.utils import bls
+from eth2spec.utils.snapshots import SnapshotStore
+from eth2spec.utils.ssz.ssz_impl import deserialize, serialize
+
+
+def make_states(spec, validator_count, slot_count):
+    """
+    Yield the states of ``slot_count`` consecutive slots from genesis, with some balances changed every slot
+     to stand in for the effects of blocks.
+    """
+    rng = Random(validator_count)
+    state = build_genesis_state(spec, b'\x12' * 32, spec.MIN_GENESIS_TIME, make_deposits(spec, validator_count, False))
+    for _ in range(slot_count):
+        spec.process_slots(state, state.slot + 1)
+        for _ in range(spec.MAX_ATTESTATIONS):
+            index = rng.randrange(validator_count)
+            state.balances[index] += rng.randrange(1, 10**6)
+        yield state
+
+
+def time_restore(keys, restore):
+    start = time.perf_counter()
+    for key in keys:
+        restore(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark diff-based snapshots of states against full snapshots.')
+    parser.add_argument('--validators', type=int, default=16384, help='Number of validators')
+    parser.add_argument('--slots', type=int, default=128, help='Number of slots to snapshot')
+    parser.add_argument('--base-interval', type=int, default=64, help='Slots between full bases of the store')
+    args = parser.parse_args()
+
+    spec = spec_phase0
+    # Deposits are unsigned
+    bls.bls_active = False
+    with TemporaryDirectory() as full_dir, TemporaryDirectory() as store_dir:
+        store = SnapshotStore(store_dir, spec.BeaconState, args.base_interval)
+        full_write_time = store_write_time = 0.0
+        for state in make_states(spec, args.validators, args.slots):
+            data = serialize(state)
+            start = time.perf_counter()
+            with open(os.path.join(full_dir, f'{state.slot}.ssz'), 'wb') as f:
+                f.write(data)
+            full_write_time += time.perf_counter() - start
+            start = time.perf_counter()
+            store.put_serialized(state.slot, data)
+            store_write_time += time.perf_counter() - start
+
+        def read_full(key):
+            with open(os.path.join(full_dir, f'{key}.ssz'), 'rb') as f:
+                return f.read()
+
+        def restore_full(key):
+            return deserialize(read_full(key), spec.BeaconState)
+
+        # Restore from disk, not from the last value kept by the store
+        store = SnapshotStore(store_dir, spec.BeaconState, args.base_interval)
+        keys = store.keys()
+        assert store.get(keys[-1]) == restore_full(keys[-1])
+        full_size = sum(os.path.getsize(os.path.join(full_dir, name)) for name in os.listdir(full_dir))
+        # Reading the serialization, and then also deserializing it, which takes the same time for both
+        full_read_time = time_restore(keys, read_full)
+        store_read_time = time_restore(keys, store.get_serialized)
+        full_restore_time = time_restore(keys, restore_full)
+        store_restore_time = time_restore(keys, store.get)
+
+        print(f'{args.validators} validators, {len(keys)} slots, a base every {args.base_interval} slots')
+        print(f"{'':>6} {'disk (MiB)':>11} {'write (ms/slot)':>16} {'read (ms/slot)':>15} {'restore (ms/slot)':>18}")
+        for name, size, write_time, read_time, restore_time in [
+                ('full', full_size, full_write_time, full_read_time, full_restore_time),
+                ('diffs', store.size(), store_write_time, store_read_time, store_restore_time)]:
+            print(f'{name:>6} {size / 2**20:>11.2f} {write_time / len(keys) * 1000:>16.2f}'
+                  f' {read_time * 1000:>15.2f} {restore_time * 1000:>18.2f}')
+
+
+if __name__ == '__main__':
+    main()
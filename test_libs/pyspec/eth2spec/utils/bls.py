@@ -1,20 +1,53 @@
+import threading
+from contextlib import contextmanager
+from secrets import randbits
+
 from py_ecc import bls
+from py_ecc.bls.utils import hash_to_G2, pubkey_to_G1, signature_to_G2
+from py_ecc.fields import optimized_bls12_381_FQ12 as FQ12
+from py_ecc.optimized_bls12_381 import G1, Z1, Z2, add, final_exponentiate, multiply, neg, pairing
 
 # Flag to make BLS active or not. Used for testing, do not ignore BLS in production unless you know what you are doing.
 bls_active = True
 
+# Overrides of the flag by the current thread, see use_bls
+_thread_flags = threading.local()
+
 STUB_SIGNATURE = b'\x11' * 96
 STUB_PUBKEY = b'\x22' * 48
 STUB_COORDINATES = bls.api.signature_to_G2(bls.sign(b"", 0, b"\0" * 8))
 
 
+def is_bls_active() -> bool:
+    """
+    Return whether BLS is active in the current thread: as set by ``use_bls``, or else ``bls_active``.
+    """
+    return getattr(_thread_flags, 'bls_active', bls_active)
+
+
+@contextmanager
+def use_bls(active: bool):
+    """
+    Make BLS active or not in the current thread only, within the ``with`` block.
+    """
+    previous = getattr(_thread_flags, 'bls_active', None)
+    _thread_flags.bls_active = active
+    try:
+        yield
+    finally:
+        if previous is None:
+            del _thread_flags.bls_active
+        else:
+            _thread_flags.bls_active = previous
+
+
 def only_with_bls(alt_return=None):
     """
     Decorator factory to make a function only run when BLS is active. Otherwise return the default.
     """
     def runner(fn):
         def entry(*args, **kw):
-            if bls_active:
+            if is_bls_active():
                 return fn(*args, **kw)
             else:
                 return alt_return
@@ -34,6 +67,30 @@ def bls_verify_multiple(pubkeys, message_hashes, signature, domain):
                                signature=signature, domain=domain)
 
 
+@only_with_bls(alt_return=True)
+def bls_verify_batch(pubkeys, message_hashes, signatures, domain):
+    """
+    Verify the signatures of ``message_hashes`` by ``pubkeys`` at once, with a pairing per distinct message.
+    The signatures are weighted by random scalars, so invalid signatures cannot cancel out in the sum.
+    """
+    assert len(pubkeys) == len(message_hashes) == len(signatures)
+    try:
+        weights = [randbits(64) | 1 for _ in signatures]
+        signature = Z2
+        message_pubkeys = {}
+        for pubkey, message_hash, sig, weight in zip(pubkeys, message_hashes, signatures, weights):
+            signature = add(signature, multiply(signature_to_G2(sig), weight))
+            point = multiply(pubkey_to_G1(pubkey), weight)
+            message_pubkeys[message_hash] = add(message_pubkeys.get(message_hash, Z1), point)
+        product = FQ12.one()
+        for message_hash, point in message_pubkeys.items():
+            product *= pairing(hash_to_G2(message_hash, domain), point, final_exponentiate=False)
+        product *= pairing(signature, neg(G1), final_exponentiate=False)
+        return final_exponentiate(product) == FQ12.one()
+    except (ValueError, AssertionError):
+        return False
+
+
 @only_with_bls(alt_return=STUB_PUBKEY)
 def bls_aggregate_pubkeys(pubkeys):
     return bls.aggregate_pubkeys(pubkeys)
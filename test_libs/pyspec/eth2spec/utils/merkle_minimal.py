@@ -87,3 +87,39 @@ def merkleize_chunks(chunks, limit=None):
         tmp[j + 1] = hash(tmp[j] + zerohashes[j])
 
     return tmp[max_depth]
+
+
+class IncrementalMerkleTree(object):
+    """
+    Append-only merkle tree of ``depth`` layers, like the deposit contract.
+    Only the left siblings of the path to the next leaf are kept, to get the root in ``depth`` hashes.
+    The last leaf is not available, as in the deposit contract.
+    """
+
+    def __init__(self, depth=32):
+        self.depth = depth
+        self.count = 0
+        self.branch = [ZERO_BYTES32] * depth
+
+    def append(self, leaf):
+        assert self.count < 2**self.depth - 1
+        self.count += 1
+        size = self.count
+        node = leaf
+        for height in range(self.depth):
+            if size % 2 == 1:
+                self.branch[height] = node
+                return
+            node = hash(self.branch[height] + node)
+            size //= 2
+
+    def get_root(self):
+        node = ZERO_BYTES32
+        size = self.count
+        for height in range(self.depth):
+            if size % 2 == 1:
+                node = hash(self.branch[height] + node)
+            else:
+                node = hash(node + zerohashes[height])
+            size //= 2
+        return node
@@ -0,0 +1,120 @@
+"""
+Call counts and wall time of the functions of an instrumented spec, see ``build_spec.py --instrument``.
+"""
+import sys
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+from types import FunctionType
+
+from .ssz.ssz_typing import BaseBytes, Bits, Elements
+
+
+def get_type_name(typ):
+    """
+    Return the name of SSZ type ``typ``, with its parameters: e.g. ``List[Validator, 1099511627776]``, ``BytesN[32]``.
+    """
+    if issubclass(typ, (Bits, BaseBytes)):
+        return f'{typ.__name__}[{typ.length}]'
+    elif issubclass(typ, Elements):
+        return f'{typ.__name__}[{get_type_name(typ.elem_type)}, {typ.length}]'
+    else:
+        return typ.__name__
+
+
+def bucket_by_ssz_type(obj, *args, **kw):
+    return get_type_name(type(obj))
+
+
+def bucket_by_length(data, *args, **kw):
+    return f'bytes[{len(data)}]'
+
+
+def bucket_by_function(*args, **kw):
+    return ''
+
+
+# Primitives of the spec, with the bucketing of their inputs.
+# ``hash`` is the hash cache of the pyspec: it counts all hashes of the spec, ``_hash`` only the cache misses.
+PRIMITIVES = {
+    'hash': bucket_by_length,
+    '_hash': bucket_by_length,
+    'hash_tree_root': bucket_by_ssz_type,
+    'signing_root': bucket_by_ssz_type,
+    'bls_verify': bucket_by_function,
+    'bls_verify_multiple': bucket_by_function,
+    'bls_aggregate_pubkeys': bucket_by_function,
+    'bls_aggregate_signatures': bucket_by_function,
+    'bls_sign': bucket_by_function,
+    'bls_signature_to_G2': bucket_by_function,
+}
+
+
+class Profile(object):
+    """
+    Counts calls and accumulates wall time, per function and per bucket of primitive inputs.
+    The total time of a call includes its callees, the own time excludes the instrumented callees.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = defaultdict(int)
+        self.total_time = defaultdict(float)
+        self.own_time = defaultdict(float)
+        # Time spent in instrumented callees, for each active call
+        self.callee_time = [0.0]
+
+    def wrap(self, name, fn, bucket=None):
+        @wraps(fn)
+        def entry(*args, **kw):
+            key = (name, '' if bucket is None else bucket(*args, **kw))
+            self.callee_time.append(0.0)
+            start = perf_counter()
+            try:
+                return fn(*args, **kw)
+            finally:
+                elapsed = perf_counter() - start
+                callee_time = self.callee_time.pop()
+                self.callee_time[-1] += elapsed
+                self.calls[key] += 1
+                self.total_time[key] += elapsed
+                self.own_time[key] += elapsed - callee_time
+        return entry
+
+    def instrument(self, namespace, module_name):
+        """
+        Replace the functions defined in module ``module_name``, and the primitives, in its ``namespace``.
+        Calls between spec functions go through the module globals, and thus through the instrumented functions.
+        """
+        for name, value in list(namespace.items()):
+            if name.startswith('__'):
+                continue
+            if name in PRIMITIVES and callable(value):
+                namespace[name] = self.wrap(name, value, PRIMITIVES[name])
+            elif isinstance(value, FunctionType) and value.__module__ == module_name:
+                namespace[name] = self.wrap(name, value)
+
+    def stats(self):
+        """
+        Return ``(name, bucket, calls, total_time, own_time)`` rows, by decreasing total time.
+        The bucket is empty for spec functions.
+        """
+        rows = [
+            (name, bucket, calls, self.total_time[(name, bucket)], self.own_time[(name, bucket)])
+            for (name, bucket), calls in self.calls.items()
+        ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def dump(self, file=None, limit=None):
+        """
+        Print the stats as a table, optionally of only the ``limit`` rows with the highest total time.
+        """
+        file = sys.stdout if file is None else file
+        rows = self.stats()
+        if limit is not None:
+            rows = rows[:limit]
+        print(f"{'function':<48} {'input':<40} {'calls':>10} {'total (s)':>10} {'own (s)':>10}", file=file)
+        for name, bucket, calls, total_time, own_time in rows:
+            print(f'{name:<48} {bucket:<40} {calls:>10} {total_time:>10.4f} {own_time:>10.4f}', file=file)
@@ -0,0 +1,229 @@
+"""
+On-disk store of consecutive values of an SSZ container type, e.g. the post-states of a chain by slot.
+
+Full serializations of base values are written periodically, and in between, diffs to the previously stored value.
+A diff is a sequence of records, each keyed by the index of a field of the container:
+ - ``FIELD``: the new serialization of the field,
+ - ``ELEMENTS``: the new length and the changed elements of a ``List`` or ``Vector`` field, by element index.
+Values are restored by applying the diffs forward from the last base, on serializations, and deserializing once.
+"""
+import os
+import re
+
+from eth2spec.utils.ssz.ssz_impl import (
+    deserialize, fixed_size, join_series, serialize, split_elements, split_series,
+)
+from eth2spec.utils.ssz.ssz_typing import List, Vector
+
+FIELD = 0
+ELEMENTS = 1
+
+# Bytes of field indices, and of lengths, counts and element indices
+FIELD_INDEX_BYTES = 2
+LENGTH_BYTES = 4
+
+# Number of fixed-size elements compared at once, before comparing them one by one
+BLOCK_ELEMENTS = 64
+
+FILE_NAME_REGEX = re.compile(r'^(\d+)\.(base|diff)$')
+
+
+def encode_length(length):
+    return length.to_bytes(LENGTH_BYTES, 'little')
+
+
+def decode_length(data, index):
+    return int.from_bytes(data[index:index + LENGTH_BYTES], 'little')
+
+
+def has_elements(typ):
+    return issubclass(typ, (List, Vector))
+
+
+def diff_fixed_elements(old_part, new_part, elem_size):
+    changes = []
+    # Skip equal blocks of elements, e.g. of the mostly unchanged randao mixes and roots
+    block_size = elem_size * BLOCK_ELEMENTS
+    for block_start in range(0, len(new_part), block_size):
+        block_end = block_start + block_size
+        if old_part[block_start:block_end] == new_part[block_start:block_end]:
+            continue
+        for start in range(block_start, min(block_end, len(new_part)), elem_size):
+            element = new_part[start:start + elem_size]
+            if old_part[start:start + elem_size] != element:
+                changes.append(encode_length(start // elem_size) + element)
+    return changes
+
+
+def diff_variable_elements(old_part, new_part, typ):
+    old_elements = split_elements(old_part, typ)
+    changes = []
+    for i, element in enumerate(split_elements(new_part, typ)):
+        if i >= len(old_elements) or old_elements[i] != element:
+            changes.append(encode_length(i) + encode_length(len(element)) + element)
+    return changes
+
+
+def diff_elements(old_part, new_part, typ):
+    """
+    Return the ``ELEMENTS`` payload of the changes between two serializations of a ``List`` or ``Vector``.
+    """
+    if typ.elem_type.is_fixed_size():
+        elem_size = fixed_size(typ.elem_type)
+        length = len(new_part) // elem_size
+        changes = diff_fixed_elements(old_part, new_part, elem_size)
+    else:
+        length = len(split_elements(new_part, typ))
+        changes = diff_variable_elements(old_part, new_part, typ)
+    return encode_length(length) + encode_length(len(changes)) + b''.join(changes)
+
+
+def apply_elements(part, payload, typ):
+    length = decode_length(payload, 0)
+    count = decode_length(payload, LENGTH_BYTES)
+    index = 2 * LENGTH_BYTES
+    if typ.elem_type.is_fixed_size():
+        elem_size = fixed_size(typ.elem_type)
+        data = bytearray(part[:length * elem_size])
+        data.extend(bytes(length * elem_size - len(data)))
+        for _ in range(count):
+            start = decode_length(payload, index) * elem_size
+            index += LENGTH_BYTES
+            data[start:start + elem_size] = payload[index:index + elem_size]
+            index += elem_size
+        assert index == len(payload)
+        return bytes(data)
+
+    elements = list(split_elements(part, typ))
+    del elements[length:]
+    elements.extend([b''] * (length - len(elements)))
+    for _ in range(count):
+        i = decode_length(payload, index)
+        size = decode_length(payload, index + LENGTH_BYTES)
+        index += 2 * LENGTH_BYTES
+        elements[i] = payload[index:index + size]
+        index += size
+    assert index == len(payload)
+    return join_series(elements, [typ.elem_type] * length)
+
+
+def diff(old, new, typ):
+    """
+    Return the diff from ``old`` to ``new``, serializations of the container type ``typ``.
+    """
+    types = list(typ.get_fields().values())
+    records = []
+    for field_index, (field_typ, old_part, new_part) in enumerate(
+            zip(types, split_series(old, types), split_series(new, types))):
+        if old_part == new_part:
+            continue
+        kind, payload = FIELD, new_part
+        if has_elements(field_typ):
+            elements_payload = diff_elements(old_part, new_part, field_typ)
+            if len(elements_payload) < len(new_part):
+                kind, payload = ELEMENTS, elements_payload
+        records.append(bytes([kind]) + field_index.to_bytes(FIELD_INDEX_BYTES, 'little')
+                       + encode_length(len(payload)) + payload)
+    return b''.join(records)
+
+
+def apply_diff(data, diff_data, typ):
+    """
+    Return the serialization of the container type ``typ`` obtained by applying ``diff_data`` to ``data``.
+    """
+    types = list(typ.get_fields().values())
+    parts = list(split_series(data, types))
+    index = 0
+    while index < len(diff_data):
+        kind = diff_data[index]
+        field_index = int.from_bytes(diff_data[index + 1:index + 1 + FIELD_INDEX_BYTES], 'little')
+        index += 1 + FIELD_INDEX_BYTES
+        length = decode_length(diff_data, index)
+        index += LENGTH_BYTES
+        payload = diff_data[index:index + length]
+        index += length
+        if kind == FIELD:
+            parts[field_index] = payload
+        elif kind == ELEMENTS:
+            parts[field_index] = apply_elements(parts[field_index], payload, types[field_index])
+        else:
+            raise Exception(f"Unknown diff record kind: {kind}")
+    return join_series(parts, types)
+
+
+class SnapshotStore(object):
+    """
+    Snapshots of values of the container type ``typ`` in ``directory``, by increasing integer keys, e.g. slots.
+    A full base is written for the first key, and then for the first key at least ``base_interval`` after the
+     last base. Other keys are written as diffs to the previous key.
+    """
+
+    def __init__(self, directory, typ, base_interval):
+        assert base_interval > 0
+        self.directory = directory
+        self.typ = typ
+        self.base_interval = base_interval
+        os.makedirs(directory, exist_ok=True)
+        self.bases = []
+        self.diffs = []
+        for name in os.listdir(directory):
+            match = FILE_NAME_REGEX.match(name)
+            if match is not None:
+                (self.bases if match.group(2) == 'base' else self.diffs).append(int(match.group(1)))
+        self.bases.sort()
+        self.diffs.sort()
+        # Serialization of the last value, to diff the next one against
+        self.last_key = None
+        self.last = None
+        if len(self.bases) > 0:
+            self.last_key = max(self.bases + self.diffs)
+
+    def path(self, key, kind):
+        return os.path.join(self.directory, f'{key}.{kind}')
+
+    def keys(self):
+        return sorted(self.bases + self.diffs)
+
+    def put(self, key, value):
+        self.put_serialized(key, serialize(value))
+
+    def put_serialized(self, key, data):
+        assert self.last_key is None or key > self.last_key
+        if len(self.bases) == 0 or key - self.bases[-1] >= self.base_interval:
+            with open(self.path(key, 'base'), 'wb') as f:
+                f.write(data)
+            self.bases.append(key)
+        else:
+            if self.last is None:
+                self.last = self.get_serialized(self.last_key)
+            with open(self.path(key, 'diff'), 'wb') as f:
+                f.write(diff(self.last, data, self.typ))
+            self.diffs.append(key)
+        self.last_key = key
+        self.last = data
+
+    def get(self, key):
+        return deserialize(self.get_serialized(key), self.typ)
+
+    def get_serialized(self, key):
+        if key == self.last_key and self.last is not None:
+            return self.last
+        if key in self.bases:
+            base_key = key
+        else:
+            assert key in self.diffs
+            base_key = max(base for base in self.bases if base < key)
+        with open(self.path(base_key, 'base'), 'rb') as f:
+            data = f.read()
+        for diff_key in self.diffs:
+            if base_key < diff_key <= key:
+                with open(self.path(diff_key, 'diff'), 'rb') as f:
+                    data = apply_diff(data, f.read(), self.typ)
+        return data
+
+    def size(self):
+        """
+        Return the total size of the snapshots on disk, in bytes.
+        """
+        return sum(os.path.getsize(self.path(key, 'base')) for key in self.bases) + \
+            sum(os.path.getsize(self.path(key, 'diff')) for key in self.diffs)
@@ -1,8 +1,10 @@
+from typing import Sequence
+
 from ..merkle_minimal import merkleize_chunks
 from ..hash_function import hash
 from .ssz_typing import (
-    SSZValue, SSZType, BasicValue, BasicType, Series, Elements, Bits, boolean, Container, List, Bytes,
-    Bitlist, Bitvector, uint,
+    SSZValue, SSZType, BasicValue, BasicType, Series, Elements, Bits, boolean, Container, List, Vector, Bytes,
+    BytesN, Bitlist, Bitvector, uint,
 )
 
 # SSZ Serialization
@@ -34,7 +36,22 @@ def deserialize_basic(value, typ: BasicType):
 
 
 def is_zero(obj: SSZValue):
-    return type(obj).default() == obj
+    """
+    Return whether ``obj`` equals the default value of its type, structurally:
+     unlike comparing with ``type(obj).default()``, containers are compared without hashing.
+    """
+    if isinstance(obj, BasicValue):
+        return obj == 0
+    elif isinstance(obj, (List, Bitlist, Bytes)):
+        return len(obj) == 0
+    elif isinstance(obj, BytesN):
+        return obj.count(0) == len(obj)
+    elif isinstance(obj, Bitvector):
+        return not any(obj)
+    elif isinstance(obj, (Vector, Container)):
+        return all(is_zero(element) for element in obj)
+    else:
+        return type(obj).default() == obj
 
 
 def serialize(obj: SSZValue):
@@ -88,6 +105,142 @@ def encode_series(values: Series):
     return b''.join(fixed_parts + variable_parts)
 
 
+def serialized_size(obj: SSZValue) -> int:
+    """
+    The length of the serialization of ``obj``, without serializing it.
+    """
+    typ = obj.type()
+    if typ.is_fixed_size():
+        return fixed_size(typ)
+    elif isinstance(obj, Bitlist):
+        return len(obj) // 8 + 1
+    elif isinstance(obj, Bytes):
+        return len(obj)
+    elif isinstance(obj, (List, Vector)) and typ.elem_type.is_fixed_size():
+        return len(obj) * fixed_size(typ.elem_type)
+    elif isinstance(obj, Series):
+        return sum(
+            serialized_size(value) + (0 if value.type().is_fixed_size() else BYTES_PER_LENGTH_OFFSET)
+            for value in obj
+        )
+    else:
+        raise Exception(f"Type not supported: {typ}")
+
+
+# SSZ Deserialization
+# -----------------------------
+
+
+def fixed_size(typ: SSZType) -> int:
+    """
+    The length of the serialization of a fixed-size type.
+    """
+    if issubclass(typ, BasicValue):
+        return typ.byte_len
+    elif issubclass(typ, Bitvector):
+        return (typ.length + 7) // 8
+    elif issubclass(typ, BytesN):
+        return typ.length
+    elif issubclass(typ, Vector):
+        return typ.length * fixed_size(typ.elem_type)
+    elif issubclass(typ, Container):
+        return sum(fixed_size(field_typ) for field_typ in typ.get_fields().values())
+    else:
+        raise Exception(f"Type not fixed-size: {typ}")
+
+
+def read_offset(data: bytes, index: int) -> int:
+    return int.from_bytes(data[index:index + BYTES_PER_LENGTH_OFFSET], 'little')
+
+
+def split_series(data: bytes, types: Sequence[SSZType]) -> Sequence[bytes]:
+    """
+    Split the serialization of a series into the serializations of its elements, of ``types``.
+    """
+    sizes = [fixed_size(typ) if typ.is_fixed_size() else BYTES_PER_LENGTH_OFFSET for typ in types]
+    assert sum(sizes) <= len(data)
+    parts = []
+    # Variable-size parts span from their offset to the next offset, or the end of the data
+    variable_parts = []
+    index = 0
+    for typ, size in zip(types, sizes):
+        if typ.is_fixed_size():
+            parts.append(data[index:index + size])
+        else:
+            variable_parts.append(len(parts))
+            parts.append(read_offset(data, index))
+        index += size
+    offsets = [parts[i] for i in variable_parts] + [len(data)]
+    if len(variable_parts) > 0:
+        assert offsets[0] == index
+    for i, part_index in enumerate(variable_parts):
+        assert offsets[i] <= offsets[i + 1]
+        parts[part_index] = data[offsets[i]:offsets[i + 1]]
+    return parts
+
+
+def split_elements(data: bytes, typ: SSZType) -> Sequence[bytes]:
+    """
+    Split the serialization of a ``List`` or ``Vector`` into the serializations of its elements.
+    """
+    elem_type = typ.elem_type
+    if elem_type.is_fixed_size():
+        elem_size = fixed_size(elem_type)
+        assert len(data) % elem_size == 0
+        count = len(data) // elem_size
+        assert count <= typ.length
+        return [data[i:i + elem_size] for i in range(0, len(data), elem_size)]
+    else:
+        first_offset = read_offset(data, 0) if len(data) > 0 else 0
+        assert first_offset % BYTES_PER_LENGTH_OFFSET == 0
+        count = first_offset // BYTES_PER_LENGTH_OFFSET
+        assert count <= typ.length
+        return split_series(data, [elem_type] * count)
+
+
+def join_series(parts: Sequence[bytes], types: Sequence[SSZType]) -> bytes:
+    """
+    Join the serializations of the elements of a series, of ``types``. The inverse of ``split_series``.
+    """
+    offset = sum(len(part) if typ.is_fixed_size() else BYTES_PER_LENGTH_OFFSET for part, typ in zip(parts, types))
+    fixed_parts = []
+    variable_parts = []
+    for part, typ in zip(parts, types):
+        if typ.is_fixed_size():
+            fixed_parts.append(part)
+        else:
+            fixed_parts.append(offset.to_bytes(BYTES_PER_LENGTH_OFFSET, 'little'))
+            variable_parts.append(part)
+            offset += len(part)
+    return b''.join(fixed_parts + variable_parts)
+
+
+def deserialize(data: bytes, typ: SSZType) -> SSZValue:
+    if issubclass(typ, BasicValue):
+        assert len(data) == typ.byte_len
+        return deserialize_basic(data, typ)
+    elif issubclass(typ, Bitvector):
+        assert len(data) == fixed_size(typ)
+        return typ(data[i // 8] >> (i % 8) & 1 for i in range(typ.length))
+    elif issubclass(typ, Bitlist):
+        # The highest set bit delimits the bits
+        assert len(data) > 0 and data[-1] != 0
+        length = (len(data) - 1) * 8 + data[-1].bit_length() - 1
+        return typ(data[i // 8] >> (i % 8) & 1 for i in range(length))
+    elif issubclass(typ, (Bytes, BytesN)):
+        return typ(data)
+    elif issubclass(typ, (List, Vector)):
+        return typ(deserialize(part, typ.elem_type) for part in split_elements(data, typ))
+    elif issubclass(typ, Container):
+        fields = typ.get_fields()
+        parts = split_series(data, list(fields.values()))
+        return typ(**{
+            name: deserialize(part, field_typ) for (name, field_typ), part in zip(fields.items(), parts)
+        })
+    else:
+        raise Exception(f"Type not supported: {typ}")
+
+
 # SSZ Hash-tree-root
 # -----------------------------
 
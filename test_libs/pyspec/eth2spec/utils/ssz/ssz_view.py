@@ -0,0 +1,194 @@
+"""
+Read-only lazy views of serialized SSZ values, e.g. of a memory-mapped state file.
+
+Containers, lists and vectors are views: offsets are resolved on access, and only the accessed fields and
+ elements are decoded. ``hash_tree_root`` of a view hashes the serialization, decoding only bits and byte lists.
+"""
+import mmap
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from ..merkle_minimal import merkleize_chunks
+from .ssz_impl import (
+    BYTES_PER_LENGTH_OFFSET, chunk_count, chunkify, deserialize, fixed_size, hash_tree_root, mix_in_length,
+    read_offset,
+)
+from .ssz_typing import BasicValue, BytesN, Container, List, SSZType, Vector
+
+# Positions of the fields of container types, in their fixed-size part: (type, position, size or None)
+field_layouts: Dict[SSZType, Dict[str, Tuple[SSZType, int, int]]] = {}
+
+
+def get_field_layout(typ: SSZType):
+    if typ not in field_layouts:
+        layout = {}
+        position = 0
+        for name, field_typ in typ.get_fields().items():
+            size = fixed_size(field_typ) if field_typ.is_fixed_size() else None
+            layout[name] = (field_typ, position, size)
+            position += BYTES_PER_LENGTH_OFFSET if size is None else size
+        field_layouts[typ] = layout
+    return field_layouts[typ]
+
+
+def is_view_type(typ: SSZType) -> bool:
+    return issubclass(typ, (Container, List, Vector))
+
+
+def get_view(typ: SSZType, data, start: int = 0, end: int = None):
+    """
+    Return a view of the value of ``typ`` serialized in ``data[start:end]``, or the value if it is not a view type.
+    ``data`` may be any buffer supporting slicing, e.g. ``bytes`` or ``mmap``. It is not copied.
+    """
+    end = len(data) if end is None else end
+    if issubclass(typ, Container):
+        return ContainerView(typ, data, start, end)
+    elif issubclass(typ, (List, Vector)):
+        return ElementsView(typ, data, start, end)
+    else:
+        return deserialize(bytes(data[start:end]), typ)
+
+
+class SSZView(ABC):
+    """
+    Attributes are underscored, not to shadow the fields of container views.
+    """
+
+    def __init__(self, typ: SSZType, data, start: int, end: int):
+        self._typ = typ
+        self._data = data
+        self._start = start
+        self._end = end
+
+    def serialize(self) -> bytes:
+        return bytes(self._data[self._start:self._end])
+
+    def value(self):
+        """
+        Decode the whole value.
+        """
+        return deserialize(self.serialize(), self._typ)
+
+    @abstractmethod
+    def hash_tree_root(self) -> bytes:
+        ...
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._typ.__name__}, [{self._start}:{self._end}])'
+
+
+def hash_tree_root_at(typ: SSZType, data, start: int, end: int) -> bytes:
+    """
+    Return the ``hash_tree_root`` of the value of ``typ`` serialized in ``data[start:end]``,
+     without decoding the views it contains, nor byte vectors.
+    """
+    if is_view_type(typ):
+        return get_view(typ, data, start, end).hash_tree_root()
+    elif issubclass(typ, BytesN):
+        return merkleize_chunks(chunkify(bytes(data[start:end])))
+    else:
+        return hash_tree_root(deserialize(bytes(data[start:end]), typ))
+
+
+class ContainerView(SSZView):
+    """
+    View of a serialized container: its fields are attributes, decoded or viewed on access.
+    """
+
+    def get_bounds(self, name: str) -> Tuple[int, int]:
+        layout = get_field_layout(self._typ)
+        _, position, size = layout[name]
+        start = self._start + position
+        if size is not None:
+            return start, start + size
+        # A variable-size part ends at the offset of the next variable-size field, or at the end
+        offset = self._start + read_offset(self._data, start)
+        end = self._end
+        for _, next_position, next_size in list(layout.values())[list(layout).index(name) + 1:]:
+            if next_size is None:
+                end = self._start + read_offset(self._data, self._start + next_position)
+                break
+        assert offset <= end <= self._end
+        return offset, end
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        layout = get_field_layout(self._typ)
+        if name not in layout:
+            raise AttributeError(f"{self._typ.__name__} has no field {name}")
+        start, end = self.get_bounds(name)
+        return get_view(layout[name][0], self._data, start, end)
+
+    def field_hash_tree_root(self, name: str) -> bytes:
+        return hash_tree_root_at(get_field_layout(self._typ)[name][0], self._data, *self.get_bounds(name))
+
+    def hash_tree_root(self) -> bytes:
+        return merkleize_chunks([self.field_hash_tree_root(name) for name in get_field_layout(self._typ)])
+
+
+class ElementsView(SSZView):
+    """
+    View of a serialized ``List`` or ``Vector``, its elements are decoded or viewed on access.
+    """
+
+    def __init__(self, typ: SSZType, data, start: int, end: int):
+        super().__init__(typ, data, start, end)
+        elem_type = typ.elem_type
+        self._elem_size = fixed_size(elem_type) if elem_type.is_fixed_size() else None
+        if self._elem_size is not None:
+            assert (end - start) % self._elem_size == 0
+            self._length = (end - start) // self._elem_size
+        else:
+            self._length = read_offset(data, start) // BYTES_PER_LENGTH_OFFSET if end > start else 0
+        assert self._length <= typ.length
+
+    def __len__(self):
+        return self._length
+
+    def get_bounds(self, index: int) -> Tuple[int, int]:
+        if index < 0 or index >= self._length:
+            raise IndexError(f"index {index} out of bounds of {self._typ.__name__} view of length {self._length}")
+        if self._elem_size is not None:
+            start = self._start + index * self._elem_size
+            return start, start + self._elem_size
+        position = self._start + index * BYTES_PER_LENGTH_OFFSET
+        start = self._start + read_offset(self._data, position)
+        if index + 1 < self._length:
+            end = self._start + read_offset(self._data, position + BYTES_PER_LENGTH_OFFSET)
+        else:
+            end = self._end
+        assert start <= end <= self._end
+        return start, end
+
+    def __getitem__(self, index: int):
+        start, end = self.get_bounds(index)
+        return get_view(self._typ.elem_type, self._data, start, end)
+
+    def __iter__(self):
+        return (self[i] for i in range(self._length))
+
+    def hash_tree_root(self) -> bytes:
+        if issubclass(self._typ.elem_type, BasicValue):
+            # The serialization of basic elements is their packing
+            leaves = chunkify(self.serialize())
+        else:
+            leaves = [hash_tree_root_at(self._typ.elem_type, self._data, *self.get_bounds(i))
+                      for i in range(self._length)]
+        if issubclass(self._typ, List):
+            return mix_in_length(merkleize_chunks(leaves, limit=chunk_count(self._typ)), self._length)
+        return merkleize_chunks(leaves)
+
+
+@contextmanager
+def open_view(path: str, typ: SSZType):
+    """
+    Memory-map the SSZ file at ``path``, and yield a view of its value of ``typ``. The file is unmapped on exit.
+    """
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield get_view(typ, data)
+    finally:
+        data.close()
@@ -1,8 +1,10 @@
 from typing import Iterable
-from .ssz_impl import serialize, hash_tree_root
+from .ssz_impl import (
+    serialize, serialized_size, deserialize, hash_tree_root, join_series, split_series, is_zero,
+)
 from .ssz_typing import (
     bit, boolean, Container, List, Vector, Bytes, BytesN,
-    Bitlist, Bitvector,
+    Bitlist, Bitvector, coerce_type_maybe,
     uint8, uint16, uint32, uint64, uint256, byte
 )
 from ..hash_function import hash as bytes_hash
@@ -259,6 +261,36 @@ def test_serialize(name, value, serialized, _):
     assert serialize(value) == bytes.fromhex(serialized)
 
 
+@pytest.mark.parametrize("name, value, serialized, _", test_data)
+def test_deserialize(name, value, serialized, _):
+    deserialized = deserialize(bytes.fromhex(serialized), value.type())
+    assert deserialized.type() == value.type()
+    assert serialize(deserialized) == bytes.fromhex(serialized)
+    assert hash_tree_root(deserialized) == hash_tree_root(value)
+
+
+@pytest.mark.parametrize("name, value, serialized, _", test_data)
+def test_serialized_size(name, value, serialized, _):
+    assert serialized_size(value) == len(bytes.fromhex(serialized))
+
+
+@pytest.mark.parametrize("name, value, serialized, _", test_data)
+def test_split_join_series(name, value, serialized, _):
+    if not isinstance(value, Container):
+        return
+    types = list(value.type().get_fields().values())
+    parts = split_series(bytes.fromhex(serialized), types)
+    assert list(parts) == [serialize(v) for v in value]
+    assert join_series(parts, types) == bytes.fromhex(serialized)
+
+
 @pytest.mark.parametrize("name, value, _, root", test_data)
 def test_hash_tree_root(name, value, _, root):
     assert hash_tree_root(value) == bytes.fromhex(root)
+
+
+@pytest.mark.parametrize("name, value, _, root", test_data)
+def test_is_zero(name, value, _, root):
+    # Same as comparing with the default value, which compares the roots of containers
+    assert is_zero(value) == (value.type().default() == value)
+    assert is_zero(coerce_type_maybe(value.type().default(), value.type()))
@@ -0,0 +1,89 @@
+import pytest
+
+from .ssz_impl import serialize, hash_tree_root
+from .ssz_typing import Bitlist, Bytes, Container, List, Vector, uint64
+from .ssz_view import SSZView, ContainerView, ElementsView, get_view, open_view
+from .test_ssz_impl import test_data, ComplexTestStruct, VarTestStruct
+
+
+class Record(Container):
+    index: uint64
+    data: Bytes[16]
+    bits: Bitlist[8]
+
+
+class Archive(Container):
+    slot: uint64
+    records: List[Record, 8]
+    roots: Vector[Vector[uint64, 2], 3]
+    empty: List[Record, 8]
+    balances: List[uint64, 100]
+
+
+def assert_view_equals(view, value):
+    if isinstance(view, ContainerView):
+        for name in value.get_fields():
+            assert_view_equals(getattr(view, name), getattr(value, name))
+    elif isinstance(view, ElementsView):
+        assert len(view) == len(value)
+        for element_view, element in zip(view, value):
+            assert_view_equals(element_view, element)
+    else:
+        assert view == value
+        assert view.type() == value.type()
+    if isinstance(view, SSZView):
+        assert view.value() == value
+        assert view.hash_tree_root() == hash_tree_root(value)
+
+
+@pytest.mark.parametrize("name, value, serialized, _", test_data)
+def test_view(name, value, serialized, _):
+    assert_view_equals(get_view(value.type(), bytes.fromhex(serialized)), value)
+
+
+def make_archive():
+    return Archive(
+        slot=7,
+        records=[Record(index=i, data=b'\x01' * i, bits=[True] * i) for i in range(5)],
+        roots=[[1, 2], [3, 4], [5, 6]],
+        balances=list(range(33)),
+    )
+
+
+def test_access(tmpdir):
+    archive = make_archive()
+    path = str(tmpdir.join('archive.ssz'))
+    with open(path, 'wb') as f:
+        f.write(serialize(archive))
+
+    with open_view(path, Archive) as view:
+        assert view.slot == 7
+        assert view.records[3].data == Bytes[16](b'\x01' * 3)
+        assert view.records[4].bits == archive.records[4].bits
+        assert view.roots[2][1] == 6
+        assert len(view.empty) == 0
+        assert view.balances[32] == 32
+        assert view.records.hash_tree_root() == hash_tree_root(archive.records)
+        assert view.field_hash_tree_root('balances') == hash_tree_root(archive.balances)
+        assert view.hash_tree_root() == hash_tree_root(archive)
+        assert_view_equals(view, archive)
+
+        with pytest.raises(IndexError):
+            view.records[5]
+        with pytest.raises(AttributeError):
+            view.foo
+
+
+def test_view_offsets():
+    value = ComplexTestStruct(E=VarTestStruct(B=[1, 2, 3]), G=[VarTestStruct(B=[4]), VarTestStruct(B=[5, 6])])
+    data = serialize(value)
+    view = get_view(ComplexTestStruct, data)
+    # Views slice the data only when decoding
+    assert view.G[1].B._data is data
+    assert list(view.G[1].B) == [5, 6]
+    assert list(view.E.B) == [1, 2, 3]
+
+
+def test_view_is_abstract():
+    with pytest.raises(TypeError):
+        SSZView(Record, serialize(Record()), 0, len(serialize(Record())))
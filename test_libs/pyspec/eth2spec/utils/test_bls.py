@@ -0,0 +1,25 @@
+import threading
+
+from . import bls
+
+
+def test_use_bls():
+    active = bls.bls_active
+    with bls.use_bls(not active):
+        assert bls.is_bls_active() is not active
+        with bls.use_bls(active):
+            assert bls.is_bls_active() is active
+        assert bls.is_bls_active() is not active
+        # Other threads use the flag of the module
+        flags = []
+        thread = threading.Thread(target=lambda: flags.append(bls.is_bls_active()))
+        thread.start()
+        thread.join()
+        assert flags == [active]
+    assert bls.is_bls_active() is active
+    assert bls.bls_active is active
+
+
+def test_use_bls_verify():
+    with bls.use_bls(False):
+        assert bls.bls_verify(bls.STUB_PUBKEY, b'\x00' * 32, bls.STUB_SIGNATURE, b'\x00' * 8)
@@ -1,5 +1,5 @@
 import pytest
-from .merkle_minimal import zerohashes, merkleize_chunks, get_merkle_root
+from .merkle_minimal import zerohashes, merkleize_chunks, get_merkle_root, IncrementalMerkleTree
 from .hash_function import hash
 
 
@@ -78,3 +78,15 @@ def test_merkleize_chunks_and_get_merkle_root(count, limit, value):
     else:
         assert merkleize_chunks(chunks, limit=limit) == value
         assert get_merkle_root(chunks, pad_to=limit) == value
+
+
+@pytest.mark.parametrize(
+    'depth',
+    [1, 2, 4],
+)
+def test_incremental_merkle_tree(depth):
+    tree = IncrementalMerkleTree(depth)
+    assert tree.get_root() == z(depth)
+    for count in range(1, 2**depth):
+        tree.append(e(count - 1))
+        assert tree.get_root() == merkleize_chunks([e(i) for i in range(count)], limit=2**depth)
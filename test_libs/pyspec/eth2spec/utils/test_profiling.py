@@ -0,0 +1,105 @@
+from io import StringIO
+from types import ModuleType
+
+from .profiling import Profile, bucket_by_ssz_type
+from .hash_function import hash
+from .ssz.ssz_impl import hash_tree_root
+from .ssz.ssz_typing import Bitlist, BytesN, Container, List, Vector, uint64
+
+SOURCE = '''
+def leaf(x):
+    return _hash(x)
+
+
+def root(x):
+    return hash_tree_root(x)
+
+
+def node(x):
+    return leaf(x) + leaf(x)
+'''
+
+
+class Foo(Container):
+    a: uint64
+
+
+def test_bucket_by_ssz_type():
+    assert bucket_by_ssz_type(Foo(a=1)) == 'Foo'
+    assert bucket_by_ssz_type(uint64(1)) == 'uint64'
+    assert bucket_by_ssz_type(List[Foo, 16]()) == 'List[Foo, 16]'
+    assert bucket_by_ssz_type(List[uint64, 16]()) == 'List[uint64, 16]'
+    assert bucket_by_ssz_type(Vector[BytesN[32], 4].default()) == 'Vector[BytesN[32], 4]'
+    assert bucket_by_ssz_type(Bitlist[8]()) == 'Bitlist[8]'
+
+
+def make_module(name='instrumented'):
+    module = ModuleType(name)
+    module._hash = hash
+    module.hash_tree_root = hash_tree_root
+    exec(SOURCE, module.__dict__)
+    return module
+
+
+def test_instrument():
+    module = make_module()
+    profile = Profile()
+    profile.instrument(module.__dict__, module.__name__)
+
+    assert module.node(b'\x01' * 64) == hash(b'\x01' * 64) * 2
+    module.leaf(b'\x02' * 32)
+    module.root(Foo(a=1))
+    module.root(uint64(2))
+
+    assert profile.calls == {
+        ('node', ''): 1,
+        ('leaf', ''): 3,
+        ('_hash', 'bytes[64]'): 2,
+        ('_hash', 'bytes[32]'): 1,
+        ('root', ''): 2,
+        ('hash_tree_root', 'Foo'): 1,
+        ('hash_tree_root', 'uint64'): 1,
+    }
+    # Callees are included in the total time, not in the own time
+    assert profile.total_time[('node', '')] >= profile.total_time[('leaf', '')] * 2 / 3
+    hash_time = profile.total_time[('_hash', 'bytes[64]')]
+    assert profile.own_time[('node', '')] <= profile.total_time[('node', '')] - hash_time
+
+
+def test_only_module_functions():
+    module = make_module()
+    module.imported = make_module('other').leaf
+    Profile().instrument(module.__dict__, module.__name__)
+    assert module.imported.__module__ == 'other'
+    assert not hasattr(module.imported, '__wrapped__')
+    assert hasattr(module.leaf, '__wrapped__')
+
+
+def test_exception():
+    module = make_module()
+    profile = Profile()
+    profile.instrument(module.__dict__, module.__name__)
+    try:
+        module.leaf(None)
+    except TypeError:
+        pass
+    assert profile.calls[('leaf', '')] == 1
+    assert profile.callee_time == [profile.total_time[('leaf', '')]]
+
+
+def test_dump_and_reset():
+    module = make_module()
+    profile = Profile()
+    profile.instrument(module.__dict__, module.__name__)
+    module.node(b'\x01' * 64)
+
+    rows = profile.stats()
+    assert [row[0] for row in rows][0] == 'node'
+    out = StringIO()
+    profile.dump(file=out, limit=2)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 3
+    assert lines[1].split()[:2] == ['node', '1']
+
+    profile.reset()
+    assert profile.stats() == []
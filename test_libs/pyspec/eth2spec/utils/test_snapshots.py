@@ -0,0 +1,98 @@
+import os
+from random import Random
+
+from eth2spec.utils.snapshots import SnapshotStore, apply_diff, diff
+from eth2spec.utils.ssz.ssz_impl import serialize
+from eth2spec.utils.ssz.ssz_typing import Bitlist, Bytes32, Container, List, Vector, uint8, uint64
+
+
+class Checkpoint(Container):
+    epoch: uint64
+    root: Bytes32
+
+
+class Record(Container):
+    index: uint64
+    bits: Bitlist[16]
+
+
+class State(Container):
+    slot: uint64
+    checkpoint: Checkpoint
+    roots: Vector[Bytes32, 8]
+    balances: List[uint64, 64]
+    records: List[Record, 16]
+    bits: Bitlist[32]
+    extra: List[uint8, 16]
+
+
+def mutate(rng, state):
+    state.slot += 1
+    if rng.random() < 0.3:
+        state.checkpoint = Checkpoint(epoch=state.checkpoint.epoch + 1, root=Bytes32(bytes([rng.randrange(256)]) * 32))
+    state.roots[state.slot % 8] = Bytes32(state.slot.to_bytes(32, 'little'))
+    for _ in range(rng.randrange(3)):
+        if len(state.balances) > 0:
+            state.balances[rng.randrange(len(state.balances))] += rng.randrange(1000)
+    if rng.random() < 0.5 and len(state.balances) < 64:
+        state.balances.append(uint64(rng.randrange(2**64)))
+    if rng.random() < 0.2:
+        state.balances = state.balances[:rng.randrange(len(state.balances) + 1)]
+    if rng.random() < 0.5 and len(state.records) < 16:
+        state.records.append(Record(index=state.slot, bits=[rng.random() < 0.5 for _ in range(rng.randrange(17))]))
+    if rng.random() < 0.3 and len(state.records) > 0:
+        state.records[rng.randrange(len(state.records))].bits = [True] * rng.randrange(17)
+    if rng.random() < 0.2:
+        state.records = state.records[:rng.randrange(len(state.records) + 1)]
+    if rng.random() < 0.3:
+        state.bits = [rng.random() < 0.5 for _ in range(rng.randrange(33))]
+    if rng.random() < 0.1:
+        state.extra = [uint8(rng.randrange(256)) for _ in range(rng.randrange(17))]
+
+
+def make_states(count, seed=1):
+    rng = Random(seed)
+    state = State()
+    states = [state.copy()]
+    for _ in range(count - 1):
+        mutate(rng, state)
+        states.append(state.copy())
+    return states
+
+
+def test_diff():
+    states = make_states(50)
+    for old, new in zip(states, states[1:]):
+        old_data, new_data = serialize(old), serialize(new)
+        diff_data = diff(old_data, new_data, State)
+        assert apply_diff(old_data, diff_data, State) == new_data
+    assert diff(serialize(states[-1]), serialize(states[-1]), State) == b''
+
+
+def test_store(tmpdir):
+    states = make_states(40)
+    store = SnapshotStore(str(tmpdir), State, base_interval=16)
+    for slot, state in enumerate(states):
+        store.put(slot, state)
+
+    assert store.keys() == list(range(40))
+    assert store.bases == [0, 16, 32]
+    assert sorted(os.listdir(str(tmpdir)))[:2] == ['0.base', '1.diff']
+    for slot, state in enumerate(states):
+        assert store.get(slot) == state
+    assert store.size() < sum(len(serialize(state)) for state in states)
+
+
+def test_reopen(tmpdir):
+    states = make_states(30, seed=2)
+    store = SnapshotStore(str(tmpdir), State, base_interval=8)
+    for slot, state in enumerate(states[:20]):
+        store.put(slot * 2, state)
+
+    store = SnapshotStore(str(tmpdir), State, base_interval=8)
+    assert store.last_key == 38
+    for slot, state in enumerate(states[20:], 20):
+        store.put(slot * 2, state)
+    assert store.bases == [0, 8, 16, 24, 32, 40, 48, 56]
+    for slot, state in enumerate(states):
+        assert store.get(slot * 2) == state
@@ -0,0 +1,134 @@
+"""
+Bulk packing and unpacking of compact committees, over uint64 arrays of compact validators.
+
+A compact validator packs ``index << 16 | slashed << 15 | effective_balance // EFFECTIVE_BALANCE_INCREMENT``
+ in a uint64, the packing is computed with NumPy for all the members of the committees at once.
+
+Usage: ``install(spec)`` swaps the compact committee functions of the given phase 1 spec module,
+ ``uninstall(spec)`` restores them.
+``get_persistent_committee_pubkeys_and_balances(spec, memory, epoch)`` is the light client side.
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+VECTORIZED_FUNCTIONS = (
+    'committee_to_compact_committee',
+    'committees_to_compact_committees',
+)
+
+BALANCE_MASK = np.uint64(2**15 - 1)
+
+# Original spec functions, per spec module, for uninstalling
+_installed: Dict[str, Dict[str, Any]] = {}
+
+
+def pack_compact_validators(indices, slashed, balances):
+    """
+    Return the compact validators of the arrays of ``indices``, ``slashed`` flags,
+     and ``balances`` in increments, like ``pack_compact_validator`` of each.
+    """
+    return ((np.asarray(indices, dtype=np.uint64) << np.uint64(16))
+            + (np.asarray(slashed, dtype=np.uint64) << np.uint64(15))
+            + np.asarray(balances, dtype=np.uint64))
+
+
+def unpack_compact_validators(compact_validators):
+    """
+    Return the arrays of indices, slashed flags and balances in increments of ``compact_validators``,
+     like ``unpack_compact_validator`` of each.
+    """
+    compact_validators = np.asarray(compact_validators, dtype=np.uint64)
+    return (compact_validators >> np.uint64(16),
+            ((compact_validators >> np.uint64(15)) & np.uint64(1)).astype(bool),
+            compact_validators & BALANCE_MASK)
+
+
+def get_compact_validators(committee):
+    """
+    Return the compact validators of the ``CompactCommittee`` ``committee`` as a uint64 array.
+    """
+    return np.fromiter(committee.compact_validators, dtype=np.uint64, count=len(committee.compact_validators))
+
+
+def committees_to_compact_committees(spec, state, committees):
+    """
+    Return the ``CompactCommittee`` of each of ``committees``, packing all their members at once.
+    """
+    members = [index for committee in committees for index in committee]
+    validators = [state.validators[i] for i in members]
+    count = len(members)
+    compact_validators = pack_compact_validators(
+        np.fromiter(members, dtype=np.uint64, count=count),
+        np.fromiter((v.slashed for v in validators), dtype=bool, count=count),
+        np.fromiter((v.effective_balance for v in validators), dtype=np.uint64, count=count)
+        // np.uint64(spec.EFFECTIVE_BALANCE_INCREMENT),
+    ).tolist()
+    compact_committees = []
+    start = 0
+    for committee in committees:
+        end = start + len(committee)
+        compact_committees.append(spec.CompactCommittee(
+            pubkeys=[v.pubkey for v in validators[start:end]],
+            compact_validators=compact_validators[start:end],
+        ))
+        start = end
+    return compact_committees
+
+
+def committee_to_compact_committee(spec, state, committee):
+    return committees_to_compact_committees(spec, state, [committee])[0]
+
+
+def get_persistent_committee_pubkeys_and_balances(spec, memory, epoch):
+    """
+    Return pubkeys and balances for the persistent committee at ``epoch``, from the ``LightClientMemory``
+     ``memory`` of the light client sync protocol, unpacking the committees at once.
+    """
+    current_period = spec.compute_epoch_at_slot(memory.header.slot) // spec.EPOCHS_PER_SHARD_PERIOD
+    next_period = epoch // spec.EPOCHS_PER_SHARD_PERIOD
+    assert next_period in (current_period, current_period + 1)
+    if next_period == current_period:
+        earlier_committee, later_committee = memory.previous_committee, memory.current_committee
+    else:
+        earlier_committee, later_committee = memory.current_committee, memory.next_committee
+
+    offset = np.uint64(epoch % spec.EPOCHS_PER_SHARD_PERIOD)
+    period = np.uint64(spec.EPOCHS_PER_SHARD_PERIOD)
+    earlier_indices, _, earlier_balances = unpack_compact_validators(get_compact_validators(earlier_committee))
+    later_indices, _, later_balances = unpack_compact_validators(get_compact_validators(later_committee))
+    earlier_members = np.nonzero(offset < earlier_indices % period)[0]
+    later_members = np.nonzero(offset >= later_indices % period)[0]
+    pubkeys = ([earlier_committee.pubkeys[i] for i in earlier_members.tolist()]
+               + [later_committee.pubkeys[i] for i in later_members.tolist()])
+    balances = np.concatenate((earlier_balances[earlier_members], later_balances[later_members])).tolist()
+    return pubkeys, balances
+
+
+def wrap_vectorized(spec, fn):
+    def entry(state, *args):
+        return fn(spec, state, *args)
+    return entry
+
+
+def install(spec):
+    """
+    Replace the compact committee functions of ``spec`` with their vectorized equivalents.
+    """
+    if spec.__name__ in _installed:
+        return
+    _installed[spec.__name__] = {name: getattr(spec, name) for name in VECTORIZED_FUNCTIONS}
+    for name in VECTORIZED_FUNCTIONS:
+        setattr(spec, name, wrap_vectorized(spec, globals()[name]))
+
+
+def uninstall(spec):
+    """
+    Restore the spec compact committee functions of ``spec``.
+    """
+    for name, fn in _installed.pop(spec.__name__, {}).items():
+        setattr(spec, name, fn)
+
+
+def is_installed(spec) -> bool:
+    return spec.__name__ in _installed
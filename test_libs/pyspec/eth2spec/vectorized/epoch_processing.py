@@ -0,0 +1,271 @@
+"""
+Vectorized epoch processing over a columnar view of the validator registry.
+
+The registry-wide epoch sub-transitions are re-implemented as NumPy array operations,
+ producing the exact same post-state as the spec functions they replace.
+Each sub-transition loads the registry columns, computes on the arrays,
+ and writes only the changed entries back into the SSZ state.
+
+Usage: ``install(spec)`` swaps the sub-transitions of the given spec module, ``uninstall(spec)`` restores them.
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+VALIDATOR_COLUMNS = (
+    'effective_balance',
+    'slashed',
+    'activation_eligibility_epoch',
+    'activation_epoch',
+    'exit_epoch',
+    'withdrawable_epoch',
+)
+
+VECTORIZED_FUNCTIONS = (
+    'process_rewards_and_penalties',
+    'process_registry_updates',
+    'process_slashings',
+    'process_final_updates',
+)
+
+UINT64_MAX = 2**64 - 1
+
+# Original spec functions, per spec module, for uninstalling
+_installed: Dict[str, Dict[str, Any]] = {}
+
+
+class ValidatorColumns(object):
+    """
+    Columnar view of the validator registry and balances of a state.
+    The arrays may be modified freely, ``write_back`` copies the changes into the state.
+    """
+
+    def __init__(self, spec, state):
+        count = len(state.validators)
+        self.balances = np.fromiter(state.balances, dtype=np.uint64, count=count)
+        self.slashed = np.fromiter((v.slashed for v in state.validators), dtype=bool, count=count)
+        for name in VALIDATOR_COLUMNS:
+            if name != 'slashed':
+                setattr(self, name, np.fromiter((getattr(v, name) for v in state.validators),
+                                                dtype=np.uint64, count=count))
+        self._original = {name: getattr(self, name).copy() for name in VALIDATOR_COLUMNS + ('balances',)}
+
+    def __len__(self):
+        return len(self.balances)
+
+    def is_active(self, epoch):
+        return (self.activation_epoch <= epoch) & (epoch < self.exit_epoch)
+
+    def total_balance(self, mask):
+        # 1 Gwei minimum to avoid divisions by zero, like ``get_total_balance``
+        return max(1, int(self.effective_balance[mask].sum(dtype=np.uint64)))
+
+    def write_back(self, spec, state):
+        for name in VALIDATOR_COLUMNS:
+            column = getattr(self, name)
+            typ = spec.Validator.get_fields()[name]
+            for index in np.nonzero(column != self._original[name])[0]:
+                setattr(state.validators[index], name, typ(int(column[index])))
+            self._original[name] = column.copy()
+        for index in np.nonzero(self.balances != self._original['balances'])[0]:
+            state.balances[index] = spec.Gwei(int(self.balances[index]))
+        self._original['balances'] = self.balances.copy()
+
+
+def mul_div(values, multiplier, divisor):
+    """
+    Return ``values * multiplier // divisor`` elementwise, without uint64 overflow.
+    """
+    if len(values) == 0 or int(values.max()) * multiplier <= UINT64_MAX:
+        return values * np.uint64(multiplier) // np.uint64(divisor)
+    exact = values.astype(object) * multiplier // divisor
+    return exact.astype(np.uint64)
+
+
+def decrease_balances(balances, deltas):
+    """
+    Decrease ``balances`` by ``deltas`` with underflow protection, like ``decrease_balance``.
+    """
+    return np.where(deltas > balances, np.uint64(0), balances - deltas)
+
+
+def get_base_rewards(spec, columns, total_balance):
+    return (
+        columns.effective_balance * np.uint64(spec.BASE_REWARD_FACTOR)
+        // np.uint64(spec.integer_squareroot(total_balance))
+        // np.uint64(spec.BASE_REWARDS_PER_EPOCH)
+    )
+
+
+def get_attestation_deltas(spec, state, columns):
+    previous_epoch = spec.get_previous_epoch(state)
+    total_balance = columns.total_balance(columns.is_active(spec.get_current_epoch(state)))
+    count = len(columns)
+    rewards = np.zeros(count, dtype=np.uint64)
+    penalties = np.zeros(count, dtype=np.uint64)
+    eligible = columns.is_active(previous_epoch) | (
+        columns.slashed & (np.uint64(previous_epoch + 1) < columns.withdrawable_epoch))
+    base_rewards = get_base_rewards(spec, columns, total_balance)
+
+    participation = spec.get_attestation_participation(state, previous_epoch)
+    source = np.array(participation.source, dtype=bool)
+    target = np.array(participation.target, dtype=bool)
+    head = np.array(participation.head, dtype=bool)
+
+    # Micro-incentives for matching FFG source, FFG target, and head
+    for flags in (source, target, head):
+        attesting_balance = columns.total_balance(flags)
+        rewarded = eligible & flags
+        rewards[rewarded] += mul_div(base_rewards[rewarded], attesting_balance, total_balance)
+        penalized = eligible & ~flags
+        penalties[penalized] += base_rewards[penalized]
+
+    # Proposer and inclusion delay micro-rewards
+    inclusion_delay = np.fromiter(participation.inclusion_delay, dtype=np.uint64, count=count)[source]
+    inclusion_proposer = np.fromiter(participation.inclusion_proposer, dtype=np.int64, count=count)[source]
+    proposer_rewards = base_rewards[source] // np.uint64(spec.PROPOSER_REWARD_QUOTIENT)
+    np.add.at(rewards, inclusion_proposer, proposer_rewards)
+    rewards[source] += (base_rewards[source] - proposer_rewards) // inclusion_delay
+
+    # Inactivity penalty
+    finality_delay = previous_epoch - state.finalized_checkpoint.epoch
+    if finality_delay > spec.MIN_EPOCHS_TO_INACTIVITY_PENALTY:
+        penalties[eligible] += np.uint64(spec.BASE_REWARDS_PER_EPOCH) * base_rewards[eligible]
+        leaking = eligible & ~target
+        penalties[leaking] += mul_div(columns.effective_balance[leaking], finality_delay,
+                                      spec.INACTIVITY_PENALTY_QUOTIENT)
+
+    return rewards, penalties
+
+
+def process_rewards_and_penalties(spec, state):
+    if spec.get_current_epoch(state) == spec.GENESIS_EPOCH:
+        return
+
+    columns = ValidatorColumns(spec, state)
+    rewards, penalties = get_attestation_deltas(spec, state, columns)
+    columns.balances = decrease_balances(columns.balances + rewards, penalties)
+    columns.write_back(spec, state)
+
+
+def process_registry_updates(spec, state):
+    columns = ValidatorColumns(spec, state)
+    current_epoch = spec.get_current_epoch(state)
+    activation_exit_epoch = spec.compute_activation_exit_epoch(current_epoch)
+    churn_limit = max(spec.MIN_PER_EPOCH_CHURN_LIMIT,
+                      int(columns.is_active(current_epoch).sum()) // spec.CHURN_LIMIT_QUOTIENT)
+
+    # Process activation eligibility
+    eligible = (
+        (columns.activation_eligibility_epoch == np.uint64(spec.FAR_FUTURE_EPOCH))
+        & (columns.effective_balance == np.uint64(spec.MAX_EFFECTIVE_BALANCE))
+    )
+    columns.activation_eligibility_epoch[eligible] = current_epoch
+
+    # Process ejections, in registry order, as each exit consumes the churn of the exit queue
+    ejected = columns.is_active(current_epoch) & (columns.effective_balance <= np.uint64(spec.EJECTION_BALANCE))
+    ejected &= columns.exit_epoch == np.uint64(spec.FAR_FUTURE_EPOCH)
+    if ejected.any():
+        exit_epochs = columns.exit_epoch[columns.exit_epoch != np.uint64(spec.FAR_FUTURE_EPOCH)]
+        exit_queue_epoch = activation_exit_epoch
+        if len(exit_epochs) > 0:
+            exit_queue_epoch = max(int(exit_epochs.max()), exit_queue_epoch)
+        exit_queue_churn = int((exit_epochs == np.uint64(exit_queue_epoch)).sum())
+        for index in np.nonzero(ejected)[0]:
+            if exit_queue_churn >= churn_limit:
+                exit_queue_epoch += 1
+                exit_queue_churn = 0
+            columns.exit_epoch[index] = exit_queue_epoch
+            columns.withdrawable_epoch[index] = exit_queue_epoch + spec.MIN_VALIDATOR_WITHDRAWABILITY_DELAY
+            exit_queue_churn += 1
+
+    # Queue validators eligible for activation and not dequeued for activation prior to finalized epoch
+    queued = np.nonzero(
+        (columns.activation_eligibility_epoch != np.uint64(spec.FAR_FUTURE_EPOCH))
+        & (columns.activation_epoch >= np.uint64(
+            spec.compute_activation_exit_epoch(state.finalized_checkpoint.epoch)))
+    )[0]
+    activation_queue = queued[np.argsort(columns.activation_eligibility_epoch[queued], kind='stable')]
+    # Dequeued validators for activation up to churn limit (without resetting activation epoch)
+    dequeued = activation_queue[:churn_limit]
+    dequeued = dequeued[columns.activation_epoch[dequeued] == np.uint64(spec.FAR_FUTURE_EPOCH)]
+    columns.activation_epoch[dequeued] = activation_exit_epoch
+
+    columns.write_back(spec, state)
+
+
+def process_slashings(spec, state):
+    columns = ValidatorColumns(spec, state)
+    epoch = spec.get_current_epoch(state)
+    total_balance = columns.total_balance(columns.is_active(epoch))
+    penalized = columns.slashed & (
+        columns.withdrawable_epoch == np.uint64(epoch + spec.EPOCHS_PER_SLASHINGS_VECTOR // 2))
+    increment = spec.EFFECTIVE_BALANCE_INCREMENT  # Factored out from penalty numerator to avoid uint64 overflow
+    penalty_numerators = mul_div(columns.effective_balance[penalized] // np.uint64(increment),
+                                 min(sum(state.slashings) * 3, total_balance), 1)
+    penalties = penalty_numerators // np.uint64(total_balance) * np.uint64(increment)
+    columns.balances[penalized] = decrease_balances(columns.balances[penalized], penalties)
+    columns.write_back(spec, state)
+
+
+def process_final_updates(spec, state):
+    current_epoch = spec.get_current_epoch(state)
+    next_epoch = spec.Epoch(current_epoch + 1)
+    # Reset eth1 data votes
+    if (state.slot + 1) % spec.SLOTS_PER_ETH1_VOTING_PERIOD == 0:
+        state.eth1_data_votes = []
+    # Update effective balances with hysteresis
+    columns = ValidatorColumns(spec, state)
+    half_increment = spec.EFFECTIVE_BALANCE_INCREMENT // 2
+    updated = (
+        (columns.balances < columns.effective_balance)
+        | (columns.effective_balance + np.uint64(3 * half_increment) < columns.balances)
+    )
+    balances = columns.balances[updated]
+    columns.effective_balance[updated] = np.minimum(
+        balances - balances % np.uint64(spec.EFFECTIVE_BALANCE_INCREMENT),
+        np.uint64(spec.MAX_EFFECTIVE_BALANCE),
+    )
+    columns.write_back(spec, state)
+    # Reset slashings
+    state.slashings[next_epoch % spec.EPOCHS_PER_SLASHINGS_VECTOR] = spec.Gwei(0)
+    # Set randao mix
+    state.randao_mixes[next_epoch % spec.EPOCHS_PER_HISTORICAL_VECTOR] = spec.get_randao_mix(state, current_epoch)
+    # Set historical root accumulator
+    if next_epoch % (spec.SLOTS_PER_HISTORICAL_ROOT // spec.SLOTS_PER_EPOCH) == 0:
+        historical_batch = spec.HistoricalBatch(block_roots=state.block_roots, state_roots=state.state_roots)
+        state.historical_roots.append(spec.hash_tree_root(historical_batch))
+    # Rotate current/previous epoch attestations
+    state.previous_epoch_attestations = state.current_epoch_attestations
+    state.current_epoch_attestations = []
+
+
+def wrap_vectorized(spec, fn):
+    def entry(state):
+        fn(spec, state)
+        # The state was modified outside of the spec functions, indexes maintained by them are stale
+        spec.reset_processing_context(state)
+    return entry
+
+
+def install(spec):
+    """
+    Replace the registry-wide epoch sub-transitions of ``spec`` with their vectorized equivalents.
+    """
+    if spec.__name__ in _installed:
+        return
+    _installed[spec.__name__] = {name: getattr(spec, name) for name in VECTORIZED_FUNCTIONS}
+    for name in VECTORIZED_FUNCTIONS:
+        setattr(spec, name, wrap_vectorized(spec, globals()[name]))
+
+
+def uninstall(spec):
+    """
+    Restore the spec epoch sub-transitions of ``spec``.
+    """
+    for name, fn in _installed.pop(spec.__name__, {}).items():
+        setattr(spec, name, fn)
+
+
+def is_installed(spec) -> bool:
+    return spec.__name__ in _installed
@@ -11,5 +11,9 @@ setup(
         "py_ecc==1.7.1",
         "ssz==0.1.3",
         "dataclasses==0.6",
-    ]
+    ],
+    extras_require={
+        "vectorized": ["numpy>=1.16"],
+        "custody": ["gmpy2>=2.0"],
+    },
 )